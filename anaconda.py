@@ -242,6 +242,7 @@ if __name__ == "__main__":
 
     # init threading before Gtk can do anything and before we start using threads
     from pyanaconda.threading import AnacondaThread, threadMgr
+    from pyanaconda.core.startup.timeline import startup_timeline
     from pyanaconda.core.i18n import _
     from pyanaconda.core import util, constants
     from pyanaconda import startup_utils
@@ -376,6 +377,10 @@ if __name__ == "__main__":
         util.ipmi_report(constants.IPMI_FAILED)
         sys.exit(1)
 
+    # Start a new trace of the installation tasks.
+    from pyanaconda.core.trace import reset_trace
+    reset_trace()
+
     # assign the other anaconda variables from options
     anaconda.set_from_opts(opts)
 
@@ -419,6 +424,8 @@ if __name__ == "__main__":
     log.info("anaconda called with cmdline = %s", sys.argv)
     log.info("Default encoding = %s ", sys.getdefaultencoding())
 
+    startup_timeline.checkpoint("early setup")
+
     # start dbus session (if not already running) and run boss in it
     try:
         anaconda.dbus_launcher.start()
@@ -429,6 +436,8 @@ if __name__ == "__main__":
         time.sleep(10)
         sys.exit(1)
 
+    startup_timeline.checkpoint("DBus modules")
+
     # Find a kickstart file.
     kspath = startup_utils.find_kickstart(opts)
     log.info("Found a kickstart file: %s", kspath)
@@ -442,6 +451,7 @@ if __name__ == "__main__":
 
     # Parse the kickstart file.
     ksdata = startup_utils.parse_kickstart(kspath, addon_paths, strict_mode=opts.ksstrict)
+    startup_timeline.checkpoint("kickstart")
 
     # Pick up any changes from interactive-defaults.ks that would
     # otherwise be covered by the dracut KS parser.
@@ -549,10 +559,44 @@ if __name__ == "__main__":
 
     # Now that LANG is set, do something with it
     localization.setup_locale(os.environ["LANG"], localization_proxy, text_mode=anaconda.tui_mode)
+    startup_timeline.checkpoint("localization")
 
     from pyanaconda.storage.initialization import enable_installer_mode, reset_storage
     enable_installer_mode()
 
+    # Set the disk images.
+    from pyanaconda.modules.common.constants.objects import DISK_SELECTION
+    from pyanaconda.argument_parsing import name_path_pairs
+    disk_select_proxy = STORAGE.get_proxy(DISK_SELECTION)
+    disk_images = {}
+
+    try:
+        for (name, path) in name_path_pairs(opts.images):
+            log.info("naming disk image '%s' '%s'", path, name)
+            disk_images[name] = path
+    except ValueError as e:
+        stdout_log.error("error specifying image file: %s", e)
+        util.ipmi_abort(scripts=ksdata.scripts)
+        sys.exit(1)
+
+    disk_select_proxy.SetDiskImages(disk_images)
+
+    # Ignore disks labeled OEMDRV
+    from pyanaconda.storage.utils import ignore_oemdrv_disks
+    ignore_oemdrv_disks()
+
+    # Ignore nvdimm devices.
+    from pyanaconda.storage.utils import ignore_nvdimm_blockdevs
+    ignore_nvdimm_blockdevs()
+
+    # Specify protected devices.
+    from pyanaconda.modules.common.constants.services import STORAGE
+
+    protected_devices = anaconda.get_protected_devices(opts)
+    disk_select_proxy.SetProtectedDevices(protected_devices)
+
+    startup_timeline.checkpoint("storage configuration")
+
     # Initialize the network now, in case the display needs it
     from pyanaconda.network import initialize_network, wait_for_connecting_NM_thread, wait_for_connected_NM
 
@@ -562,9 +606,35 @@ if __name__ == "__main__":
         log.info("network: waiting for connectivity requested by inst.waitfornet=%d", opts.waitfornet)
         wait_for_connected_NM(timeout=opts.waitfornet)
 
+    # Start the storage scan and the time initialization now. The scan
+    # needs the network for iSCSI and FCoE devices, but it doesn't depend
+    # on the display, so it runs at the same time as the display setup.
+    # Errors of the storage scan are handled once the interface is ready.
+    import threading
+    interface_ready = threading.Event()
+
+    if not conf.target.is_directory:
+        threadMgr.add(AnacondaThread(name=constants.THREAD_STORAGE,
+                                     target=startup_timeline.wrap("storage scan", reset_storage),
+                                     args=(anaconda.storage, ),
+                                     kwargs={"interface_ready": interface_ready}))
+
+    from pyanaconda.timezone import time_initialize
+    from pyanaconda.modules.common.constants.services import TIMEZONE
+    timezone_proxy = TIMEZONE.get_proxy()
+
+    if conf.system.can_initialize_system_clock:
+        threadMgr.add(AnacondaThread(name=constants.THREAD_TIME_INIT,
+                                     target=startup_timeline.wrap("time init", time_initialize),
+                                     args=(timezone_proxy,
+                                           anaconda.storage)))
+
     # In any case do some actions only after NM finishes its connecting.
     threadMgr.add(AnacondaThread(name=constants.THREAD_WAIT_FOR_CONNECTING_NM,
-                                 target=wait_for_connecting_NM_thread))
+                                 target=startup_timeline.wrap("network connecting",
+                                                              wait_for_connecting_NM_thread)))
+
+    startup_timeline.checkpoint("network")
 
     # now start the interface
     display.setup_display(anaconda, opts)
@@ -575,6 +645,8 @@ if __name__ == "__main__":
         log.warning("reinitializing locale due to failed attempt to start the GUI")
         localization.setup_locale(os.environ["LANG"], localization_proxy, text_mode=anaconda.tui_mode)
 
+    startup_timeline.checkpoint("display")
+
     # we now know in which mode we are going to run so store the information
     from pykickstart import constants as pykickstart_constants
     display_mode_coversion_table = {
@@ -613,53 +685,10 @@ if __name__ == "__main__":
     # Add a check for the snapshot requests.
     storage_checker.add_check(ksdata.snapshot.verify_requests)
 
-    # Set the disk images.
-    from pyanaconda.modules.common.constants.objects import DISK_SELECTION
-    from pyanaconda.argument_parsing import name_path_pairs
-    disk_select_proxy = STORAGE.get_proxy(DISK_SELECTION)
-    disk_images = {}
-
-    try:
-        for (name, path) in name_path_pairs(opts.images):
-            log.info("naming disk image '%s' '%s'", path, name)
-            disk_images[name] = path
-    except ValueError as e:
-        stdout_log.error("error specifying image file: %s", e)
-        util.ipmi_abort(scripts=ksdata.scripts)
-        sys.exit(1)
-
-    disk_select_proxy.SetDiskImages(disk_images)
-
-    # Ignore disks labeled OEMDRV
-    from pyanaconda.storage.utils import ignore_oemdrv_disks
-    ignore_oemdrv_disks()
-
-    # Ignore nvdimm devices.
-    from pyanaconda.storage.utils import ignore_nvdimm_blockdevs
-    ignore_nvdimm_blockdevs()
-
-    # Specify protected devices.
-    from pyanaconda.modules.common.constants.services import STORAGE
-
-    protected_devices = anaconda.get_protected_devices(opts)
-    disk_select_proxy.SetProtectedDevices(protected_devices)
+    # The interface can handle errors of the storage scan now.
+    interface_ready.set()
 
     from pyanaconda.payload.manager import payloadMgr
-    from pyanaconda.timezone import time_initialize
-
-    if not conf.target.is_directory:
-        threadMgr.add(AnacondaThread(name=constants.THREAD_STORAGE,
-                                     target=reset_storage,
-                                     args=(anaconda.storage, )))
-
-    from pyanaconda.modules.common.constants.services import TIMEZONE
-    timezone_proxy = TIMEZONE.get_proxy()
-
-    if conf.system.can_initialize_system_clock:
-        threadMgr.add(AnacondaThread(name=constants.THREAD_TIME_INIT,
-                                     target=time_initialize,
-                                     args=(timezone_proxy,
-                                           anaconda.storage)))
 
     if flags.rescue_mode:
         rescue.start_rescue_mode_ui(anaconda)
@@ -731,6 +760,7 @@ if __name__ == "__main__":
             SnapshotCreateTask(anaconda.storage, requests, SNAPSHOT_WHEN_PRE_INSTALL).run()
 
     anaconda.intf.setup(ksdata)
+    startup_timeline.log_critical_path("first screen")
     anaconda.intf.run()
 
 # vim:tw=78:ts=4:et:sw=4
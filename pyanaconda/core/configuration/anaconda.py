@@ -55,6 +55,73 @@ class AnacondaSection(Section):
         """List of enabled kickstart modules."""
         return self._get_option("kickstart_modules").split()
 
+    @property
+    def start_modules_on_demand(self):
+        """Start the DBus modules on demand.
+
+        Only the prefetched modules are started with the installer.
+        Other modules and addons are started when the kickstart file
+        has data for them or when they are accessed for the first time.
+        """
+        return self._get_option("start_modules_on_demand", bool)
+
+    @property
+    def use_module_host(self):
+        """Start the DBus modules from a module host.
+
+        The host imports the common dependencies of the modules once
+        and forks a new process for every started module.
+        """
+        return self._get_option("use_module_host", bool)
+
+    @property
+    def prefetched_modules(self):
+        """List of DBus modules started with the installer.
+
+        The option is used only if the modules are started on demand.
+        """
+        return self._get_option("prefetched_modules").split()
+
+    @property
+    def independent_modules(self):
+        """List of DBus modules with tasks independent of other modules.
+
+        The tasks of these modules run at the same time as the tasks
+        of other modules. The tasks of one module run one by one.
+        """
+        return self._get_option("independent_modules").split()
+
+    @property
+    def task_workers(self):
+        """A maximal number of threads running the tasks of a DBus module.
+
+        The threads are reused by the next tasks of the module.
+        """
+        return self._get_option("task_workers", int)
+
+    @property
+    def progress_interval(self):
+        """An interval of coalescing of progress changes of DBus tasks.
+
+        The progress changes reported during the interval are merged
+        into one change. Zero means that every change is reported.
+
+        :return: a number of milliseconds
+        """
+        return self._get_option("progress_interval", int)
+
+    @property
+    def trace_file(self):
+        """A path to the trace file of the installation tasks.
+
+        The installation tasks and the tasks of the DBus modules
+        are traced to this file. The file is removed when the
+        installer starts. An empty string disables the tracing.
+
+        :return: a path or an empty string
+        """
+        return self._get_option("trace_file", str)
+
 
 class AnacondaConfiguration(Configuration):
     """Representation of the Anaconda configuration."""
@@ -103,3 +103,47 @@ class PayloadSection(Section):
         this option.
         """
         return self._get_option("verify_ssl", bool)
+
+    @property
+    def block_level_deployment(self):
+        """Write the file system image of a live payload to the root device.
+
+        If enabled, the root file system image is written directly to
+        the root device instead of copying the files. The file system
+        is grown to the size of the device. This is possible only if
+        the types of the file systems match, the root file system has no
+        custom creation options and the image is not stored on the target.
+
+        The file system keeps the features and the block size of the image.
+        Only its UUID and label are set to the configured values.
+        """
+        return self._get_option("block_level_deployment", bool)
+
+    @property
+    def package_cache_dir(self):
+        """A path to a persistent cache of downloaded packages.
+
+        The cache can be stored on a mounted volume or a network share
+        and shared by many installations from the same repositories.
+        Packages found in the cache are not downloaded again. The cache
+        is not used if the path is empty.
+        """
+        return self._get_option("package_cache_dir", str)
+
+    @property
+    def package_cache_size(self):
+        """A maximal size of the persistent cache of packages in MiB.
+
+        The least recently used packages are removed from the cache
+        if the cache is bigger.
+        """
+        return self._get_option("package_cache_size", int)
+
+    @property
+    def initramfs_jobs(self):
+        """A maximal number of kernels with initramfs images generated in parallel.
+
+        The initramfs images of different kernels are generated at the
+        same time. Zero means the number of CPUs.
+        """
+        return self._get_option("initramfs_jobs", int)
@@ -69,6 +69,7 @@ DBUS_ANACONDA_SESSION_ADDRESS = "DBUS_ANACONDA_SESSION_BUS_ADDRESS"
 
 ANACONDA_BUS_CONF_FILE = "/usr/share/anaconda/dbus/anaconda-bus.conf"
 ANACONDA_BUS_ADDR_FILE = "/run/anaconda/bus.address"
+ANACONDA_MODULE_HOST_SOCKET = "/run/anaconda/module-host.socket"
 
 ANACONDA_DATA_DIR = "/usr/share/anaconda"
 ANACONDA_CONFIG_DIR = "/etc/anaconda/"
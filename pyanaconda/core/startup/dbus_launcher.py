@@ -29,7 +29,7 @@ from subprocess import TimeoutExpired
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.util import startProgram
 from pyanaconda.core.constants import ANACONDA_BUS_ADDR_FILE, ANACONDA_CONFIG_TMP, \
-    ANACONDA_BUS_CONF_FILE, DBUS_ANACONDA_SESSION_ADDRESS
+    ANACONDA_BUS_CONF_FILE, DBUS_ANACONDA_SESSION_ADDRESS, ANACONDA_MODULE_HOST_SOCKET
 from pyanaconda.core.dbus import DBus
 from dasbus.constants import DBUS_FLAG_NONE
 from pyanaconda.modules.common.constants.services import BOSS
@@ -46,9 +46,11 @@ class AnacondaDBusLauncher(object):
     """Class for launching the Anaconda DBus modules."""
 
     DBUS_LAUNCH_BIN = "dbus-daemon"
+    MODULE_HOST_BIN = "/usr/libexec/anaconda/start-module"
 
     def __init__(self):
         self._dbus_daemon_process = None
+        self._module_host_process = None
         self._log_file = None
         self._bus_address = None
 
@@ -68,6 +70,9 @@ class AnacondaDBusLauncher(object):
         self._set_environment()
         self._write_bus_address()
 
+        if conf.anaconda.use_module_host:
+            self._start_module_host()
+
         self._start_boss()
         self._start_modules()
 
@@ -79,6 +84,7 @@ class AnacondaDBusLauncher(object):
         :param timeout: seconds to the launcher timeout
         """
         self._stop_boss_and_modules()
+        self._stop_module_host(timeout)
 
         self._stop_dbus_session(timeout)
         self._remove_bus_address_file()
@@ -167,6 +173,45 @@ class AnacondaDBusLauncher(object):
         if os.path.exists(f):
             os.unlink(f)
 
+    def _start_module_host(self):
+        """Start the host of the DBus modules.
+
+        The host is started with the environment of the DBus session,
+        so the forked modules can connect to the session.
+        """
+        self._remove_module_host_socket()
+
+        command = [
+            self.MODULE_HOST_BIN,
+            "pyanaconda.core.startup.module_host",
+            "--serve",
+            ANACONDA_MODULE_HOST_SOCKET
+        ]
+
+        self._module_host_process = startProgram(
+            command, stdout=self._log_file, stderr=self._log_file, reset_lang=False
+        )
+
+    def _stop_module_host(self, timeout):
+        """Stop the host of the DBus modules."""
+        if not self._module_host_process:
+            return
+
+        self._module_host_process.terminate()
+
+        try:
+            self._module_host_process.wait(timeout)
+        except TimeoutExpired:
+            log.error("Module host wasn't terminated kill it now")
+            self._module_host_process.kill()
+
+        self._remove_module_host_socket()
+
+    def _remove_module_host_socket(self):
+        """Remove the socket of the module host."""
+        if os.path.exists(ANACONDA_MODULE_HOST_SOCKET):
+            os.unlink(ANACONDA_MODULE_HOST_SOCKET)
+
     def _start_boss(self):
         """Start the boss."""
         bus_proxy = DBus.proxy
@@ -0,0 +1,358 @@
+#
+# Host of the Anaconda DBus modules.
+#
+# Copyright (C) 2019
+# Red Hat, Inc.  All rights reserved.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Host of the Anaconda DBus modules.
+
+The DBus modules are separate Python processes that import the same
+dependencies. The module host imports these dependencies once and
+forks a new process for every started module, so the modules share
+the imported code copy-on-write.
+
+The host is started by the DBus launcher:
+
+    python3 -m pyanaconda.core.startup.module_host --serve SOCKET
+
+The DBus daemon starts a module with the start-module script that
+asks the host to fork the module:
+
+    python3 -m pyanaconda.core.startup.module_host --start SOCKET MODULE
+
+The client sends the name of the module, its environment and its
+standard file descriptors to the host. The module runs with them, so
+it behaves like a module started by the DBus daemon. The client waits
+for the module to exit and exits with the same status. The module is
+terminated if the client is killed. If the host is not running, the
+client runs the module itself.
+
+This module is imported by the clients, so it can import only
+the standard library at the top level.
+"""
+import array
+import atexit
+import importlib
+import json
+import os
+import runpy
+import signal
+import socket
+import sys
+import threading
+import traceback
+
+__all__ = ["ModuleHost", "MODULE_HOST_PRELOAD", "start_module"]
+
+# Python modules imported by the host.
+MODULE_HOST_PRELOAD = [
+    "dasbus.connection",
+    "dasbus.server.interface",
+    "dasbus.typing",
+    "pykickstart.parser",
+    "pykickstart.version",
+    "pyanaconda.core.configuration.anaconda",
+    "pyanaconda.core.dbus",
+    "pyanaconda.core.kickstart",
+    "pyanaconda.core.util",
+    "pyanaconda.modules.common.base",
+    "pyanaconda.modules.common.task",
+    "blivet",
+]
+
+# The standard file descriptors passed to the module.
+_STANDARD_FDS = [0, 1, 2]
+
+
+class ModuleHost(object):
+    """Host that forks the Anaconda DBus modules."""
+
+    def __init__(self, socket_path, preload=None):
+        """Create a new host.
+
+        :param str socket_path: a path to the socket of the host
+        :param preload: a list of Python modules to import or None for the default
+        """
+        self._socket_path = socket_path
+        self._preload = MODULE_HOST_PRELOAD if preload is None else preload
+        self._listener = None
+
+    def run(self):
+        """Run the host.
+
+        The socket is created before the modules are imported, so
+        the clients can connect immediately. They are served once
+        the modules are imported.
+        """
+        self._listen()
+        self._preload_modules()
+
+        # The forked modules are reaped automatically.
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        while True:
+            connection, _address = self._listener.accept()
+
+            try:
+                self._serve(connection)
+            except Exception:  # pylint: disable=broad-except
+                _log("Failed to start a module:\n" + traceback.format_exc())
+            finally:
+                connection.close()
+
+    def _listen(self):
+        """Listen on the socket of the host."""
+        if os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self._socket_path)
+        os.chmod(self._socket_path, 0o600)
+        self._listener.listen(16)
+
+    def _preload_modules(self):
+        """Import the common dependencies of the modules."""
+        for name in self._preload:
+            try:
+                importlib.import_module(name)
+            except Exception as e:  # pylint: disable=broad-except
+                _log("Failed to preload {}: {}".format(name, e))
+
+    def _serve(self, connection):
+        """Fork a module requested by the client."""
+        request, fds = _receive_request(connection)
+
+        try:
+            # Don't duplicate the buffered output in the new process.
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+            pid = os.fork()
+
+            if pid == 0:
+                self._run_module_in_child(connection, request, fds)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+        _log("Started {} with pid {}.".format(request["module"], pid))
+
+    def _run_module_in_child(self, connection, request, fds):
+        """Run the module in the forked process.
+
+        This method never returns.
+        """
+        status = 1
+
+        try:
+            self._listener.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+            for target, fd in zip(_STANDARD_FDS, fds):
+                os.dup2(fd, target)
+
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+
+            _send_message(connection, {"pid": os.getpid()})
+            _watch_client(connection)
+
+            status = _run_module(request["module"])
+            _shutdown_module()
+
+            # The client exits once it receives the status.
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            _send_message(connection, {"status": status})
+        except BrokenPipeError:
+            _log("The client of {} has exited.".format(request["module"]))
+        except BaseException:  # pylint: disable=broad-except
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)  # pylint: disable=protected-access
+
+
+def _log(message):
+    """Log a message of the host."""
+    print("module host: {}".format(message), file=sys.stderr, flush=True)
+
+
+def _run_module(name):
+    """Run the module as the main module.
+
+    :return: an exit status
+    """
+    sys.argv = [name]
+
+    try:
+        runpy.run_module(name, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+
+        if isinstance(e.code, int):
+            return e.code
+
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException:  # pylint: disable=broad-except
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+def _watch_client(connection):
+    """Terminate the module if the client exits.
+
+    The client doesn't send anything after the request, so
+    the end of the stream means that the client has exited.
+    """
+    def watch():
+        try:
+            while connection.recv(1024):
+                pass
+        except OSError:
+            pass
+
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=watch, name="ModuleHostClientWatcher", daemon=True).start()
+
+
+def _shutdown_module():
+    """Finalize the module like the exiting interpreter.
+
+    The forked module exits with os._exit, so wait for its threads
+    and call its exit functions here. They include logging.shutdown.
+    """
+    threading._shutdown()  # pylint: disable=protected-access
+    atexit._run_exitfuncs()  # pylint: disable=protected-access
+
+
+def _send_message(connection, message):
+    """Send a message as one line of JSON."""
+    connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _receive_request(connection):
+    """Receive the request of the client.
+
+    :return: a tuple of the request and a list of file descriptors
+    """
+    fds = array.array("i")
+    data, ancdata, _flags, _address = connection.recvmsg(
+        65536, socket.CMSG_SPACE(len(_STANDARD_FDS) * fds.itemsize)
+    )
+
+    for level, kind, cdata in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cdata[:len(cdata) - (len(cdata) % fds.itemsize)])
+
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(65536)
+
+        if not chunk:
+            for fd in fds:
+                os.close(fd)
+
+            raise ConnectionError("Incomplete request.")
+
+        data += chunk
+
+    return json.loads(data.decode("utf-8")), list(fds)
+
+
+def start_module(socket_path, name):
+    """Start the module with the host and wait for it to exit.
+
+    :param str socket_path: a path to the socket of the host
+    :param str name: a name of the Python module to run
+    :return: an exit status of the module
+    :raise: OSError if the host is not available
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        connection.connect(socket_path)
+
+        request = {
+            "module": name,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+
+        data = json.dumps(request).encode("utf-8") + b"\n"
+        fds = array.array("i", _STANDARD_FDS)
+        sent = connection.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+        connection.sendall(data[sent:])
+
+        return _wait_for_module(connection)
+    finally:
+        connection.close()
+
+
+def _wait_for_module(connection):
+    """Wait for the module to exit.
+
+    The termination signals are forwarded to the module.
+
+    :return: an exit status of the module
+    """
+    status = 1
+
+    def forward_signal(signum, _frame):
+        if pid:
+            os.kill(pid, signum)
+
+    pid = None
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+
+    with connection.makefile("rb") as f:
+        for line in f:
+            message = json.loads(line.decode("utf-8"))
+
+            if "pid" in message:
+                pid = message["pid"]
+            elif "status" in message:
+                status = message["status"]
+
+    return status
+
+
+def main(argv):
+    """Run the host or the client."""
+    if len(argv) == 2 and argv[0] == "--serve":
+        ModuleHost(argv[1]).run()
+        return 0
+
+    if len(argv) == 3 and argv[0] == "--start":
+        try:
+            return start_module(argv[1], argv[2])
+        except OSError as e:
+            _log("Running {} without the host: {}".format(argv[2], e))
+
+        os.execv(sys.executable, [sys.executable, "-m", argv[2]])
+
+    print("Usage: module_host --serve SOCKET | --start SOCKET MODULE", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,170 @@
+#
+# Timeline of the installer startup.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Timeline of the installer startup.
+
+The main thread marks checkpoints of the startup. A step of the main
+thread is the time between two checkpoints, so the steps form the
+critical path to the first screen. The jobs started in background
+threads are recorded separately, because they run concurrently with
+the main thread.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from pyanaconda.anaconda_loggers import get_module_logger
+log = get_module_logger(__name__)
+
+__all__ = ["StartupStep", "StartupTimeline", "startup_timeline"]
+
+StartupStep = namedtuple("StartupStep", ["name", "start", "end"])
+
+
+def _get_process_start():
+    """Get the monotonic time of the process start.
+
+    :return: a monotonic time or None if unknown
+    """
+    try:
+        with open("/proc/self/stat", "rt") as f:
+            stat = f.read()
+
+        # The process name can contain spaces, so skip it.
+        fields = stat[stat.rindex(")") + 2:].split()
+        start_ticks = int(fields[19])
+        ticks = time.clock_gettime(time.CLOCK_BOOTTIME)
+        elapsed = ticks - start_ticks / time.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+    return time.monotonic() - max(elapsed, 0)
+
+
+class StartupTimeline(object):
+    """Timeline of the installer startup."""
+
+    def __init__(self, origin=None):
+        """Create a new timeline.
+
+        :param origin: a monotonic time of the startup or None for the process start
+        """
+        if origin is None:
+            origin = _get_process_start() or time.monotonic()
+
+        self._origin = origin
+        self._last_checkpoint = origin
+        self._steps = []
+        self._jobs = []
+        self._running_jobs = {}
+        self._lock = threading.Lock()
+
+    @property
+    def steps(self):
+        """Steps of the main thread.
+
+        :return: a list of StartupStep
+        """
+        with self._lock:
+            return list(self._steps)
+
+    @property
+    def jobs(self):
+        """Finished jobs of the background threads.
+
+        :return: a list of StartupStep
+        """
+        with self._lock:
+            return list(self._jobs)
+
+    @property
+    def running_jobs(self):
+        """Running jobs of the background threads.
+
+        :return: a dictionary of job names and their start times
+        """
+        with self._lock:
+            return dict(self._running_jobs)
+
+    def checkpoint(self, name):
+        """Mark the end of a step of the main thread.
+
+        :param str name: a name of the finished step
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self._steps.append(StartupStep(name, self._last_checkpoint, now))
+            self._last_checkpoint = now
+
+    def wrap(self, name, target):
+        """Record the time of a background job.
+
+        :param str name: a name of the job
+        :param target: a function to run in a background thread
+        :return: a function that runs and records the target
+        """
+        def run_job(*args, **kwargs):
+            start = time.monotonic()
+
+            with self._lock:
+                self._running_jobs[name] = start
+
+            try:
+                return target(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running_jobs.pop(name, None)
+                    self._jobs.append(StartupStep(name, start, time.monotonic()))
+
+        return run_job
+
+    def log_critical_path(self, milestone):
+        """Log the breakdown of the time to the milestone.
+
+        The time since the last checkpoint is recorded as a step
+        with the name of the milestone.
+
+        :param str milestone: a name of the reached milestone
+        """
+        self.checkpoint(milestone)
+        steps = self.steps
+        jobs = self.jobs
+        running_jobs = self.running_jobs
+        end = steps[-1].end
+        total = end - self._origin
+
+        log.info("Reached the %s in %.2f s. The critical path:", milestone, total)
+
+        for step in steps:
+            duration = step.end - step.start
+            log.info("  %-30s %8.2f s %5.1f %%", step.name, duration,
+                     100 * duration / total if total else 0)
+
+        for job in jobs:
+            log.info("  [background] %-17s %8.2f s (started at %.2f s, finished)",
+                     job.name, job.end - job.start, job.start - self._origin)
+
+        for name, start in running_jobs.items():
+            log.info("  [background] %-17s %8.2f s (started at %.2f s, still running)",
+                     name, end - start, start - self._origin)
+
+
+# Timeline of the installer startup.
+startup_timeline = StartupTimeline()
@@ -0,0 +1,294 @@
+#
+# Tracing of installation tasks.
+#
+# Copyright (C) 2019 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Tracing of installation tasks.
+
+Every traced span is appended to a trace file as an event of the Chrome
+trace format, so the file can be opened in chrome://tracing or Perfetto.
+The main process and the DBus modules append to the same file. Events
+of a process are identified by the pid and the events of a thread by
+the tid. The trace file is configured by the trace_file option of the
+Anaconda configuration and it is reset when the installer starts.
+
+The events record the wall time and the CPU time of the thread. The
+peak RSS, the bytes read and written and the number of started child
+processes are counters of the whole process, so they include the work
+of other spans running at the same time.
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from pyanaconda.core.configuration.anaconda import conf
+from pyanaconda.anaconda_loggers import get_module_logger
+log = get_module_logger(__name__)
+
+__all__ = ["ResourceUsage", "get_resource_usage", "count_child_process", "get_trace_file",
+           "reset_trace", "trace_span", "load_trace", "save_trace"]
+
+ResourceUsage = namedtuple("ResourceUsage", [
+    "wall_time",
+    "cpu_time",
+    "children_cpu_time",
+    "peak_rss",
+    "children_peak_rss",
+    "read_bytes",
+    "write_bytes",
+    "child_processes"
+])
+
+_child_processes = 0
+_child_processes_lock = threading.Lock()
+_described_paths = set()
+_described_paths_lock = threading.Lock()
+
+
+def get_trace_file():
+    """Get a path to the trace file of the installation.
+
+    :return: a path or an empty string if the tracing is disabled
+    """
+    return conf.anaconda.trace_file
+
+
+def reset_trace(path=None):
+    """Remove the trace file of a previous run.
+
+    :param str path: a path to the trace file or None
+    """
+    path = path or get_trace_file()
+
+    if not path:
+        return
+
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log.warning("Failed to reset the trace: %s", e)
+
+    with _described_paths_lock:
+        _described_paths.discard(path)
+
+
+def count_child_process():
+    """Count a started child process."""
+    global _child_processes
+
+    with _child_processes_lock:
+        _child_processes += 1
+
+
+def _get_io_counters():
+    """Get the numbers of bytes read and written by the process.
+
+    The counters include the reaped child processes.
+    """
+    counters = {}
+
+    try:
+        with open("/proc/self/io", "rt") as f:
+            for line in f:
+                key, _sep, value = line.partition(":")
+                counters[key] = int(value)
+    except (OSError, ValueError):
+        return None, None
+
+    return counters.get("read_bytes"), counters.get("write_bytes")
+
+
+def get_resource_usage():
+    """Get the current resource usage.
+
+    :return: an instance of ResourceUsage
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    read_bytes, write_bytes = _get_io_counters()
+
+    return ResourceUsage(
+        wall_time=time.time(),
+        cpu_time=time.thread_time(),
+        children_cpu_time=children.ru_utime + children.ru_stime,
+        peak_rss=usage.ru_maxrss,
+        children_peak_rss=children.ru_maxrss,
+        read_bytes=read_bytes,
+        write_bytes=write_bytes,
+        child_processes=_child_processes
+    )
+
+
+def _get_process_name():
+    """Get a name of the current process."""
+    path = os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+
+    # The DBus modules are started as python3 -m pyanaconda.modules.<name>.
+    if os.path.basename(path) == "__main__.py":
+        return os.path.basename(os.path.dirname(path))
+
+    return os.path.basename(path)
+
+
+def _delta(end, start):
+    """Get a difference of two counters."""
+    if end is None or start is None:
+        return None
+
+    return end - start
+
+
+def _create_event(name, category, start, end, failed):
+    """Create an event of the Chrome trace format."""
+    return {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": int(start.wall_time * 1000000),
+        "dur": int((end.wall_time - start.wall_time) * 1000000),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": {
+            "thread": threading.current_thread().name,
+            "failed": failed,
+            "cpu_time_ms": int((end.cpu_time - start.cpu_time) * 1000),
+            "children_cpu_time_ms":
+                int((end.children_cpu_time - start.children_cpu_time) * 1000),
+            "peak_rss_kb": end.peak_rss,
+            "children_peak_rss_kb": end.children_peak_rss,
+            "read_bytes": _delta(end.read_bytes, start.read_bytes),
+            "write_bytes": _delta(end.write_bytes, start.write_bytes),
+            "child_processes": end.child_processes - start.child_processes
+        }
+    }
+
+
+def _write_events(events, path):
+    """Append events to the trace file.
+
+    Every event is written by one call on its own line, so events
+    of different processes don't mix.
+    """
+    try:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            os.write(fd, b"[\n")
+            os.close(fd)
+        except FileExistsError:
+            pass
+
+        data = "".join(json.dumps(event) + ",\n" for event in events).encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        log.debug("Failed to write the trace: %s", e)
+
+
+def _write_event(event, path):
+    """Append an event to the trace file."""
+    events = []
+
+    with _described_paths_lock:
+        described = path in _described_paths
+        _described_paths.add(path)
+
+    if not described:
+        events.append({
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": _get_process_name()}
+        })
+
+    events.append(event)
+    _write_events(events, path)
+
+
+@contextmanager
+def trace_span(name, category, path=None):
+    """Trace the resource usage of a block of code.
+
+    Nothing is traced if the tracing is disabled.
+
+    :param str name: a name of the span
+    :param str category: a category of the span
+    :param str path: a path to the trace file or None
+    """
+    path = path or get_trace_file()
+
+    if not path:
+        yield
+        return
+
+    start = get_resource_usage()
+    failed = True
+
+    try:
+        yield
+        failed = False
+    finally:
+        end = get_resource_usage()
+        _write_event(_create_event(name, category, start, end, failed), path)
+
+
+def load_trace(path=None):
+    """Load events from the trace file.
+
+    :param str path: a path to the trace file or None
+    :return: a list of events
+    """
+    path = path or get_trace_file()
+    events = []
+
+    with open(path, "rt") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+
+            if not line or line in ("[", "]"):
+                continue
+
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                log.debug("Skipping an invalid line of the trace: %s", line)
+
+    return events
+
+
+def save_trace(target_path, path=None):
+    """Save the trace file as a valid JSON document.
+
+    :param str target_path: a path to the saved trace
+    :param str path: a path to the trace file or None
+    """
+    events = load_trace(path)
+
+    with open(target_path, "wt") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    os.chmod(target_path, 0o600)
@@ -49,6 +49,7 @@ from pyanaconda.core.constants import DRACUT_SHUTDOWN_EJECT, TRANSLATIONS_UPDATE
     WARNING_HARDWARE_UNSUPPORTED, WARNING_SUPPORT_REMOVED
 from pyanaconda.core.constants import SCREENSHOTS_DIRECTORY, SCREENSHOTS_TARGET_DIRECTORY
 from pyanaconda.core.regexes import URL_PARSE
+from pyanaconda.core.trace import count_child_process
 from pyanaconda.errors import RemovedModuleError, ExitError
 
 from pyanaconda.core.i18n import _
@@ -199,7 +200,7 @@ def startProgram(argv, root='/', stdin=None, stdout=subprocess.PIPE, stderr=subp
         env.update(env_add)
 
     # pylint: disable=subprocess-popen-preexec-fn
-    return subprocess.Popen(argv,
+    proc = subprocess.Popen(argv,
                             stdin=stdin,
                             stdout=stdout,
                             stderr=stderr,
@@ -207,6 +208,9 @@ def startProgram(argv, root='/', stdin=None, stdout=subprocess.PIPE, stderr=subp
                             restore_signals=restore_signals,
                             preexec_fn=preexec, cwd=root, env=env, **kwargs)
 
+    count_child_process()
+    return proc
+
 
 def startX(argv, output_redirect=None, timeout=X_TIMEOUT):
     """ Start X and return once X is ready to accept connections.
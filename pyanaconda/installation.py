@@ -18,12 +18,15 @@
 # Red Hat, Inc.
 #
 
+import os
+
 from blivet import callbacks, arch
 from blivet.devices import BTRFSDevice
 
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.constants import BOOTLOADER_DISABLED
 from pyanaconda.core.kernel import kernel_arguments
+from pyanaconda.core.trace import get_trace_file, save_trace
 from pyanaconda.modules.common.constants.objects import BOOTLOADER, SNAPSHOT, FIREWALL
 from pyanaconda.modules.common.constants.services import STORAGE, USERS, SERVICES, NETWORK, SECURITY, \
     LOCALIZATION, TIMEZONE, BOSS
@@ -82,39 +85,47 @@ def _writeKS(ksdata):
 def _prepare_configuration(storage, payload, ksdata):
     """Configure the installed system."""
 
-    configuration_queue = TaskQueue("Configuration queue")
+    # - only the queues that declare their resources run in parallel,
+    #   the other ones keep their order
+    configuration_queue = TaskQueue("Configuration queue", parallel=True)
     # connect progress reporting
     configuration_queue.queue_started.connect(lambda x: progress_message(x.status_message))
     configuration_queue.task_completed.connect(lambda x: progress_step(x.name))
 
     # schedule the execute methods of ksdata that require an installed system to be present
-    os_config = TaskQueue("Installed system configuration", N_("Configuring installed system"))
-    os_config.append(Task("Configure authselect", ksdata.authselect.execute))
+    # - the tasks declare the parts of the system they configure, so the independent
+    #   ones can run in parallel; the tasks that enable or disable services are ordered
+    #   and so are the tasks that configure user accounts and their authentication
+    os_config = TaskQueue("Installed system configuration", N_("Configuring installed system"),
+                          parallel=True)
+    os_config.append(Task("Configure authselect", ksdata.authselect.execute,
+                          provides=("authselect", "accounts")))
 
     # add installation tasks for the Security DBus module
     security_proxy = SECURITY.get_proxy()
     security_dbus_tasks = security_proxy.InstallWithTasks()
-    os_config.append_dbus_tasks(SECURITY, security_dbus_tasks)
+    os_config.append_dbus_tasks(SECURITY, security_dbus_tasks, provides=("selinux",))
 
     # add installation tasks for the Services DBus module
     services_proxy = SERVICES.get_proxy()
     services_dbus_tasks = services_proxy.InstallWithTasks()
-    os_config.append_dbus_tasks(SERVICES, services_dbus_tasks)
+    os_config.append_dbus_tasks(SERVICES, services_dbus_tasks, provides=("services",))
 
     # add installation tasks for the Timezone DBus module
     timezone_proxy = TIMEZONE.get_proxy()
     timezone_dbus_tasks = timezone_proxy.InstallWithTasks()
-    os_config.append_dbus_tasks(TIMEZONE, timezone_dbus_tasks)
+    os_config.append_dbus_tasks(TIMEZONE, timezone_dbus_tasks, provides=("timezone", "services"))
 
     # add installation tasks for the Localization DBus module
     localization_proxy = LOCALIZATION.get_proxy()
     localization_dbus_tasks = localization_proxy.InstallWithTasks()
-    os_config.append_dbus_tasks(LOCALIZATION, localization_dbus_tasks)
+    os_config.append_dbus_tasks(LOCALIZATION, localization_dbus_tasks,
+                                provides=("localization",))
 
     # add the Firewall configuration task
     firewall_proxy = NETWORK.get_proxy(FIREWALL)
     firewall_dbus_task = firewall_proxy.InstallWithTask()
-    os_config.append_dbus_tasks(NETWORK, [firewall_dbus_task])
+    os_config.append_dbus_tasks(NETWORK, [firewall_dbus_task], provides=("firewall", "services"))
 
     configuration_queue.append(os_config)
 
@@ -130,7 +141,7 @@ def _prepare_configuration(storage, payload, ksdata):
     user_config = TaskQueue("User creation", N_("Creating users"))
     users_proxy = USERS.get_proxy()
     users_dbus_tasks = users_proxy.InstallWithTasks()
-    os_config.append_dbus_tasks(USERS, users_dbus_tasks)
+    os_config.append_dbus_tasks(USERS, users_dbus_tasks, provides=("users", "accounts"))
     configuration_queue.append(user_config)
 
     # Anaconda addon configuration
@@ -175,12 +186,14 @@ def _prepare_configuration(storage, payload, ksdata):
 
     # setup kexec reboot if requested
     if flags.flags.kexec:
-        kexec_setup = TaskQueue("Kexec setup", N_("Setting up kexec"))
+        kexec_setup = TaskQueue("Kexec setup", N_("Setting up kexec"), provides=("kexec",))
         kexec_setup.append(Task("Setup kexec", setup_kexec))
         configuration_queue.append(kexec_setup)
 
     # write anaconda related configs & kickstarts
-    write_configs = TaskQueue("Write configs and kickstarts", N_("Storing configuration files and kickstarts"))
+    write_configs = TaskQueue("Write configs and kickstarts",
+                              N_("Storing configuration files and kickstarts"),
+                              provides=("kickstart",))
 
     # Write the kickstart file to the installed system (or, copy the input
     # kickstart file over if one exists).
@@ -403,7 +416,29 @@ def run_installation(storage, payload, ksdata):
     )
 
     # start the task queue
-    queue.start()
+    try:
+        queue.start()
+    finally:
+        _save_installation_trace()
 
     # done
     progress_complete()
+
+
+def _save_installation_trace():
+    """Save the trace of the installation tasks to the installed system.
+
+    The trace is saved only if the logs were copied to the installed system.
+    The post-installation scripts run before the last tasks, so the trace
+    is saved here rather than by the script that copies the logs.
+    """
+    log_dir = os.path.join(conf.target.system_root, "var/log/anaconda")
+    trace_file = get_trace_file()
+
+    if not trace_file or not os.path.exists(trace_file) or not os.path.isdir(log_dir):
+        return
+
+    try:
+        save_trace(os.path.join(log_dir, os.path.basename(trace_file)), trace_file)
+    except OSError as e:
+        log.warning("Failed to save the trace of the installation: %s", e)
@@ -17,8 +17,10 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from threading import RLock
 from pyanaconda.core.signal import Signal
+from pyanaconda.core.trace import trace_span
 from pyanaconda.core.util import synchronized
 from pyanaconda.modules.common.task import sync_run_task
 import time
@@ -26,14 +28,29 @@ import time
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
 
+# The default number of workers of a parallel task queue.
+TASK_QUEUE_WORKERS = 4
+
+# Signals of tasks running in parallel are emitted one at a time,
+# so the connected callbacks don't have to be thread-safe.
+_signal_lock = RLock()
+
+
 class BaseTask(object):
     """A base class for Task and TaskQueue.
 
     It holds shared methods, properties and signals.
+
+    A task can declare names of resources it requires and provides.
+    Tasks of a parallel task queue are ordered only if they share
+    a resource provided by one of them. Tasks without declared
+    resources are always run in order with all other tasks.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, requires=(), provides=()):
         self._name = name
+        self._requires = frozenset(requires)
+        self._provides = frozenset(provides)
         self._done = False
         self._running = False
         self._lock = RLock()
@@ -52,6 +69,40 @@ class BaseTask(object):
         """
         return self._name
 
+    @property
+    def requires(self):
+        """Names of resources required by the task.
+
+        :returns: a set of resource names
+        :rtype: frozenset
+        """
+        return self._requires
+
+    @property
+    def provides(self):
+        """Names of resources provided or modified by the task.
+
+        :returns: a set of resource names
+        :rtype: frozenset
+        """
+        return self._provides
+
+    def depends_on(self, other):
+        """Does this task have to run after the other task?
+
+        The tasks are independent if they declare their resources
+        and none of them provides a resource used by the other one.
+
+        :param other: a task or a task queue scheduled before this one
+        :returns: True if the tasks can't run in parallel
+        :rtype: bool
+        """
+        if not (self.requires or self.provides) or not (other.requires or other.provides):
+            return True
+
+        return bool(other.provides & (self.requires | self.provides)
+                    or other.requires & self.provides)
+
     @property
     @synchronized
     def running(self):
@@ -98,11 +149,18 @@ class TaskQueue(BaseTask):
     """TaskQueue represents a queue of TaskQueues or Tasks.
 
     TaskQueues and Tasks can be mixed in a single TaskQueue.
+
+    The items of a parallel TaskQueue are started as soon as all
+    items they depend on are done. Independent items run at the
+    same time in a pool of worker threads.
     """
 
-    def __init__(self, name, status_message=None):
-        super().__init__(name=name)
+    def __init__(self, name, status_message=None, parallel=False, max_workers=TASK_QUEUE_WORKERS,
+                 requires=(), provides=()):
+        super().__init__(name=name, requires=requires, provides=provides)
         self._status_message = status_message
+        self._parallel = parallel
+        self._max_workers = max_workers
         self._current_task_number = None
         self._current_queue_number = None
         # the list backing this TaskQueue instance
@@ -141,6 +199,15 @@ class TaskQueue(BaseTask):
         """
         return self._status_message
 
+    @property
+    def parallel(self):
+        """Can the independent items of the queue run in parallel?
+
+        :returns: True if the queue is parallel
+        :rtype: bool
+        """
+        return self._parallel
+
     @property
     @synchronized
     def queue_count(self):
@@ -297,12 +364,18 @@ class TaskQueue(BaseTask):
 
         if do_start:
             # go over all task groups and their tasks in order
-            self.started.emit(self)
+            with _signal_lock:
+                self.started.emit(self)
             if len(self) == 0:
                 log.warning("The task group %s is empty.", self.name)
-            for item in self:
-                # start the item (TaskQueue/Task)
-                item.start()
+
+            with trace_span(self.name, "installation queue"):
+                if self._parallel:
+                    self._start_in_parallel(list(self))
+                else:
+                    for item in self:
+                        # start the item (TaskQueue/Task)
+                        item.start()
 
             # we are done, set the task queue state accordingly
             with self._lock:
@@ -313,7 +386,51 @@ class TaskQueue(BaseTask):
                 self._current_queue_number = None
 
             # trigger the "completed" signals
-            self.completed.emit(self)
+            with _signal_lock:
+                self.completed.emit(self)
+
+    def _start_in_parallel(self, items):
+        """Start the items in parallel respecting their dependencies.
+
+        If an item fails, no other items are started and the error
+        is raised once the running items are finished.
+
+        :param items: a list of items of the queue
+        """
+        dependencies = {
+            index: {i for i in range(index) if item.depends_on(items[i])}
+            for index, item in enumerate(items)
+        }
+
+        pending = list(range(len(items)))
+        finished = set()
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=max(1, self._max_workers),
+                                thread_name_prefix="AnaTaskQueueThread") as executor:
+            while pending or running:
+                if error is None:
+                    for index in [i for i in pending if dependencies[i] <= finished]:
+                        pending.remove(index)
+                        running[executor.submit(items[index].start)] = index
+
+                if not running:
+                    break
+
+                done, _not_done = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index = running.pop(future)
+                    finished.add(index)
+
+                    if future.exception() is not None and error is None:
+                        log.error("%s failed, no other items of the queue %s are started.",
+                                  items[index].name, self.name)
+                        error = future.exception()
+
+        if error is not None:
+            raise error
 
     # implement the Python list "interface" and make sure parent is always
     # set to a correct value
@@ -323,15 +440,18 @@ class TaskQueue(BaseTask):
         self._list.append(item)
 
     @synchronized
-    def append_dbus_tasks(self, service_id, dbus_tasks):
+    def append_dbus_tasks(self, service_id, dbus_tasks, requires=(), provides=()):
         """Append DBus Tasks from a module to the TaskQueue.
 
         :param service_id: DBusServiceIdentifier instance corresponding to an Anaconda DBus module
         :param dbus_tasks: list of DBus Tasks paths
+        :param requires: names of resources required by the tasks
+        :param provides: names of resources provided by the tasks
         """
         for dbus_task_path in dbus_tasks:
             task_proxy = service_id.get_proxy(dbus_task_path)
-            self.append(Task(task_proxy.Name, sync_run_task, (task_proxy,)))
+            self.append(Task(task_proxy.Name, sync_run_task, (task_proxy,),
+                             requires=requires, provides=provides))
 
     @synchronized
     def insert(self, index, item):
@@ -396,8 +516,9 @@ class Task(BaseTask):
     Task instances to run.
     """
 
-    def __init__(self, name, task=None, task_args=None, task_kwargs=None):
-        super().__init__(name=name)
+    def __init__(self, name, task=None, task_args=None, task_kwargs=None, requires=(),
+                 provides=()):
+        super().__init__(name=name, requires=requires, provides=provides)
         self._task = task
         if task_args is None:
             task_args = []
@@ -479,11 +600,14 @@ class Task(BaseTask):
 
         if do_start:
             # trigger the "started" signal
-            self.started.emit(self)
+            with _signal_lock:
+                self.started.emit(self)
             # run the task
-            self.run_task()
+            with trace_span(self.name, "installation task"):
+                self.run_task()
             # trigger the "completed" signal
-            self.completed.emit(self)
+            with _signal_lock:
+                self.completed.emit(self)
             # the task should be done, set the task state accordingly
             with self._lock:
                 self._running = False
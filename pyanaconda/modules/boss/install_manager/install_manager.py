@@ -16,6 +16,7 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.dbus import DBus
 from pyanaconda.modules.common.task import DBusMetaTask
 
@@ -46,8 +47,11 @@ class InstallManager(object):
 
         :return: an instance of the main configuration task
         """
-        configuration_tasks = self._collect_tasks(lambda proxy: proxy.ConfigureWithTasks())
-        system_task = DBusMetaTask("Configure the runtime system", configuration_tasks)
+        configuration_tasks, independent_tasks = self._collect_tasks(
+            lambda proxy: proxy.ConfigureWithTasks()
+        )
+        system_task = DBusMetaTask("Configure the runtime system", configuration_tasks,
+                                   independent_tasks)
         return system_task
 
     def install_system_with_task(self):
@@ -57,8 +61,10 @@ class InstallManager(object):
 
         :return: an instance of the main installation task
         """
-        installation_tasks = self._collect_tasks(lambda proxy: proxy.InstallWithTasks())
-        system_task = DBusMetaTask("Install the system", installation_tasks)
+        installation_tasks, independent_tasks = self._collect_tasks(
+            lambda proxy: proxy.InstallWithTasks()
+        )
+        system_task = DBusMetaTask("Install the system", installation_tasks, independent_tasks)
         return system_task
 
     def _collect_tasks(self, collector):
@@ -66,10 +72,14 @@ class InstallManager(object):
 
         FIXME: This method temporarily uses only addons.
 
+        The tasks of modules listed in the independent_modules option
+        are returned separately for every module.
+
         :param collector: a function that returns a list of task paths for a proxy
-        :return: a list of tasks proxies
+        :return: a list of tasks proxies and a list of lists of independent tasks proxies
         """
         tasks = []
+        independent_tasks = []
 
         if not self._module_observers:
             log.error("Starting installation without available modules.")
@@ -78,7 +88,7 @@ class InstallManager(object):
             # FIXME: This check is here for testing purposes only.
             # Normally, all given modules should be available once
             # we start the installation.
-            if not observer.is_service_available:
+            if not observer.is_service_available and not observer.is_on_demand:
                 log.error("Module %s is not available!", observer.service_name)
                 continue
 
@@ -88,10 +98,17 @@ class InstallManager(object):
 
             service_name = observer.service_name
             task_paths = collector(observer.proxy)
+            module_tasks = []
 
             for object_path in task_paths:
                 log.debug("Getting task %s from module %s", object_path, service_name)
                 task_proxy = DBus.get_proxy(service_name, object_path)
-                tasks.append(task_proxy)
+                module_tasks.append(task_proxy)
+
+            if service_name in conf.anaconda.independent_modules:
+                log.debug("Tasks of module %s are independent.", service_name)
+                independent_tasks.append(module_tasks)
+            else:
+                tasks.extend(module_tasks)
 
-        return tasks
+        return tasks, independent_tasks
@@ -16,19 +16,49 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from pykickstart.errors import KickstartError
 from pykickstart.version import makeVersion
 
 from pyanaconda.anaconda_loggers import get_module_logger
 from pyanaconda.modules.boss.kickstart_manager.parser import SplitKickstartParser,\
     VALID_SECTIONS_ANACONDA
-from pyanaconda.modules.common.constants.services import BOSS
+from pyanaconda.modules.common.constants.services import BOSS, TIMEZONE, NETWORK, \
+    LOCALIZATION, SECURITY, USERS, PAYLOADS, STORAGE, SERVICES
 from pyanaconda.modules.common.structures.kickstart import KickstartReport, KickstartMessage
 
 log = get_module_logger(__name__)
 
 __all__ = ['KickstartManager']
 
+# The maximal number of modules called at the same time.
+KICKSTART_WORKERS = 16
+
+# The kickstart specifications of the modules. The modules started on
+# demand can't be asked for the kickstart data they handle before they
+# are started. The specifications are imported only when they are needed.
+KICKSTART_SPECIFICATIONS = {
+    TIMEZONE.service_name:
+        "pyanaconda.modules.timezone.kickstart.TimezoneKickstartSpecification",
+    NETWORK.service_name:
+        "pyanaconda.modules.network.kickstart.NetworkKickstartSpecification",
+    LOCALIZATION.service_name:
+        "pyanaconda.modules.localization.kickstart.LocalizationKickstartSpecification",
+    SECURITY.service_name:
+        "pyanaconda.modules.security.kickstart.SecurityKickstartSpecification",
+    USERS.service_name:
+        "pyanaconda.modules.users.kickstart.UsersKickstartSpecification",
+    PAYLOADS.service_name:
+        "pyanaconda.modules.payloads.kickstart.PayloadKickstartSpecification",
+    STORAGE.service_name:
+        "pyanaconda.modules.storage.kickstart.StorageKickstartSpecification",
+    SERVICES.service_name:
+        "pyanaconda.modules.services.kickstart.ServicesKickstartSpecification",
+}
+
 
 class KickstartManager(object):
     """Distributes kickstart to modules and collects it back."""
@@ -73,23 +103,114 @@ class KickstartManager(object):
         return parser.split(path)
 
     def _distribute_to_modules(self, elements):
-        """Distribute split kickstart to modules synchronously.
+        """Distribute split kickstart to modules.
+
+        The modules read their kickstart data at the same time.
+
+        The modules started on demand are started only if they handle
+        kickstart data that are not handled by the running modules.
+        The elements handled by none of the modules, for example the
+        scripts, are ignored. The modules are started from the calling
+        thread, because the services are enabled by the watch of their
+        names in the main loop that is blocked until the kickstart is
+        distributed.
 
         :returns: list of (Line number, Message) errors reported by modules when
                   distributing kickstart
         :rtype: list of kickstart reports
         """
-        reports = []
+        reports = self._distribute_to_observers(
+            elements, self._get_available_observers()
+        )
 
-        for observer in self._module_observers:
-            if not observer.is_service_available:
-                log.warning("Module %s not available!", observer.service_name)
+        observers = self._get_required_on_demand_observers(
+            elements, self._get_on_demand_observers()
+        )
+
+        if observers:
+            for observer in observers:
+                observer.activate()
+
+            reports.extend(self._distribute_to_observers(elements, observers))
+
+        return reports
+
+    def _get_required_on_demand_observers(self, elements, observers):
+        """Get observers of the modules that handle the unprocessed elements.
+
+        :param elements: tracked kickstart elements
+        :param observers: observers of the modules started on demand
+        :return: a list of observers
+        """
+        unprocessed = elements.unprocessed_elements
+        required = []
+
+        for observer in observers:
+            names = self._get_handled_names(observer, unprocessed)
+
+            if not names:
                 continue
 
-            commands = observer.proxy.KickstartCommands
-            sections = observer.proxy.KickstartSections
-            addons = observer.proxy.KickstartAddons
+            log.info("Starting %s on demand for kickstart elements %s.",
+                     observer.service_name, ", ".join(sorted(names)))
+
+            required.append(observer)
+
+        return required
+
+    def _get_handled_names(self, observer, elements):
+        """Get names of the elements handled by the module that is not running.
+
+        The kickstart data of the modules are known from their kickstart
+        specifications. The addons handle only the addon sections. The
+        modules without a known specification handle all elements.
+
+        :param observer: an observer of the module
+        :param elements: a list of kickstart elements
+        :return: a set of names of the handled elements
+        """
+        if observer.is_addon:
+            return {e.name for e in elements if e.is_addon()}
+
+        specification = self._get_kickstart_specification(observer)
+
+        if specification is None:
+            return {e.name for e in elements}
+
+        return {
+            e.name for e in elements
+            if (e.is_command() and e.name in specification.commands)
+            or (e.is_section() and e.name in specification.sections)
+            or (e.is_addon() and e.name in specification.addons)
+        }
+
+    @staticmethod
+    def _get_kickstart_specification(observer):
+        """Get the kickstart specification of the observed module.
+
+        :return: a kickstart specification or None if it is not known
+        """
+        path = KICKSTART_SPECIFICATIONS.get(observer.service_name)
+
+        if not path:
+            return None
+
+        module_name, class_name = path.rsplit(".", 1)
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def _distribute_to_observers(self, elements, observers):
+        """Distribute split kickstart to the given modules.
+
+        :returns: list of kickstart reports
+        """
+        handled = self._call_modules([
+            partial(self._get_handled_kickstart, observer) for observer in observers
+        ])
+
+        # The elements have to be processed in the order of modules.
+        module_data = []
 
+        for observer, (commands, sections, addons) in zip(observers, handled):
             log.info("%s handles commands %s sections %s addons %s.",
                      observer.service_name, commands, sections, addons)
 
@@ -107,14 +228,22 @@ class KickstartManager(object):
                 log.info("There are no kickstart data for %s.", observer.service_name)
                 continue
 
-            module_report = KickstartReport.from_structure(
-                observer.proxy.ReadKickstart(module_kickstart)
-            )
-
             line_references = elements.get_references_from_elements(
                 module_elements
             )
 
+            module_data.append((observer, module_kickstart, line_references))
+
+        structures = self._call_modules([
+            partial(observer.proxy.ReadKickstart, module_kickstart)
+            for observer, module_kickstart, _references in module_data
+        ])
+
+        reports = []
+
+        for (observer, _kickstart, line_references), structure in zip(module_data, structures):
+            module_report = KickstartReport.from_structure(structure)
+
             for message in module_report.get_messages():
                 line_number, file_name = line_references[message.line_number]
                 message.line_number = line_number
@@ -125,6 +254,59 @@ class KickstartManager(object):
 
         return reports
 
+    def _get_available_observers(self, on_demand=False):
+        """Get observers of the available modules.
+
+        :param on_demand: include the modules started on demand
+        """
+        observers = []
+
+        for observer in self._module_observers:
+            if on_demand and observer.is_on_demand:
+                observers.append(observer)
+                continue
+
+            if not observer.is_service_available:
+                if not observer.is_on_demand:
+                    log.warning("Module %s not available!", observer.service_name)
+                continue
+
+            observers.append(observer)
+
+        return observers
+
+    def _get_on_demand_observers(self):
+        """Get observers of the modules started on demand that are not running."""
+        return [
+            observer for observer in self._module_observers
+            if observer.is_on_demand and not observer.is_service_available
+        ]
+
+    @staticmethod
+    def _get_handled_kickstart(observer):
+        """Get the kickstart commands, sections and addons handled by the module."""
+        proxy = observer.proxy
+        return proxy.KickstartCommands, proxy.KickstartSections, proxy.KickstartAddons
+
+    @staticmethod
+    def _call_modules(calls):
+        """Call the modules at the same time.
+
+        Every DBus call is a blocking round-trip, so the calls are made
+        from a pool of threads and the results are collected in order.
+
+        :param calls: a list of functions without arguments
+        :return: a list of results of the functions
+        :raise: the first error raised by the functions
+        """
+        if not calls:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(len(calls), KICKSTART_WORKERS),
+                                thread_name_prefix="AnaKickstartThread") as executor:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+
     def _merge_module_reports(self, report, module_reports):
         """Merge the module reports into the final report."""
         for module_report in module_reports:
@@ -142,20 +324,21 @@ class KickstartManager(object):
     def _generate_from_modules(self):
         """Generate kickstart from modules.
 
+        The modules generate their kickstart data at the same time.
+        The modules started on demand are started if they are not running.
+
         :return: a map of module names and kickstart strings
         """
-        result = {}
-
-        for observer in self._module_observers:
-            if not observer.is_service_available:
-                log.warning("Module %s not available!", observer.service_name)
-                continue
+        observers = self._get_available_observers(on_demand=True)
 
-            module_name = observer.service_name
-            module_kickstart = observer.proxy.GenerateKickstart()
-            result[module_name] = module_kickstart
+        kickstarts = self._call_modules([
+            observer.proxy.GenerateKickstart for observer in observers
+        ])
 
-        return result
+        return {
+            observer.service_name: module_kickstart
+            for observer, module_kickstart in zip(observers, kickstarts)
+        }
 
     def _merge_module_kickstarts(self, module_kickstarts):
         """Merge kickstart from modules
@@ -31,6 +31,7 @@ class ModuleManager(object):
     def __init__(self):
         self._module_observers = []
         self.module_observers_changed = Signal()
+        self._locale = None
 
     @property
     def module_observers(self):
@@ -40,14 +41,29 @@ class ModuleManager(object):
     def set_module_observers(self, observers):
         """Set the module observers."""
         self._module_observers = observers
+
+        for observer in self._module_observers:
+            if observer.is_on_demand:
+                observer.service_available.connect(self._module_started_on_demand)
+
         self.module_observers_changed.emit(self._module_observers)
 
     def start_modules_with_task(self):
-        """Start modules with the task."""
+        """Start modules with the task.
+
+        If the modules are started on demand, the task starts only
+        the prefetched modules.
+        """
+        prefetched_modules = None
+
+        if conf.anaconda.start_modules_on_demand:
+            prefetched_modules = conf.anaconda.prefetched_modules
+
         task = StartModulesTask(
             DBus,
             conf.anaconda.kickstart_modules,
-            conf.anaconda.addons_enabled
+            conf.anaconda.addons_enabled,
+            prefetched_modules
         )
         task.succeeded_signal.connect(
             lambda: self.set_module_observers(task.get_result())
@@ -60,12 +76,22 @@ class ModuleManager(object):
         :param str locale: locale to set
         """
         log.info("Setting locale of all modules to %s.", locale)
+        self._locale = locale
+
         for observer in self.module_observers:
             if not observer.is_service_available:
-                log.warning("%s is not available when setting locale", observer)
+                if not observer.is_on_demand:
+                    log.warning("%s is not available when setting locale", observer)
                 continue
             observer.proxy.SetLocale(locale)
 
+    def _module_started_on_demand(self, observer):
+        """Set up a module started on demand."""
+        log.info("%s was started on demand.", observer)
+
+        if self._locale:
+            observer.proxy.SetLocale(self._locale)
+
     def stop_modules(self):
         """Tell all running modules to quit."""
         log.debug("Stop modules.")
@@ -14,28 +14,39 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import threading
+
 from pyanaconda.anaconda_loggers import get_module_logger
+from pyanaconda.threading import threadMgr
+from dasbus.constants import DBUS_FLAG_NONE
 from dasbus.namespace import get_namespace_from_name, get_dbus_path
 from dasbus.client.observer import DBusObserver, DBusObserverError
 
 log = get_module_logger(__name__)
 
+# How long to wait for a service started on demand in seconds.
+SERVICE_ACTIVATION_TIMEOUT = 60
+
 
 class ModuleObserver(DBusObserver):
     """Observer of an Anaconda module."""
 
-    def __init__(self, message_bus, service_name, is_addon=False):
+    def __init__(self, message_bus, service_name, is_addon=False, is_on_demand=False):
         """Creates a module observer.
 
         :param message_bus: a message bus
         :param service_name: a DBus name of a service
         :param is_addon: is the observed module an addon?
+        :param is_on_demand: is the observed module started on demand?
         """
         super().__init__(message_bus, service_name)
         self._proxy = None
         self._is_addon = is_addon
+        self._is_on_demand = is_on_demand
         self._namespace = get_namespace_from_name(service_name)
         self._object_path = get_dbus_path(*self._namespace)
+        self._activation_lock = threading.Lock()
+        self._service_condition = threading.Condition()
 
     @property
     def is_addon(self):
@@ -45,9 +56,26 @@ class ModuleObserver(DBusObserver):
         """
         return self._is_addon
 
+    @property
+    def is_on_demand(self):
+        """Is the observed module started on demand?
+
+        The module is not started with other modules. It is started
+        when its proxy is accessed for the first time.
+
+        :return: True or False
+        """
+        return self._is_on_demand
+
     @property
     def proxy(self):
-        """"Returns a proxy of the remote object."""
+        """"Returns a proxy of the remote object.
+
+        The module started on demand is started if it is not available.
+        """
+        if not self._is_service_available and self._is_on_demand:
+            self.activate()
+
         if not self._is_service_available:
             raise DBusObserverError("Service {} is not available."
                                     .format(self._service_name))
@@ -58,15 +86,55 @@ class ModuleObserver(DBusObserver):
 
         return self._proxy
 
+    def activate(self):
+        """Start the service if it is not available.
+
+        The service is available once the method returns. The service
+        is enabled by the watch of its name in the main thread. If the
+        method is called from the main thread, the watch can't run, so
+        the service is enabled here.
+
+        :raise: DBusObserverError if the service is not enabled in time
+        """
+        with self._activation_lock:
+            if self._is_service_available:
+                return
+
+            log.debug("Starting %s on demand.", self)
+            self._message_bus.proxy.StartServiceByName(self._service_name, DBUS_FLAG_NONE)
+
+            if threadMgr.in_main_thread():
+                self._enable_service()
+                return
+
+            with self._service_condition:
+                if not self._service_condition.wait_for(
+                        lambda: self._is_service_available,
+                        timeout=SERVICE_ACTIVATION_TIMEOUT):
+                    raise DBusObserverError("Service {} has not started."
+                                            .format(self._service_name))
+
     def _enable_service(self):
-        """Enable the service."""
-        self._proxy = None
-        super()._enable_service()
+        """Enable the service.
+
+        The service_available signal is emitted only once.
+        """
+        with self._service_condition:
+            if self._is_service_available:
+                return
+
+            self._proxy = None
+            super()._enable_service()
+            self._service_condition.notify_all()
 
     def _disable_service(self):
         """Disable the service"""
-        self._proxy = None
-        super()._disable_service()
+        with self._service_condition:
+            if not self._is_service_available:
+                return
+
+            self._proxy = None
+            super()._disable_service()
 
     def __repr__(self):
         """Returns a string representation."""
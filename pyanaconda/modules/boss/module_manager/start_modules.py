@@ -37,19 +37,24 @@ class StartModulesTask(Task):
     The timeout service_start_timeout from the Anaconda bus
     configuration file is applied by default when the DBus
     method StartServiceByName is called.
+
+    If the list of prefetched modules is specified, only these
+    modules are started. The other modules are started on demand.
     """
 
-    def __init__(self, message_bus, module_names, addons_enabled):
+    def __init__(self, message_bus, module_names, addons_enabled, prefetched_modules=None):
         """Create a new task.
 
         :param message_bus: a message bus
         :param module_names: a list of DBus names of modules
         :param addons_enabled: True to enable addons, otherwise False
+        :param prefetched_modules: a list of DBus names of modules to start or None for all
         """
         super().__init__()
         self._message_bus = message_bus
         self._module_names = module_names
         self._addons_enabled = addons_enabled
+        self._prefetched_modules = prefetched_modules
         self._module_observers = []
         self._callbacks = SimpleQueue()
 
@@ -66,11 +71,21 @@ class StartModulesTask(Task):
         # Collect the modules.
         self._module_observers = self._find_modules() + self._find_addons()
 
-        # All modules are unavailable now.
-        unavailable = set(self._module_observers)
+        # Watch the modules started on demand.
+        started = []
+
+        for observer in self._module_observers:
+            if observer.is_on_demand:
+                log.debug("%s will be started on demand.", observer)
+                observer.connect_once_available()
+            else:
+                started.append(observer)
+
+        # All started modules are unavailable now.
+        unavailable = set(started)
 
         # Asynchronously start the modules.
-        self._start_modules(self._module_observers)
+        self._start_modules(started)
 
         # Process callbacks of the asynchronous calls until all modules
         # are available. A callback returns an observer of an available
@@ -90,7 +105,8 @@ class StartModulesTask(Task):
             log.debug("Found %s.", service_name)
             modules.append(ModuleObserver(
                 self._message_bus,
-                service_name
+                service_name,
+                is_on_demand=self._is_on_demand(service_name)
             ))
 
         return modules
@@ -114,11 +130,19 @@ class StartModulesTask(Task):
             modules.append(ModuleObserver(
                 self._message_bus,
                 service_name,
-                is_addon=True
+                is_addon=True,
+                is_on_demand=self._is_on_demand(service_name)
             ))
 
         return modules
 
+    def _is_on_demand(self, service_name):
+        """Should be the module started on demand?"""
+        if self._prefetched_modules is None:
+            return False
+
+        return service_name not in self._prefetched_modules
+
     def _start_modules(self, module_observers):
         """Start the modules."""
         dbus = self._message_bus.proxy
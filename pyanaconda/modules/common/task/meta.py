@@ -24,20 +24,30 @@ __all__ = ['DBusMetaTask']
 
 
 class DBusMetaTask(AbstractTask):
-    """A task that runs DBus tasks."""
+    """A task that runs DBus tasks.
 
-    def __init__(self, name, tasks):
+    The tasks run one by one. Lists of independent tasks can be
+    provided as well. The tasks of every list run one by one, but
+    at the same time as the other lists and the ordered tasks.
+
+    The progress of all running tasks is summed up. If one of the
+    tasks fails, the other running tasks are canceled.
+    """
+
+    def __init__(self, name, tasks, independent_tasks=()):
         """Create a new meta task.
 
         :param name: a name of the meta task
         :param tasks: a list of proxies to DBus tasks
+        :param independent_tasks: a list of lists of proxies to DBus tasks
         """
         super().__init__()
         self._name = name
         self._subtasks = tasks
-        self._current_subtask = None
+        self._independent_subtasks = list(independent_tasks)
+        self._chains = [_TaskChain(t) for t in [tasks, *independent_tasks] if t]
+        self._failed_subtask = None
         self._total_steps = self._count_steps()
-        self._finished_steps = 0
 
     @property
     def name(self):
@@ -51,12 +61,13 @@ class DBusMetaTask(AbstractTask):
 
     def _count_steps(self):
         """Return the total number of progress steps."""
-        return sum(t.Steps for t in self._subtasks)
+        return sum(t.Steps for chain in self._chains for t in chain.subtasks)
 
     @property
     def is_running(self):
         """Is the meta task running?"""
-        return bool(self._current_subtask and self._current_subtask.IsRunning)
+        return any(chain.current_subtask and chain.current_subtask.IsRunning
+                   for chain in self._chains)
 
     def start(self):
         """Start the meta task."""
@@ -65,31 +76,56 @@ class DBusMetaTask(AbstractTask):
         self._task_run_callback()
 
     def _task_run_callback(self):
-        """Start the next task."""
-        if self._current_subtask:
-            self._disconnect(self._current_subtask)
+        """Start the first task of every chain."""
+        if not self._chains:
+            self._task_stopped_callback_if_done()
+            return
 
-        if self.check_cancel():
-            log.info("'%s' is canceled.", self.name)
-            self._task_stopped_callback()
+        for chain in self._chains:
+            self._run_next_subtask(chain)
+
+    def _run_next_subtask(self, chain):
+        """Start the next task of the chain."""
+        if chain.current_subtask:
+            self._disconnect(chain.current_subtask)
+
+        if self.check_cancel() or not chain.subtasks:
+            chain.done = True
+            self._task_stopped_callback_if_done()
+            return
+
+        chain.current_subtask = chain.subtasks.pop(0)
+        chain.current_step = 0
+        self._connect(chain)
+        chain.current_subtask.Start()
+
+    def _task_stopped_callback_if_done(self):
+        """Stop the meta task if all chains are done."""
+        if not all(chain.done for chain in self._chains):
             return
 
-        if not self._subtasks:
-            log.info("'%s' is complete.", self.name)
-            self._task_succeeded_callback()
+        self.flush_progress()
+        log.debug("'%s' has coalesced %d progress changes.",
+                  self.name, self.coalesced_progress_changes)
+
+        if self.check_cancel():
+            log.info("'%s' is canceled.", self.name)
             self._task_stopped_callback()
             return
 
-        self._current_subtask = self._subtasks.pop(0)
-        self._connect(self._current_subtask)
-        self._current_subtask.Start()
+        log.info("'%s' is complete.", self.name)
+        self._task_succeeded_callback()
+        self._task_stopped_callback()
 
-    def _connect(self, subtask):
-        """Connect to signals of the current task."""
-        subtask.Started.connect(self._subtask_started_callback)
-        subtask.Failed.connect(self._subtask_failed_callback)
-        subtask.Stopped.connect(self._subtask_stopped_callback)
-        subtask.ProgressChanged.connect(self._subtask_progress_changed)
+    def _connect(self, chain):
+        """Connect to signals of the current task of the chain."""
+        subtask = chain.current_subtask
+        subtask.Started.connect(lambda: self._subtask_started_callback(chain))
+        subtask.Failed.connect(lambda: self._subtask_failed_callback(chain))
+        subtask.Stopped.connect(lambda: self._subtask_stopped_callback(chain))
+        subtask.ProgressChanged.connect(
+            lambda step, msg: self._subtask_progress_changed(chain, step, msg)
+        )
 
     def _disconnect(self, subtask):
         """Disconnect from signals of the previous task."""
@@ -98,35 +134,58 @@ class DBusMetaTask(AbstractTask):
         subtask.Stopped.disconnect()
         subtask.ProgressChanged.disconnect()
 
-    def _subtask_started_callback(self):
-        log.info("'%s' has started.", self._current_subtask.Name)
+    def _subtask_started_callback(self, chain):
+        log.info("'%s' has started.", chain.current_subtask.Name)
+
+    def _subtask_failed_callback(self, chain):
+        log.info("'%s' has failed.", chain.current_subtask.Name)
+
+        if not self._failed_subtask:
+            self._failed_subtask = chain.current_subtask
 
-    def _subtask_failed_callback(self):
-        log.info("'%s' has failed.", self._current_subtask.Name)
         self._task_failed_callback()
         self.cancel()
 
-    def _subtask_stopped_callback(self):
-        log.info("'%s' has stopped.", self._current_subtask.Name)
-        self._finished_steps += self._current_subtask.Steps
-        self._task_run_callback()
+    def _subtask_stopped_callback(self, chain):
+        log.info("'%s' has stopped.", chain.current_subtask.Name)
+        chain.finished_steps += chain.current_subtask.Steps
+        chain.current_step = 0
+        self._run_next_subtask(chain)
 
-    def _subtask_progress_changed(self, step, msg):
+    def _subtask_progress_changed(self, chain, step, msg):
+        chain.current_step = step
+        step = sum(c.finished_steps + c.current_step for c in self._chains)
         log.debug("%s (%s/%s)", msg, step, self.steps)
-        self.report_progress(msg, step_number=self._finished_steps + step)
+        self.report_progress(msg, step_number=step)
 
     def cancel(self):
         """Cancel the meta task."""
         super().cancel()
 
-        if self._current_subtask:
-            self._current_subtask.Cancel()
+        for chain in self._chains:
+            if chain.current_subtask:
+                chain.current_subtask.Cancel()
 
     def finish(self):
         """Finish the meta task.
 
         If the meta task failed, we should raise an error
-        from the last running task.
+        from the failed task.
         """
-        if self._current_subtask:
-            self._current_subtask.Finish()
+        if self._failed_subtask:
+            self._failed_subtask.Finish()
+
+        for chain in self._chains:
+            if chain.current_subtask:
+                chain.current_subtask.Finish()
+
+
+class _TaskChain(object):
+    """Tasks of a meta task that run one by one."""
+
+    def __init__(self, subtasks):
+        self.subtasks = subtasks
+        self.current_subtask = None
+        self.current_step = 0
+        self.finished_steps = 0
+        self.done = False
@@ -18,14 +18,25 @@
 from abc import ABC, abstractmethod
 from threading import Lock
 
+from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.signal import Signal
 from pyanaconda.core.async_utils import async_action_nowait
+from pyanaconda.core.timer import Timer
 
 __all__ = ['ProgressReporter']
 
 
 class ProgressReporter(ABC):
-    """Abstract class that allows to report a progress of a task."""
+    """Abstract class that allows to report a progress of a task.
+
+    The progress changes can be coalesced. In that case, the changes
+    reported during the interval of coalescing are merged into one
+    change with the latest message and the highest step.
+    """
+
+    # The interval of coalescing in milliseconds. Zero means that
+    # every change is reported. None means the configured interval.
+    _progress_interval = None
 
     def __init__(self):
         super().__init__()
@@ -34,6 +45,8 @@ class ProgressReporter(ABC):
         self.__progress_lock = Lock()
         self.__progress_step = 0
         self.__progress_msg = ""
+        self.__progress_pending = False
+        self.__progress_coalesced = 0
 
     @property
     def progress(self):
@@ -44,6 +57,26 @@ class ProgressReporter(ABC):
         with self.__progress_lock:
             return self.__progress_step, self.__progress_msg
 
+    @property
+    def progress_interval(self):
+        """The interval of coalescing of progress changes in milliseconds.
+
+        :return: a number of milliseconds or zero
+        """
+        if self._progress_interval is None:
+            return conf.anaconda.progress_interval
+
+        return self._progress_interval
+
+    @property
+    def coalesced_progress_changes(self):
+        """Number of progress changes merged into other changes.
+
+        :return: a number of changes that weren't reported
+        """
+        with self.__progress_lock:
+            return self.__progress_coalesced
+
     @property
     @abstractmethod
     def steps(self):
@@ -55,7 +88,6 @@ class ProgressReporter(ABC):
         """Signal emits when the progress of the task changes."""
         return self._progress_changed_signal
 
-    @async_action_nowait
     def report_progress(self, message, step_number=None, step_size=None):
         """Report a progress change.
 
@@ -63,6 +95,9 @@ class ProgressReporter(ABC):
         step will never be higher then self.steps and lower then the current
         step. By default, the step doesn't change.
 
+        If the changes are coalesced, the progress is updated immediately,
+        but the signal is emitted at the end of the interval of coalescing.
+
         This is a thread safe method.
 
         :param message: Short description of the actual step.
@@ -72,24 +107,80 @@ class ProgressReporter(ABC):
         :param step_size: The size of the next step.
         :type step_size: int or None
         """
+        interval = self.progress_interval
+
+        if not interval:
+            self._report_progress_now(message, step_number, step_size)
+            return
+
+        with self.__progress_lock:
+            self.__update_progress(message, step_number, step_size)
+
+            if self.__progress_pending:
+                self.__progress_coalesced += 1
+                return
+
+            self.__progress_pending = True
+
+        self._schedule_progress_flush(interval)
+
+    @async_action_nowait
+    def _report_progress_now(self, message, step_number, step_size):
+        """Update the progress and emit the signal in the main loop."""
         with self.__progress_lock:
-            current_step = self.__progress_step
-            max_step = self.steps
+            step, message = self.__update_progress(message, step_number, step_size)
+
+        self._progress_changed_signal.emit(step, message)
+
+    def __update_progress(self, message, step_number, step_size):
+        """Update the progress.
+
+        Call this method with the progress lock.
+
+        :return: a tuple with the new step and message
+        """
+        current_step = self.__progress_step
+        max_step = self.steps
+        step = current_step
+
+        if step_number is not None:
+            step = step_number
+
+        if step_size is not None:
+            step += step_size
+
+        if step < current_step:
             step = current_step
 
-            if step_number is not None:
-                step = step_number
+        if step > max_step:
+            step = max_step
+
+        self.__progress_step = step
+        self.__progress_msg = message
+        return step, message
 
-            if step_size is not None:
-                step += step_size
+    def _schedule_progress_flush(self, interval):
+        """Emit the coalesced changes at the end of the interval."""
+        Timer().timeout_msec(interval, self._flush_progress_callback)
 
-            if step < current_step:
-                step = current_step
+    def _flush_progress_callback(self):
+        """Emit the coalesced changes and stop the timer."""
+        self.flush_progress()
+        return False
 
-            if step > max_step:
-                step = max_step
+    @async_action_nowait
+    def flush_progress(self):
+        """Emit the coalesced progress changes.
+
+        Call this method when the task stops, so the last changes are
+        reported before the task is done. Nothing is emitted if there
+        are no coalesced changes.
+        """
+        with self.__progress_lock:
+            if not self.__progress_pending:
+                return
 
-            self.__progress_step = step
-            self.__progress_msg = message
+            self.__progress_pending = False
+            step, message = self.__progress_step, self.__progress_msg
 
         self._progress_changed_signal.emit(step, message)
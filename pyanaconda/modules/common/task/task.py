@@ -23,14 +23,16 @@
 import traceback
 from abc import abstractmethod
 
+from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.constants import THREAD_DBUS_TASK
+from pyanaconda.core.trace import trace_span
 from dasbus.server.publishable import Publishable
 from pyanaconda.modules.common.task.task_interface import TaskInterface, ValidationTaskInterface
 from pyanaconda.modules.common.task.cancellable import Cancellable
 from pyanaconda.modules.common.task.progress import ProgressReporter
 from pyanaconda.modules.common.task.result import ResultProvider
 from pyanaconda.modules.common.task.runnable import Runnable
-from pyanaconda.threading import threadMgr, AnacondaThread
+from pyanaconda.threading import threadMgr, AnacondaJob, AnacondaWorkerPool
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
@@ -61,6 +63,7 @@ class Task(AbstractTask):
     """Abstract class for running a long-term task in a thread."""
 
     _thread_counter = 0
+    _worker_pool = None
 
     def __init__(self):
         super().__init__()
@@ -77,9 +80,10 @@ class Task(AbstractTask):
         return threadMgr.exists(self._thread_name)
 
     def start(self):
-        """Start the task in a new thread."""
+        """Start the task in a worker thread of the module."""
         threadMgr.add(
-            AnacondaThread(
+            AnacondaJob(
+                self._get_worker_pool(),
                 name=self._thread_name,
                 target=self._task_run_callback,
                 target_started=self._task_started_callback,
@@ -92,7 +96,15 @@ class Task(AbstractTask):
     def _task_run_callback(self):
         """Report the first step and run the task."""
         self.report_progress(self.name, step_number=1)
-        self._set_result(self.run())
+
+        try:
+            with trace_span(self.name, "dbus task"):
+                self._set_result(self.run())
+        finally:
+            self.flush_progress()
+            log.debug("'%s' has coalesced %d progress changes.",
+                      self.name, self.coalesced_progress_changes)
+
         self._task_succeeded_callback()
 
     def _task_succeeded_callback(self):
@@ -132,6 +144,17 @@ class Task(AbstractTask):
         """
         threadMgr.raise_if_error(self._thread_name)
 
+    @staticmethod
+    def _get_worker_pool():
+        """Get the pool of worker threads shared by all tasks of the process."""
+        if Task._worker_pool is None:
+            Task._worker_pool = AnacondaWorkerPool(
+                max_workers=conf.anaconda.task_workers,
+                prefix=THREAD_DBUS_TASK
+            )
+
+        return Task._worker_pool
+
     @classmethod
     def _generate_thread_name(cls):
         """Generate the name of the thread."""
@@ -25,7 +25,7 @@ import stat
 from pyanaconda.core.kernel import kernel_arguments
 from pyanaconda.core.util import mkdirChain, execWithRedirect
 from pyanaconda.core.configuration.anaconda import conf
-from pyanaconda.payload.utils import version_cmp
+from pyanaconda.payload.utils import version_cmp, exec_kernel_commands, run_kernel_jobs
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
@@ -107,7 +107,12 @@ def get_kernel_version_list(root_path):
 
 
 def create_rescue_image(root, kernel_version_list):
-    """Create the rescue initrd images for each kernel."""
+    """Create the rescue initrd images for each kernel.
+
+    The new-kernel-pkg tool and the kernel postinst scripts can update
+    the bootloader configuration or build kernel modules, so they run
+    for one kernel at a time.
+    """
     # Always make sure the new system has a new machine-id, it won't boot without it
     # (and nor will some of the subsequent commands like grub2-mkconfig and kernel-install)
     log.info("Generating machine ID")
@@ -115,19 +120,27 @@ def create_rescue_image(root, kernel_version_list):
         os.unlink(root + "/etc/machine-id")
     execWithRedirect("systemd-machine-id-setup", [], root=root)
 
+    execute = functools.partial(execWithRedirect, root=root)
+
     if os.path.exists(root + "/usr/sbin/new-kernel-pkg"):
-        use_nkp = True
-    else:
-        log.warning("new-kernel-pkg does not exist - grubby wasn't installed?")
-        use_nkp = False
-
-    for kernel in kernel_version_list:
-        log.info("Generating rescue image for %s", kernel)
-        if use_nkp:
-            execWithRedirect("new-kernel-pkg", ["--rpmposttrans", kernel], root=root)
-        else:
-            files = glob.glob(root + "/etc/kernel/postinst.d/*")
-            srlen = len(root)
-            files = sorted([f[srlen:] for f in files if os.access(f, os.X_OK)])
-            for file in files:
-                execWithRedirect(file, [kernel, "/boot/vmlinuz-%s" % kernel], root=root)
+        run_kernel_jobs(
+            "rescue image generation",
+            lambda kernel: exec_kernel_commands(
+                kernel, [("new-kernel-pkg", ["--rpmposttrans", kernel])], execute
+            ),
+            kernel_version_list
+        )
+        return
+
+    log.warning("new-kernel-pkg does not exist - grubby wasn't installed?")
+
+    files = glob.glob(root + "/etc/kernel/postinst.d/*")
+    srlen = len(root)
+    files = sorted([f[srlen:] for f in files if os.access(f, os.X_OK)])
+
+    def run_postinst_scripts(kernel):
+        return exec_kernel_commands(
+            kernel, [(file, [kernel, "/boot/vmlinuz-%s" % kernel]) for file in files], execute
+        )
+
+    run_kernel_jobs("rescue image generation", run_postinst_scripts, kernel_version_list)
@@ -27,6 +27,7 @@ from pyanaconda.modules.common.errors.payload import SourceSetupError
 from pyanaconda.modules.common.task import Task
 from pyanaconda.modules.payloads.payload.live_image.utils import get_local_image_path_from_url, \
     get_proxies_from_option, url_target_is_tarfile
+from pyanaconda.payload.downloader import ImageDownloader, DownloadProgress
 from pyanaconda.payload.utils import mount, unmount
 
 from pyanaconda.anaconda_loggers import get_module_logger
@@ -68,8 +69,9 @@ class CheckInstallationSourceImageTask(Task):
         # FIXME: validate earlier when setting?
         proxies = get_proxies_from_option(self._proxy)
         try:
-            response = self._session.get(url, proxies=proxies, verify=True,
+            response = self._session.get(url, proxies=proxies, verify=True, stream=True,
                                          timeout=NETWORK_CONNECTION_TIMEOUT)
+            response.close()
 
             # At this point we know we can get the image and what its size is
             # Make a guess as to minimum size needed:
@@ -138,42 +140,29 @@ class SetupInstallationSourceImageTask(Task):
         self._image_path = image_path
         self._session = session
         self._image_mount_point = image_mount_point
+        self._image_checksum = None
 
     @property
     def name(self):
         return "Set up installation source image."
 
     def _download_image(self, url, image_path, session):
-        """Download the image using Requests with progress reporting"""
-        error = None
+        """Download the image using Requests with progress reporting.
+
+        The image is downloaded over parallel connections if the server
+        supports ranges. A partial download is resumed. The checksum of
+        the image is computed during the download.
+        """
+        downloader = ImageDownloader(session, url, image_path,
+                                     proxies=get_proxies_from_option(self._proxy),
+                                     verify=not self._noverifyssl)
         try:
             log.info("Starting image download")
-            with open(image_path, "wb") as f:
-                ssl_verify = not self._noverifyssl
-                proxies = get_proxies_from_option(self._proxy)
-                response = session.get(url, proxies=proxies, verify=ssl_verify, stream=True,
-                                       timeout=NETWORK_CONNECTION_TIMEOUT)
-                total_length = response.headers.get('content-length')
-                if total_length is None:
-                    # just download the file in one go and fake the progress reporting once done
-                    log.warning("content-length header is missing for the installation image, "
-                                "download progress reporting will not be available")
-                    f.write(response.content)
-                    size = f.tell()
-                    progress = DownloadProgress(self._url, size, self.report_progress)
-                    progress.end()
-                else:
-                    # requests return headers as strings, so convert total_length to int
-                    progress = DownloadProgress(self._url, int(total_length), self.report_progress)
-                    bytes_read = 0
-                    for buf in response.iter_content(1024 * 1024):
-                        if buf:
-                            f.write(buf)
-                            f.flush()
-                            bytes_read += len(buf)
-                            progress.update(bytes_read)
-                    progress.end()
-                log.info("Image download finished")
+            size = downloader.probe()
+            progress = DownloadProgress(self._url, size, self.report_progress)
+            self._image_checksum = downloader.download(callback=progress.update)
+            progress.end()
+            log.info("Image download finished")
         except RequestException as e:
             error = "Error downloading liveimg: {}".format(e)
             log.error(error)
@@ -185,15 +174,19 @@ class SetupInstallationSourceImageTask(Task):
                 raise SourceSetupError(error)
 
     def _check_image_sum(self, image_path, checksum):
-        self.report_progress("Checking image checksum")
-        sha256 = hashlib.sha256()
-        with open(image_path, "rb") as f:
-            while True:
-                data = f.read(1024 * 1024)
-                if not data:
-                    break
-                sha256.update(data)
-        filesum = sha256.hexdigest()
+        filesum = self._image_checksum
+
+        if not filesum:
+            self.report_progress("Checking image checksum")
+            sha256 = hashlib.sha256()
+            with open(image_path, "rb") as f:
+                while True:
+                    data = f.read(1024 * 1024)
+                    if not data:
+                        break
+                    sha256.update(data)
+            filesum = sha256.hexdigest()
+
         log.debug("sha256 of %s is %s", image_path, filesum)
 
         if lowerASCII(checksum) != filesum:
@@ -302,43 +295,3 @@ class TeardownInstallationSourceImageTask(Task):
         if not get_local_image_path_from_url(self._url):
             if os.path.exists(self._image_path):
                 os.unlink(self._image_path)
-
-
-class DownloadProgress(object):
-    """Provide methods for download progress reporting."""
-
-    def __init__(self, url, size, report_callback):
-        """Create a progress object for given task.
-
-        :param url: url of the download
-        :type url: str
-        :param size: length of the file
-        :type size: int
-        :param report_callback: callback with progress message argument
-        :type task: callable taking str argument
-        """
-        self.report = report_callback
-        self.url = url
-        self.size = size
-        self._pct = -1
-
-    def update(self, bytes_read):
-        """Download update.
-
-        :param bytes_read: Bytes read so far
-        :type bytes_read:  int
-        """
-        if not bytes_read:
-            return
-        pct = min(100, int(100 * bytes_read / self.size))
-
-        if pct == self._pct:
-            return
-        self._pct = pct
-        self.report("Downloading image %(url)s (%(pct)d%%)" %
-                    {"url": self.url, "pct": pct})
-
-    def end(self):
-        """Download complete."""
-        self.report("Downloading image %(url)s (%(pct)d%%)" %
-                    {"url": self.url, "pct": 100})
@@ -39,6 +39,7 @@ class DeviceTreeModule(KickstartBaseModule, DeviceTreeViewer, DeviceTreeHandler,
     def __init__(self):
         super().__init__()
         self._storage = None
+        self._copy_storage = None
 
     @property
     def storage(self):
@@ -54,6 +55,37 @@ class DeviceTreeModule(KickstartBaseModule, DeviceTreeViewer, DeviceTreeHandler,
     def on_storage_changed(self, storage):
         """Keep the instance of the current storage."""
         self._storage = storage
+        self._copy_storage = None
+        self._device_tree_changed()
+
+    def on_storage_shared(self, storage, copy_storage):
+        """Share the storage model until it is changed.
+
+        The shared storage model is used only for reading. It is
+        replaced with its copy before the first change.
+
+        :param storage: a shared instance of Blivet
+        :param copy_storage: a function that returns the copy
+        """
+        self._storage = storage
+        self._copy_storage = copy_storage
+        self._device_tree_changed()
+
+    def _storage_will_change(self):
+        """Replace the shared storage model with its copy."""
+        copy_storage = self._copy_storage
+
+        if copy_storage:
+            self._copy_storage = None
+            self._storage = copy_storage()
+
+    def on_device_tree_changed(self):
+        """Start a new generation of the device tree.
+
+        Call this method when the storage model is changed
+        outside of this module.
+        """
+        self._device_tree_changed()
 
     def for_publication(self):
         """Return a DBus representation."""
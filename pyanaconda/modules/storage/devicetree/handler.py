@@ -55,11 +55,22 @@ class DeviceTreeHandler(ABC):
         """
         raise UnknownDeviceError(name)
 
+    @abstractmethod
+    def _device_tree_changed(self):
+        """Start a new generation of the device tree."""
+        return None
+
+    @abstractmethod
+    def _storage_will_change(self):
+        """Prepare the storage model for a change."""
+        return None
+
     def setup_device(self, device_name):
         """Open, or set up, a device.
 
         :param device_name: a name of the device
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
         device.setup()
 
@@ -68,6 +79,7 @@ class DeviceTreeHandler(ABC):
 
         :param device_name: a name of the device
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
         device.teardown(recursive=True)
 
@@ -78,6 +90,7 @@ class DeviceTreeHandler(ABC):
         :param mount_point: a path to the mount point
         :raise: MountFilesystemError if mount fails
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
         try:
             device.format.mount(mountpoint=mount_point)
@@ -96,6 +109,7 @@ class DeviceTreeHandler(ABC):
         :param mount_point: a path to the mount point
         :raise: MountFilesystemError if unmount fails
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
         try:
             device.format.unmount(mountpoint=mount_point)
@@ -114,8 +128,11 @@ class DeviceTreeHandler(ABC):
         :param passphrase: a passphrase
         :return: True if success, otherwise False
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
-        return unlock_device(self.storage, device, passphrase)
+        result = unlock_device(self.storage, device, passphrase)
+        self._device_tree_changed()
+        return result
 
     def find_unconfigured_luks(self):
         """Find all unconfigured LUKS devices.
@@ -134,9 +151,11 @@ class DeviceTreeHandler(ABC):
         :param device_name: a name of the device
         :param passphrase: a passphrase
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
         device.format.passphrase = passphrase
         self.storage.save_passphrase(device)
+        self._device_tree_changed()
 
     def find_devices_with_task(self):
         """Find new devices.
@@ -145,7 +164,10 @@ class DeviceTreeHandler(ABC):
 
         :return: a task
         """
-        return FindDevicesTask(self.storage.devicetree)
+        self._storage_will_change()
+        task = FindDevicesTask(self.storage.devicetree)
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
 
     def find_optical_media(self):
         """Find all devices with mountable optical media.
@@ -170,6 +192,7 @@ class DeviceTreeHandler(ABC):
 
         :return: a task
         """
+        self._storage_will_change()
         task = FindExistingSystemsTask(self.storage.devicetree)
         task.succeeded_signal.connect(
             lambda: self._update_existing_systems(task.get_result())
@@ -190,8 +213,11 @@ class DeviceTreeHandler(ABC):
         :param read_only: mount the system in read-only mode
         :return: a task
         """
-        return MountExistingSystemTask(
+        self._storage_will_change()
+        task = MountExistingSystemTask(
             storage=self.storage,
             device=self._get_device(device_name),
             read_only=read_only
         )
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
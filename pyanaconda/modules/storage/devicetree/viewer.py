@@ -36,6 +36,9 @@ __all__ = ["DeviceTreeViewer"]
 class DeviceTreeViewer(ABC):
     """The viewer of the device tree."""
 
+    # The generation of the device tree.
+    _device_tree_generation = 0
+
     @property
     @abstractmethod
     def storage(self):
@@ -86,9 +89,25 @@ class DeviceTreeViewer(ABC):
         :return: an instance of DeviceData
         :raise: UnknownDeviceError if the device is not found
         """
-        # Find the device.
         device = self._get_device(name)
+        return self._get_device_data(device)
+
+    def get_devices_data(self, names):
+        """Get the data of the specified devices.
 
+        :param names: a list of device names or an empty list for all devices
+        :return: a list of DeviceData
+        :raise: UnknownDeviceError if a device is not found
+        """
+        devices = self._get_devices(names) if names else self.storage.devices
+        return list(map(self._get_device_data, devices))
+
+    def _get_device_data(self, device):
+        """Get the device data.
+
+        :param device: an instance of the Blivet's device
+        :return: an instance of DeviceData
+        """
         # Collect the device data.
         data = DeviceData()
         self._set_device_data(device, data)
@@ -160,6 +179,34 @@ class DeviceTreeViewer(ABC):
         device = self._get_device(device_name)
         return self._get_format_data(device.format)
 
+    def get_formats_data(self, device_names):
+        """Get the format data of the specified devices.
+
+        :param device_names: a list of device names or an empty list for all devices
+        :return: a list of DeviceFormatData
+        :raise: UnknownDeviceError if a device is not found
+        """
+        devices = self._get_devices(device_names) if device_names else self.storage.devices
+        return [self._get_format_data(device.format) for device in devices]
+
+    def get_device_tree_generation(self):
+        """Get the generation of the device tree.
+
+        The generation changes every time the device tree changes,
+        so the clients can keep the data until the generation changes.
+
+        :return: a number of the generation
+        """
+        return self._device_tree_generation
+
+    def _device_tree_changed(self):
+        """Start a new generation of the device tree.
+
+        Call this method every time the devices or their formats
+        might have changed.
+        """
+        self._device_tree_generation += 1
+
     def get_format_type_data(self, format_name):
         """Get the format type data.
 
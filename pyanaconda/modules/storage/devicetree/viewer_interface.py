@@ -21,6 +21,7 @@ from dasbus.server.interface import dbus_interface
 from pyanaconda.modules.common.base.base_template import InterfaceTemplate
 from dasbus.typing import *  # pylint: disable=wildcard-import
 from pyanaconda.modules.common.constants.interfaces import DEVICE_TREE_VIEWER
+from pyanaconda.modules.common.errors import InvalidValueError
 from pyanaconda.modules.common.structures.storage import DeviceData, DeviceActionData, \
     DeviceFormatData, OSData
 
@@ -78,6 +79,71 @@ class DeviceTreeViewerInterface(InterfaceTemplate):
         """
         return DeviceFormatData.to_structure(self.implementation.get_format_data(name))
 
+    def GetDevicesData(self, names: List[Str], fields: List[Str]) -> List[Structure]:
+        """Get the data of the specified devices.
+
+        The data can be limited to the specified fields, for
+        example: ["name", "size", "parents"]
+
+        :param names: a list of device names or an empty list for all devices
+        :param fields: a list of fields or an empty list for all fields
+        :return: a list of structures with device data
+        :raise: UnknownDeviceError if a device is not found
+        :raise: InvalidValueError if a field is not known
+        """
+        return self._filter_fields(
+            DeviceData.to_structure_list(self.implementation.get_devices_data(names)),
+            fields
+        )
+
+    def GetFormatsData(self, names: List[Str], fields: List[Str]) -> List[Structure]:
+        """Get the format data of the specified devices.
+
+        The data can be limited to the specified fields, for
+        example: ["type", "attrs"]
+
+        :param names: a list of device names or an empty list for all devices
+        :param fields: a list of fields or an empty list for all fields
+        :return: a list of structures with format data
+        :raise: UnknownDeviceError if a device is not found
+        :raise: InvalidValueError if a field is not known
+        """
+        return self._filter_fields(
+            DeviceFormatData.to_structure_list(self.implementation.get_formats_data(names)),
+            fields
+        )
+
+    def _filter_fields(self, structures, fields):
+        """Keep only the specified fields of the structures.
+
+        :param structures: a list of structures
+        :param fields: a list of fields or an empty list for all fields
+        :return: a list of filtered structures
+        """
+        if not fields or not structures:
+            return structures
+
+        unknown_fields = set(fields) - set(structures[0])
+
+        if unknown_fields:
+            raise InvalidValueError(
+                "Unknown fields: {}".format(", ".join(sorted(unknown_fields)))
+            )
+
+        return [{f: structure[f] for f in fields} for structure in structures]
+
+    def GetDeviceTreeGeneration(self) -> UInt64:
+        """Get the generation of the device tree.
+
+        The generation changes every time the device tree might
+        have changed, for example when devices are added, changed
+        or removed, or when a partitioning task stops. The clients
+        can keep the data until the generation changes.
+
+        :return: a number of the generation
+        """
+        return self.implementation.get_device_tree_generation()
+
     def GetFormatTypeData(self, name: Str) -> Structure:
         """Get the format type data.
 
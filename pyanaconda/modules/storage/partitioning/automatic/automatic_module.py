@@ -176,4 +176,6 @@ class AutoPartitioningModule(PartitioningModule):
 
     def configure_with_task(self):
         """Schedule the partitioning actions."""
-        return AutomaticPartitioningTask(self.storage, self.request)
+        task = AutomaticPartitioningTask(self.storage, self.request)
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
@@ -93,9 +93,11 @@ class ResizableDeviceTreeModule(DeviceTreeModule):
         :param device_name: a name of the device
         :param size: a new size in bytes
         """
+        self._storage_will_change()
         size = Size(size)
         device = self._get_device(device_name)
         shrink_device(self.storage, device, size)
+        self._device_tree_changed()
 
     def remove_device(self, device_name):
         """Remove a device after removing its dependent devices.
@@ -105,5 +107,7 @@ class ResizableDeviceTreeModule(DeviceTreeModule):
 
         :param device_name: a name of the device
         """
+        self._storage_will_change()
         device = self._get_device(device_name)
         remove_device(self.storage, device)
+        self._device_tree_changed()
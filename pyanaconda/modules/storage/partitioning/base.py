@@ -42,6 +42,7 @@ class PartitioningModule(KickstartBaseModule, Publishable):
         super().__init__()
         self._current_storage = None
         self._storage_playground = None
+        self._shared_storage = None
         self._selected_disks = []
         self._device_tree_module = None
 
@@ -63,11 +64,27 @@ class PartitioningModule(KickstartBaseModule, Publishable):
             raise UnavailableStorageError()
 
         if self._storage_playground is None:
-            self._storage_playground = self._current_storage.copy()
-            self._storage_playground.select_disks(self._selected_disks)
+            self._storage_playground = self._copy_storage()
 
         return self._storage_playground
 
+    def _copy_storage(self):
+        """Create a new storage playground.
+
+        The device tree module will use the new playground
+        instead of the shared storage model.
+
+        :return: an instance of Blivet
+        """
+        storage = self._current_storage.copy()
+        storage.select_disks(self._selected_disks)
+        self._shared_storage = None
+
+        if self._device_tree_module:
+            self._device_tree_module.on_storage_changed(storage)
+
+        return storage
+
     def on_storage_changed(self, storage):
         """Update the current storage."""
         self._current_storage = storage
@@ -75,6 +92,8 @@ class PartitioningModule(KickstartBaseModule, Publishable):
     def on_partitioning_reset(self):
         """Drop the storage playground."""
         self._storage_playground = None
+        self._shared_storage = None
+        self._device_tree_changed()
 
     def on_selected_disks_changed(self, selection):
         """Keep the current disk selection."""
@@ -89,11 +108,40 @@ class PartitioningModule(KickstartBaseModule, Publishable):
 
         if not module:
             module = self._create_device_tree()
-            module.on_storage_changed(self.storage)
+            self._share_storage(module)
             self._device_tree_module = module
 
         return module
 
+    def _share_storage(self, module):
+        """Provide the storage model to the device tree module.
+
+        The storage playground is not created if the current storage
+        model can be used instead of its copy. The device tree module
+        will create the playground before the first change.
+
+        :param module: a device tree module
+        """
+        storage = self._current_storage
+
+        if self._storage_playground is not None \
+                or storage is None \
+                or not storage.are_disks_selected(self._selected_disks):
+            module.on_storage_changed(self.storage)
+            return
+
+        self._shared_storage = storage
+        module.on_storage_shared(storage, lambda: self.storage)
+
+    def _device_tree_changed(self):
+        """Start a new generation of the device tree.
+
+        Call this method every time the storage playground
+        might have changed.
+        """
+        if self._device_tree_module:
+            self._device_tree_module.on_device_tree_changed()
+
     def _create_device_tree(self):
         """Create the device tree module.
 
@@ -105,6 +153,9 @@ class PartitioningModule(KickstartBaseModule, Publishable):
     def configure_with_task(self):
         """Schedule the partitioning actions.
 
+        The task changes the storage playground, so connect
+        its stopped signal to the _device_tree_changed method.
+
         :return: a task
         """
         pass
@@ -123,10 +174,12 @@ class PartitioningModule(KickstartBaseModule, Publishable):
 
     def setup_kickstart(self, data):
         """Setup the kickstart data."""
-        if not self._storage_playground:
+        storage = self._storage_playground or self._shared_storage
+
+        if not storage:
             return
 
-        self._setup_kickstart_from_storage(data, self._storage_playground)
+        self._setup_kickstart_from_storage(data, storage)
 
     @staticmethod
     def _setup_kickstart_from_storage(data, storage):
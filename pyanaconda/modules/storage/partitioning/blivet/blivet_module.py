@@ -93,4 +93,6 @@ class BlivetPartitioningModule(PartitioningModule):
 
     def configure_with_task(self):
         """Complete the scheduled partitioning."""
-        return InteractivePartitioningTask(self.storage)
+        task = InteractivePartitioningTask(self.storage)
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
@@ -107,4 +107,6 @@ class CustomPartitioningModule(PartitioningModule):
 
     def configure_with_task(self):
         """Schedule the partitioning actions."""
-        return CustomPartitioningTask(self.storage, self.data)
+        task = CustomPartitioningTask(self.storage, self.data)
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
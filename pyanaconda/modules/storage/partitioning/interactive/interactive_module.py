@@ -54,4 +54,6 @@ class InteractivePartitioningModule(PartitioningModule):
 
     def configure_with_task(self):
         """Complete the scheduled partitioning."""
-        return InteractivePartitioningTask(self.storage)
+        task = InteractivePartitioningTask(self.storage)
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
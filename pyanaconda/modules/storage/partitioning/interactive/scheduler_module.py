@@ -240,8 +240,13 @@ class DeviceTreeSchedulerModule(DeviceTreeModule):
         :param request: a device factory request
         :raise: StorageError if the device cannot be created
         """
+        self._storage_will_change()
         task = AddDeviceTask(self.storage, request)
-        task.run()
+
+        try:
+            task.run()
+        finally:
+            self._device_tree_changed()
 
     def change_device(self, request, original_request):
         """Change a device in the storage model.
@@ -252,6 +257,11 @@ class DeviceTreeSchedulerModule(DeviceTreeModule):
         :param original_request: an original device factory request
         :raise: StorageError if the device cannot be changed
         """
+        self._storage_will_change()
         device = self._get_device(request.device_spec)
         task = ChangeDeviceTask(self.storage, device, request, original_request)
-        task.run()
+
+        try:
+            task.run()
+        finally:
+            self._device_tree_changed()
@@ -206,7 +206,9 @@ class ManualPartitioningModule(PartitioningModule):
 
     def configure_with_task(self):
         """Schedule the partitioning actions."""
-        return ManualPartitioningTask(
+        task = ManualPartitioningTask(
             self.storage,
             self.requests
         )
+        task.stopped_signal.connect(self._device_tree_changed)
+        return task
@@ -259,11 +259,13 @@ class StorageService(KickstartService):
 
         We will reset a copy of the current storage model
         and switch the models if the reset is successful.
+        The devices are not copied, because they will be
+        scanned again.
 
         :return: a task
         """
-        # Copy the storage.
-        storage = self.storage.copy()
+        # Copy the storage configuration.
+        storage = self.storage.copy(devices=False)
 
         # Set up the storage.
         storage.ignored_disks = self._disk_selection_module.ignored_disks
@@ -526,6 +526,10 @@ class Payload(metaclass=ABCMeta):
         This needs to be done after all configuration files have been
         written, since dracut depends on some of them.
 
+        The initrds of different kernels are created in parallel if
+        dracut is used. The new-kernel-pkg tool updates the bootloader
+        configuration, so it runs for one kernel at a time.
+
         :returns: None
         """
         if os.path.exists(conf.target.system_root + "/usr/sbin/new-kernel-pkg"):
@@ -535,37 +539,59 @@ class Payload(metaclass=ABCMeta):
                         " using dracut instead.")
             use_dracut = True
 
-        for kernel in self.kernel_version_list:
-            log.info("recreating initrd for %s", kernel)
-            if not conf.target.is_image:
-                if use_dracut:
-                    util.execInSysroot("depmod", ["-a", kernel])
-                    util.execInSysroot("dracut",
-                                       ["-f",
-                                        "/boot/initramfs-%s.img" % kernel,
-                                        kernel])
-                else:
-                    util.execInSysroot("new-kernel-pkg",
-                                       ["--mkinitrd", "--dracut", "--depmod",
-                                        "--update", kernel])
-
-                # if the installation is running in fips mode then make sure
-                # fips is also correctly enabled in the installed system
-                if kernel_arguments.get("fips") == "1":
-                    # We use the --no-bootcfg option as we don't want fips-mode-setup to
-                    # modify the bootloader configuration.
-                    # Anaconda already does everything needed & it would require grubby to
-                    # be available on the system.
-                    util.execInSysroot("fips-mode-setup", ["--enable", "--no-bootcfg"])
+        kernel_version_list = self.kernel_version_list
 
-            else:
-                # hostonly is not sensible for disk image installations
-                # using /dev/disk/by-uuid/ is necessary due to disk image naming
-                util.execInSysroot("dracut",
-                                   ["-N",
-                                    "--persistent-policy", "by-uuid",
-                                    "-f", "/boot/initramfs-%s.img" % kernel,
-                                    kernel])
+        if use_dracut or conf.target.is_image:
+            workers = payload_utils.get_kernel_job_workers(kernel_version_list,
+                                                           conf.payload.initramfs_jobs)
+        else:
+            workers = 1
+
+        payload_utils.run_kernel_jobs(
+            "initrd recreation",
+            functools.partial(self._recreate_initrd, use_dracut=use_dracut),
+            kernel_version_list,
+            workers=workers
+        )
+
+        # if the installation is running in fips mode then make sure
+        # fips is also correctly enabled in the installed system
+        if kernel_version_list and not conf.target.is_image \
+                and kernel_arguments.get("fips") == "1":
+            # We use the --no-bootcfg option as we don't want fips-mode-setup to
+            # modify the bootloader configuration.
+            # Anaconda already does everything needed & it would require grubby to
+            # be available on the system.
+            util.execInSysroot("fips-mode-setup", ["--enable", "--no-bootcfg"])
+
+    @staticmethod
+    def _recreate_initrd(kernel, use_dracut):
+        """Recreate the initrd of the given kernel.
+
+        :param str kernel: a kernel version
+        :param bool use_dracut: should be dracut used instead of new-kernel-pkg?
+        :return: a list of failures
+        """
+        if conf.target.is_image:
+            # hostonly is not sensible for disk image installations
+            # using /dev/disk/by-uuid/ is necessary due to disk image naming
+            commands = [
+                ("dracut", ["-N",
+                            "--persistent-policy", "by-uuid",
+                            "-f", "/boot/initramfs-%s.img" % kernel,
+                            kernel])
+            ]
+        elif use_dracut:
+            commands = [
+                ("depmod", ["-a", kernel]),
+                ("dracut", ["-f", "/boot/initramfs-%s.img" % kernel, kernel])
+            ]
+        else:
+            commands = [
+                ("new-kernel-pkg", ["--mkinitrd", "--dracut", "--depmod", "--update", kernel])
+            ]
+
+        return payload_utils.exec_kernel_commands(kernel, commands)
 
     def post_install(self):
         """Perform post-installation tasks."""
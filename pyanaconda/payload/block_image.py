@@ -0,0 +1,307 @@
+# Deployment of file system images on block devices.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import errno
+import fcntl
+import os
+import stat
+import struct
+
+from pyanaconda.core import util
+from pyanaconda.payload.errors import PayloadInstallError
+from pyanaconda.payload.utils import write_all
+
+from pyanaconda.anaconda_loggers import get_packaging_logger
+log = get_packaging_logger()
+
+__all__ = ["BLOCK_DEPLOYMENT_FS_TYPES", "get_image_size", "get_image_fs_type", "write_image",
+           "set_fs_identity", "grow_fs"]
+
+# File systems that can be deployed on a block device.
+BLOCK_DEPLOYMENT_FS_TYPES = ("ext2", "ext3", "ext4", "xfs")
+
+# The ioctl request for zeroing of a range of a block device.
+BLKZEROOUT = 0x127f
+
+# The size of a chunk for copying of the image.
+IMAGE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# The size of a sector used for alignment of the zeroed ranges.
+SECTOR_SIZE = 512
+
+_ZERO_CHUNK = bytes(IMAGE_CHUNK_SIZE)
+
+
+def get_image_size(path):
+    """Get the size of an image file or a block device.
+
+    :param str path: a path to the image
+    :return: the size in bytes
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.lseek(fd, 0, os.SEEK_END)
+    finally:
+        os.close(fd)
+
+
+def get_image_fs_type(path):
+    """Get the type of the file system in an image.
+
+    :param str path: a path to the image
+    :return: a type of the file system or None
+    """
+    try:
+        fs_type = util.execWithCapture("blkid", ["-p", "-o", "value", "-s", "TYPE", path])
+    except (OSError, RuntimeError) as e:
+        log.error("Failed to detect the file system of %s: %s", path, e)
+        return None
+
+    return fs_type.strip() or None
+
+
+def _get_data_ranges(fd, size):
+    """Get ranges of the file that can contain data.
+
+    Holes of sparse files are skipped. If the file system doesn't
+    support the lookup of holes, the whole file is returned.
+
+    :param int fd: a file descriptor
+    :param int size: a size of the file
+    :return: a list of (start, end) tuples
+    """
+    ranges = []
+    offset = 0
+
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                # There is no more data.
+                if e.errno == errno.ENXIO:
+                    break
+                raise
+
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            ranges.append((start, end))
+            offset = end
+    except OSError as e:
+        log.debug("Failed to find holes in the image: %s", e)
+        return [(0, size)]
+
+    return ranges
+
+
+def _zero_range(fd, start, length):
+    """Zero a range of the target.
+
+    Block devices are asked to zero the range without a transfer
+    of the data. Otherwise, the zeros are written.
+    """
+    if not length:
+        return
+
+    if start % SECTOR_SIZE == 0 and length % SECTOR_SIZE == 0:
+        try:
+            fcntl.ioctl(fd, BLKZEROOUT, struct.pack("QQ", start, length))
+            return
+        except OSError as e:
+            if e.errno not in (errno.ENOTTY, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+
+    end = start + length
+    while start < end:
+        count = min(IMAGE_CHUNK_SIZE, end - start)
+        write_all(fd, _ZERO_CHUNK[:count], start)
+        start += count
+
+
+def write_image(image_path, device_path, callback=None):
+    """Write a file system image on a block device.
+
+    Holes and zero blocks of the image are not written. The matching
+    ranges of the device are zeroed instead, which block devices can
+    do without transferring the data.
+
+    :param str image_path: a path to the image
+    :param str device_path: a path to the block device
+    :param callback: a function called with the number of processed and total bytes
+    :return: a tuple of the number of written and zeroed bytes
+    :raise: PayloadInstallError if the device is too small
+    """
+    src_fd = os.open(image_path, os.O_RDONLY)
+    try:
+        dst_fd = os.open(device_path, os.O_WRONLY)
+        try:
+            size = os.lseek(src_fd, 0, os.SEEK_END)
+
+            if stat.S_ISBLK(os.fstat(dst_fd).st_mode) \
+                    and os.lseek(dst_fd, 0, os.SEEK_END) < size:
+                raise PayloadInstallError("The device %s is smaller than the image %s."
+                                          % (device_path, image_path))
+
+            written, zeroed = _write_ranges(src_fd, dst_fd, size, callback)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    log.debug("The image %s was written to %s: %d bytes written, %d bytes zeroed.",
+              image_path, device_path, written, zeroed)
+    return written, zeroed
+
+
+def _is_zero(data):
+    """Does the data contain only zeros?"""
+    if len(data) == IMAGE_CHUNK_SIZE:
+        return data == _ZERO_CHUNK
+
+    return data == bytes(len(data))
+
+
+class _ZeroRanges(object):
+    """Coalesced ranges of the target that should be zeroed."""
+
+    def __init__(self, fd):
+        self._fd = fd
+        self._start = 0
+        self._end = 0
+        self.zeroed = 0
+
+    def add(self, start, end):
+        """Add a range that should be zeroed."""
+        if start == end:
+            return
+
+        if self._start == self._end or self._end != start:
+            self.flush()
+            self._start = start
+
+        self._end = end
+
+    def flush(self):
+        """Zero the pending range."""
+        if self._start == self._end:
+            return
+
+        _zero_range(self._fd, self._start, self._end - self._start)
+        self.zeroed += self._end - self._start
+        self._start = self._end = 0
+
+
+def _write_ranges(src_fd, dst_fd, size, callback):
+    """Write the data ranges of the source and zero the rest."""
+    zeros = _ZeroRanges(dst_fd)
+    written = 0
+    position = 0
+
+    for start, end in _get_data_ranges(src_fd, size):
+        zeros.add(position, start)
+        offset = start
+
+        while offset < end:
+            data = os.pread(src_fd, min(IMAGE_CHUNK_SIZE, end - offset), offset)
+
+            if not data:
+                raise PayloadInstallError("Unexpected end of the image at %d." % offset)
+
+            if _is_zero(data):
+                zeros.add(offset, offset + len(data))
+            else:
+                zeros.flush()
+                write_all(dst_fd, data, offset)
+                written += len(data)
+
+            offset += len(data)
+
+            if callback:
+                callback(offset, size)
+
+        position = end
+
+    zeros.add(position, size)
+    zeros.flush()
+
+    if callback:
+        callback(size, size)
+
+    return written, zeros.zeroed
+
+
+def _run_command(cmd, args, success_codes=(0,)):
+    """Run a command and raise an error if it fails."""
+    try:
+        rc = util.execWithRedirect(cmd, args)
+    except (OSError, RuntimeError) as e:
+        raise PayloadInstallError("Failed to run %s: %s" % (cmd, e))
+
+    if rc not in success_codes:
+        raise PayloadInstallError("%s exited with code %d" % (cmd, rc))
+
+
+def set_fs_identity(device_path, fs_type, uuid=None, label=None):
+    """Set the UUID and the label of an unmounted file system.
+
+    The deployed file system has the identity of the image, but
+    the configuration of the target refers to the created one.
+
+    :param str device_path: a path to the block device
+    :param str fs_type: a type of the file system
+    :param str uuid: a UUID or None
+    :param str label: a label or None
+    """
+    if fs_type == "xfs":
+        args = []
+
+        if uuid:
+            args.extend(["-U", uuid])
+
+        if label:
+            args.extend(["-L", label])
+
+        if args:
+            _run_command("xfs_admin", args + [device_path])
+
+        return
+
+    # The file system has to be checked before the UUID is changed.
+    # The exit code 1 means that errors were corrected.
+    _run_command("e2fsck", ["-f", "-p", device_path], success_codes=(0, 1))
+
+    if uuid:
+        _run_command("tune2fs", ["-U", uuid, device_path])
+
+    if label:
+        _run_command("e2label", [device_path, label])
+
+
+def grow_fs(device_path, fs_type, mount_point):
+    """Grow the file system to the size of the block device.
+
+    The ext file systems are grown unmounted, xfs is grown mounted.
+
+    :param str device_path: a path to the block device
+    :param str fs_type: a type of the file system
+    :param str mount_point: a path to the mount point of the file system
+    """
+    if fs_type == "xfs":
+        _run_command("xfs_growfs", [mount_point])
+    else:
+        _run_command("resize2fs", [device_path])
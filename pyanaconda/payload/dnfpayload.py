@@ -19,13 +19,16 @@
 import os
 import configparser
 import collections
+from collections import namedtuple
 import multiprocessing
-import operator
 import hashlib
+import re
 import shutil
 import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 from pyanaconda.flags import flags
@@ -39,6 +42,8 @@ from pyanaconda.modules.common.constants.services import LOCALIZATION
 from pyanaconda.simpleconfig import SimpleConfigFile
 from pyanaconda.kickstart import RepoData
 from pyanaconda.product import productName, productVersion
+from pyanaconda.payload.metadata_cache import RepoMetadataCache
+from pyanaconda.payload.package_cache import PackageCache
 from pyanaconda.payload.errors import MetadataError, NoSuchGroup, DependencyError, \
     PayloadInstallError, PayloadSetupError, PayloadError
 
@@ -53,6 +58,7 @@ import dnf.repo
 import dnf.callback
 import dnf.transaction
 import libdnf.conf
+import libdnf.transaction
 import rpm
 from dnf.const import GROUP_PACKAGE_TYPES
 
@@ -67,6 +73,8 @@ DNF_CACHE_DIR = '/tmp/dnf.cache'
 DNF_PLUGINCONF_DIR = '/tmp/dnf.pluginconf'
 DNF_PACKAGE_CACHE_DIR_SUFFIX = 'dnf.package.cache'
 DNF_LIBREPO_LOG = '/tmp/dnf.librepo.log'
+DNF_METADATA_CACHE_DIR = '/tmp/dnf.metadata.cache'
+DNF_METADATA_CACHE_SIZE = Size("512 MiB")
 REPO_DIRS = ['/etc/yum.repos.d',
              '/etc/anaconda.repos.d',
              '/tmp/updates/anaconda.repos.d',
@@ -81,6 +89,23 @@ USER_AGENT = "%s (anaconda)/%s" % (productName, productVersion)
 # 6KiB = 4K(max default fragment size) + 2K(rpm db could be taken for a header file)
 BONUS_SIZE_ON_FILE = Size("6 KiB")
 
+# Space reserved on every download location.
+DOWNLOAD_SPACE_RESERVE = Size("150 MB")
+
+# Maximal number of repositories whose metadata are downloaded at the same time.
+REPO_METADATA_WORKERS = 4
+
+# Maximal number of repositories whose availability is verified at the same time.
+REPOMD_VERIFY_WORKERS = 8
+
+# Phases of the DNF transaction.
+TRANSACTION_PHASE_INSTALL = "install"
+TRANSACTION_PHASE_CONFIGURE = "configure"
+TRANSACTION_PHASE_VERIFY = "verify"
+
+# Minimal time in seconds between two progress updates of the DNF transaction.
+TRANSACTION_PROGRESS_INTERVAL = 0.5
+
 
 def _failure_limbo():
     progressQ.send_quit(1)
@@ -88,25 +113,202 @@ def _failure_limbo():
         time.sleep(10000)
 
 
-def _df_map():
-    """Return (mountpoint -> size available) mapping."""
-    output = util.execWithCapture('df', ['--output=target,avail'])
-    output = output.rstrip()
-    lines = output.splitlines()
+def _get_mount_points():
+    """Return a list of mount points of the current system.
+
+    The mount points are read from /proc/self/mounts.
+    """
+    mount_points = []
+
+    with open("/proc/self/mounts", "r") as f:
+        for line in f:
+            fields = line.split()
+
+            if len(fields) < 2:
+                continue
+
+            # Decode octal escapes of spaces and other special characters.
+            mount_point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), fields[1])
+            mount_points.append(mount_point)
+
+    return mount_points
+
+
+def _get_reasonable_mount_points():
+    """Return mount points that can be used as download locations."""
+    return {
+        '/tmp',
+        '/',
+        '/var/tmp',
+        conf.target.system_root,
+        os.path.join(conf.target.system_root, 'home'),
+        os.path.join(conf.target.system_root, 'tmp'),
+        os.path.join(conf.target.system_root, 'var'),
+    }
+
+
+def _get_free_space_map(paths=None):
+    """Return (mount point -> size available) mapping.
+
+    The available space is read with statvfs. Mount points of
+    the same file system are reported only once.
+
+    :param paths: a list of paths to check or None for reasonable mount points
+    :return: a dictionary of paths and sizes
+    """
+    if paths is None:
+        reasonable_mpoints = _get_reasonable_mount_points()
+        paths = [p for p in _get_mount_points() if p in reasonable_mpoints]
+
+        # Add /var/tmp/ if this is a directory or image installation
+        if not conf.target.is_hardware:
+            paths.append("/var/tmp")
+
     structured = {}
-    for line in lines:
-        key, val = line.rsplit(maxsplit=1)
-        if not key.startswith('/'):
+    devices = set()
+
+    for path in paths:
+        try:
+            device = os.stat(path).st_dev
+            stat = os.statvfs(path)
+        except OSError as e:
+            log.debug("Failed to get free space of %s: %s", path, e)
+            continue
+
+        if device in devices:
             continue
-        structured[key] = Size(int(val) * 1024)
 
-    # Add /var/tmp/ if this is a directory or image installation
-    if not conf.target.is_hardware:
-        var_tmp = os.statvfs("/var/tmp")
-        structured["/var/tmp"] = Size(var_tmp.f_frsize * var_tmp.f_bfree)
+        devices.add(device)
+        structured[path] = Size(stat.f_frsize * stat.f_bavail)
+
     return structured
 
 
+def _get_mount_point(path, mount_points):
+    """Return the mount point of the given path.
+
+    :param path: an absolute path
+    :param mount_points: a collection of mount points with "/"
+    :return: the longest mount point that contains the path
+    """
+    while path not in mount_points and path != "/":
+        path = os.path.dirname(path)
+
+    return path
+
+
+def _plan_downloads(free_space, install_space, download_sizes, root_mpoint,
+                    download_only):
+    """Plan download locations of packages from the given repositories.
+
+    The packages of a repository are downloaded to the same location, but
+    packages from different repositories can be downloaded to different
+    file systems. The space required by the installation on the given
+    locations is taken into account.
+
+    :param free_space: a dictionary of mount points and their available space
+    :param install_space: a dictionary of mount points and their space required
+                          by the installation
+    :param download_sizes: a dictionary of repository ids and download sizes
+    :param root_mpoint: the mount point of the root of the target system
+    :param download_only: ignore the install space if there is no other choice
+    :return: a dictionary of repository ids and mount points or None
+    """
+    log.debug('Input mount points: %s', free_space)
+    log.info('Estimated size: download %s & install %s',
+             Size(sum(download_sizes.values())), Size(sum(install_space.values())))
+
+    reasonable_mpoints = _get_reasonable_mount_points()
+    free_space = {key: val for (key, val) in free_space.items() if key in reasonable_mpoints}
+    remaining = {key: val - install_space.get(key, 0) for (key, val) in free_space.items()}
+    plan = {}
+
+    # Place the biggest repositories first.
+    for repo_id, size in sorted(download_sizes.items(), key=lambda x: (-x[1], x[0])):
+        sufficients = [key for key in remaining if remaining[key] >= size]
+
+        # If no sufficient mountpoints for download and install were found and we are
+        # looking for download mountpoint only, ignore install size and try to find
+        # mountpoint just to download packages. This fallback is required when user
+        # skipped space check.
+        if not sufficients and download_only:
+            sufficients = [key for (key, val) in free_space.items() if val >= size]
+
+        if not sufficients:
+            log.debug("No sufficient mountpoints found for the repo %s", repo_id)
+            return None
+
+        # Try to pick something else than root mountpoint, default to the biggest one.
+        mpoint = max(sufficients, key=lambda key: (key != root_mpoint, remaining[key], key))
+        log.info("Mountpoint %s picked for packages of the repo %s", mpoint, repo_id)
+
+        plan[repo_id] = mpoint
+        remaining[mpoint] -= size
+
+    return plan
+
+
+def _load_repos_metadata(repos, load_function=None, max_workers=REPO_METADATA_WORKERS):
+    """Load metadata of the given repositories concurrently.
+
+    Failure of one repository doesn't affect the others. The results
+    are returned in the same order as the given repositories.
+
+    All loads are finished before the function returns, so nothing
+    writes to the DNF cache afterwards. A stalled download is aborted
+    by the load itself according to the timeout and minrate options
+    of the DNF configuration.
+
+    :param repos: a list of DNF repositories
+    :param load_function: a function that loads a repository or None
+    :param max_workers: a maximal number of concurrently loaded repositories
+    :return: a list of error messages or None for successfully loaded repositories
+    """
+    if not repos:
+        return []
+
+    def load(repo):
+        start = time.time()
+
+        if load_function:
+            load_function(repo)
+        else:
+            repo.load()
+
+        log.debug("repo %s: metadata loaded in %.2f s", repo.id, time.time() - start)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(repos)),
+                            thread_name_prefix="AnaRepoMetadataThread") as executor:
+        futures = [executor.submit(load, repo) for repo in repos]
+
+    results = []
+
+    for future in futures:
+        try:
+            future.result()
+            results.append(None)
+        except dnf.exceptions.RepoError as e:
+            results.append(str(e))
+
+    return results
+
+
+def _create_repomd_session():
+    """Create a session for downloading of repomd.xml files.
+
+    The session keeps a pool of connections, so it can be shared
+    by concurrent requests and reuse the opened connections.
+
+    :return: an instance of requests.Session
+    """
+    session = util.requests_session()
+    adapter = HTTPAdapter(pool_connections=REPOMD_VERIFY_WORKERS,
+                          pool_maxsize=REPOMD_VERIFY_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def _paced(fn):
     """Execute `fn` no more often then every 2 seconds."""
     def paced_fn(self, *args):
@@ -118,117 +320,138 @@ def _paced(fn):
     return paced_fn
 
 
-def _pick_mpoint(df, download_size, install_size, download_only):
-    reasonable_mpoints = {
-        '/tmp',
-        '/',
-        '/var/tmp',
-        conf.target.system_root,
-        os.path.join(conf.target.system_root, 'home'),
-        os.path.join(conf.target.system_root, 'tmp'),
-        os.path.join(conf.target.system_root, 'var'),
-    }
+class TransactionProgressState(namedtuple("TransactionProgressState",
+                                          ["phase", "item", "done", "total",
+                                           "bytes_done", "bytes_total"])):
+    """State of the DNF transaction progress.
 
-    requested = download_size
-    requested_root = requested + install_size
-    root_mpoint = conf.target.system_root
-    log.debug('Input mount points: %s', df)
-    log.info('Estimated size: download %s & install %s', requested,
-             (requested_root - requested))
-
-    # Find sufficient mountpoint to download and install packages.
-    sufficients = {key: val for (key, val) in df.items()
-                   if ((key != root_mpoint and val > requested) or val > requested_root) and
-                   key in reasonable_mpoints}
-
-    # If no sufficient mountpoints for download and install were found and we are looking
-    # for download mountpoint only, ignore install size and try to find mountpoint just
-    # to download packages. This fallback is required when user skipped space check.
-    if not sufficients and download_only:
-        sufficients = {key: val for (key, val) in df.items() if val > requested and
-                       key in reasonable_mpoints}
-        if sufficients:
-            log.info('Sufficient mountpoint for download only found: %s', sufficients)
-    elif sufficients:
-        log.info('Sufficient mountpoints found: %s', sufficients)
-
-    if not sufficients:
-        log.debug("No sufficient mountpoints found")
-        return None
+    The phase is one of the TRANSACTION_PHASE_* constants, the item is
+    a name of the current package. The done and total attributes count
+    packages, the bytes_done and bytes_total attributes count installed
+    data of the packages.
+    """
+    __slots__ = ()
 
-    sorted_mpoints = sorted(sufficients.items(), key=operator.itemgetter(1), reverse=True)
+    @property
+    def percentage(self):
+        """Percentage of the installed data."""
+        if not self.bytes_total:
+            return 0 if self.phase == TRANSACTION_PHASE_INSTALL else 100
 
-    # try to pick something else than root mountpoint for downloading
-    if download_only and len(sorted_mpoints) >= 2 and sorted_mpoints[0][0] == root_mpoint:
-        return sorted_mpoints[1][0]
-    else:
-        # default to the biggest one:
-        return sorted_mpoints[0][0]
+        return min(100, int(100 * self.bytes_done / self.bytes_total))
 
 
 class PayloadRPMDisplay(dnf.callback.TransactionProgress):
-    def __init__(self, queue_instance):
+    """Report progress of the DNF transaction to the parent process.
+
+    The progress updates are merged and sent to the queue no more
+    often than once per TRANSACTION_PROGRESS_INTERVAL seconds, or
+    when the transaction phase changes. The log messages are sent
+    in batches together with the progress updates.
+    """
+
+    def __init__(self, queue_instance, bytes_total=0):
         super().__init__()
         self._queue = queue_instance
         self._last_ts = None
         self._postinst_phase = False
         self.cnt = 0
 
+        self._state = None
+        self._state_changed = False
+        self._bytes_installed = 0
+        self._bytes_total = bytes_total
+        self._current_size = 0
+        self._logs = []
+        self._last_report = 0
+
+    def _log(self, message):
+        self._logs.append(message)
+
+    def _update(self, phase, item, done, total, bytes_done=None):
+        if bytes_done is None:
+            bytes_done = self._bytes_installed
+
+        phase_changed = not self._state or self._state.phase != phase
+        self._state = TransactionProgressState(phase, item, done, total,
+                                               bytes_done, self._bytes_total)
+        self._state_changed = True
+
+        if phase_changed or time.time() - self._last_report >= TRANSACTION_PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Send the pending log messages and progress updates."""
+        if self._logs:
+            self._queue.put(('log', self._logs))
+            self._logs = []
+
+        if self._state_changed:
+            self._queue.put(('progress', self._state))
+            self._state_changed = False
+
+        self._last_report = time.time()
+
     def progress(self, package, action, ti_done, ti_total, ts_done, ts_total):
         # Process DNF actions, communicating with anaconda via the queue
-        # A normal installation consists of 'install' messages followed by
+        # A normal installation consists of 'install' updates followed by
         # the 'post' message.
-        if action == dnf.transaction.PKG_INSTALL and ti_done == 0:
+        if action == dnf.transaction.PKG_INSTALL:
+            item = '%s.%s' % (package.name, package.arch)
+
             # do not report same package twice
-            if self._last_ts == ts_done:
-                return
-            self._last_ts = ts_done
+            if self._last_ts != ts_done:
+                self._last_ts = ts_done
+                self._bytes_installed += self._current_size
+                self._current_size = ti_total
+                self.cnt += 1
 
-            msg = '%s.%s (%d/%d)' % \
-                (package.name, package.arch, ts_done, ts_total)
-            self.cnt += 1
-            self._queue.put(('install', msg))
+                # Log the exact package nevra, build time and checksum
+                nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
+                self._log("Installed: %s %s %s" % (nevra, package.buildtime,
+                                                   package.returnIdSum()[1]))
 
-            # Log the exact package nevra, build time and checksum
-            nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
-            log_msg = "Installed: %s %s %s" % (nevra, package.buildtime, package.returnIdSum()[1])
-            self._queue.put(('log', log_msg))
+            self._update(TRANSACTION_PHASE_INSTALL, item, ts_done, ts_total,
+                         self._bytes_installed + ti_done)
 
         elif action == dnf.transaction.TRANS_POST:
+            self._bytes_installed += self._current_size
+            self._current_size = 0
+            self._log("Post installation setup phase started.")
+            self.flush()
             self._queue.put(('post', None))
-            log_msg = "Post installation setup phase started."
-            self._queue.put(('log', log_msg))
             self._postinst_phase = True
 
         elif action == dnf.transaction.PKG_SCRIPTLET:
             # Log the exact package nevra, build time and checksum
             nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
-            log_msg = "Configuring (running scriptlet for): %s %s %s" % (nevra, package.buildtime,
-                                                                         package.returnIdSum()[1])
-            self._queue.put(('log', log_msg))
+            self._log("Configuring (running scriptlet for): %s %s %s"
+                      % (nevra, package.buildtime, package.returnIdSum()[1]))
 
             # only show progress in UI for post-installation scriptlets
             if self._postinst_phase:
-                msg = '%s.%s' % (package.name, package.arch)
-                self._queue.put(('configure', msg))
+                item = '%s.%s' % (package.name, package.arch)
+                self._update(TRANSACTION_PHASE_CONFIGURE, item, ts_done, ts_total)
 
         elif action == dnf.transaction.PKG_VERIFY:
-            msg = '%s.%s (%d/%d)' % (package.name, package.arch, ts_done, ts_total)
-            self._queue.put(('verify', msg))
-
             # Log the exact package nevra, build time and checksum
             nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
-            log_msg = "Verifying: %s %s %s" % (nevra, package.buildtime, package.returnIdSum()[1])
-            self._queue.put(('log', log_msg))
+            self._log("Verifying: %s %s %s" % (nevra, package.buildtime,
+                                               package.returnIdSum()[1]))
+
+            item = '%s.%s' % (package.name, package.arch)
+            self._update(TRANSACTION_PHASE_VERIFY, item, ts_done, ts_total)
 
             # Once the last package is verified the transaction is over
             if ts_done == ts_total:
+                self.flush()
                 self._queue.put(('done', None))
 
     def error(self, message):
         """Report an error that occurred during the transaction. Message is a
         string which describes the error.
         """
+        self.flush()
         self._queue.put(('error', message))
 
 
@@ -239,6 +462,7 @@ class DownloadProgress(dnf.callback.DownloadProgress):
         self.last_time = time.time()
         self.total_files = 0
         self.total_size = Size(0)
+        self.downloaded_packages = []
 
     @_paced
     def _update(self):
@@ -257,6 +481,7 @@ class DownloadProgress(dnf.callback.DownloadProgress):
         nevra = str(dnf_payload)
         if status is dnf.callback.STATUS_OK:
             self.downloads[nevra] = dnf_payload.download_size
+            self.downloaded_packages.append(dnf_payload.pkg)
             self._update()
             return
         log.warning("Failed to download '%s': %d - %s", nevra, status, msg)
@@ -277,8 +502,11 @@ def do_transaction(base, queue_instance):
     # always raise a BaseException, so presence of 'quit' without a preceeding
     # 'post' message also indicates a problem.
     try:
-        display = PayloadRPMDisplay(queue_instance)
+        bytes_total = sum(tsi.pkg.installsize for tsi in base.transaction
+                          if tsi.action == libdnf.transaction.TransactionItemAction_INSTALL)
+        display = PayloadRPMDisplay(queue_instance, bytes_total)
         base.do_transaction(display=display)
+        display.flush()
         exit_reason = "DNF quit"
     except BaseException as e:  # pylint: disable=broad-except
         log.error('The transaction process has ended abruptly')
@@ -295,7 +523,7 @@ class DNFPayload(payload.PackagePayload):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._base = None
-        self._download_location = None
+        self._download_locations = []
         self._updates_enabled = True
         self._configure()
 
@@ -308,6 +536,12 @@ class DNFPayload(payload.PackagePayload):
         # save repomd metadata
         self._repoMD_list = []
 
+        # share connections for verification of repositories
+        self._repomd_session = _create_repomd_session()
+
+        # reuse downloaded metadata of unchanged repositories
+        self._metadata_cache = RepoMetadataCache(DNF_METADATA_CACHE_DIR, DNF_METADATA_CACHE_SIZE)
+
         self._req_groups = set()
         self._req_packages = set()
         self.requirements.set_apply_callback(self._apply_requirements)
@@ -421,7 +655,7 @@ class DNFPayload(payload.PackagePayload):
         repo.enable()
         try:
             # Load the metadata to verify that the repo is valid
-            repo.load()
+            self._load_repo(repo)
         except dnf.exceptions.RepoError as e:
             repo.disable()
             log.debug("repo: '%s' - %s failed to load repomd", repo.id,
@@ -431,6 +665,57 @@ class DNFPayload(payload.PackagePayload):
         log.info("enabled repo: '%s' - %s and got repomd", repo.id,
                  repo.baseurl or repo.mirrorlist or repo.metalink)
 
+    def _load_repo(self, dnf_repo):
+        """Load the metadata of the repository.
+
+        Use the cached metadata if the repomd.xml file hasn't changed.
+
+        :param dnf_repo: a DNF repository
+        """
+        self._restore_repo_metadata(dnf_repo)
+        dnf_repo.load()
+
+    def _get_repo_metadata_dir(self, dnf_repo):
+        """Get a path to the local cache of the repository metadata."""
+        return dnf_repo._cachedir  # pylint: disable=protected-access
+
+    def _restore_repo_metadata(self, dnf_repo):
+        """Restore the metadata of the repository from the metadata cache.
+
+        :param dnf_repo: a DNF repository
+        :return: True if the metadata were restored, otherwise False
+        """
+        metadata_dir = self._get_repo_metadata_dir(dnf_repo)
+
+        # The metadata are already available.
+        if os.path.exists(os.path.join(metadata_dir, "repodata", "repomd.xml")):
+            return False
+
+        # We can check only repositories with base urls.
+        if not dnf_repo.baseurl:
+            return False
+
+        key = RepoMDMetaHash(self, dnf_repo, self._repomd_session).get_repoMD_key()
+        return self._metadata_cache.restore(key, dnf_repo.id, metadata_dir, DNF_CACHE_DIR)
+
+    def _store_repo_metadata(self, dnf_repo):
+        """Store the metadata of the repository in the metadata cache.
+
+        :param dnf_repo: a DNF repository
+        :return: True if the metadata were stored, otherwise False
+        """
+        metadata_dir = self._get_repo_metadata_dir(dnf_repo)
+        repomd_path = os.path.join(metadata_dir, "repodata", "repomd.xml")
+
+        # Local repositories are not downloaded to the cache.
+        if not os.path.exists(repomd_path):
+            return False
+
+        with open(repomd_path, "r") as f:
+            key = RepoMDMetaHash.calculate_repoMD_key(f.read())
+
+        return self._metadata_cache.store(key, dnf_repo.id, metadata_dir, DNF_CACHE_DIR)
+
     def add_repo(self, ksrepo):
         """Add an enabled repo to dnf and kickstart repo lists.
 
@@ -740,7 +1025,7 @@ class DNFPayload(payload.PackagePayload):
 
         size = sum(tsi.pkg.downloadsize for tsi in transaction)
         # reserve extra
-        return Size(size) + Size("150 MB")
+        return Size(size) + DOWNLOAD_SPACE_RESERVE
 
     def _payload_setup_error(self, exn):
         log.error('Payload setup error: %r', exn)
@@ -753,22 +1038,65 @@ class DNFPayload(payload.PackagePayload):
             util.ipmi_abort(scripts=self.data.scripts)
             sys.exit(1)
 
-    def _pick_download_location(self):
-        download_size = self._download_space
-        install_size = self._space_required()
-        df_map = _df_map()
-        mpoint = _pick_mpoint(df_map, download_size, install_size, download_only=True)
-        if mpoint is None:
-            msg = ("Not enough disk space to download the packages; size %s." % download_size)
+    def _get_download_sizes(self):
+        """Return a dictionary of repository ids and download sizes of their packages."""
+        transaction = self._base.transaction
+        if transaction is None:
+            return {}
+
+        sizes = collections.defaultdict(int)
+        for pkg in transaction.install_set:
+            sizes[pkg.reponame] += pkg.downloadsize
+
+        return {repo_id: Size(size) for (repo_id, size) in sizes.items()}
+
+    def _get_target_mount_points(self):
+        """Return a set of mount points of the target system."""
+        mount_points = {"/"}
+
+        if self.storage:
+            # we can ignore swap
+            mount_points.update(key.rstrip("/") or "/" for key in self.storage.mountpoints
+                                if key.startswith("/"))
+
+        return mount_points
+
+    def _get_install_space_map(self):
+        """Return (mount point -> space required by installation) mapping.
+
+        The mount points are paths in the installation environment.
+        """
+        root_mpoint = conf.target.system_root
+        required = self._space_required_by_mount_point(self._get_target_mount_points())
+        return {os.path.normpath(root_mpoint + key): val for (key, val) in required.items()}
+
+    def _pick_download_locations(self):
+        """Pick download locations for packages of the enabled repositories.
+
+        :return: a list of package directories
+        """
+        download_sizes = self._get_download_sizes()
+        install_space = self._get_install_space_map()
+        free_space = {key: val - DOWNLOAD_SPACE_RESERVE
+                      for (key, val) in _get_free_space_map().items()}
+
+        plan = _plan_downloads(free_space, install_space, download_sizes,
+                               conf.target.system_root, download_only=True)
+        if plan is None:
+            msg = ("Not enough disk space to download the packages; size %s." %
+                   self._download_space)
             raise PayloadError(msg)
 
-        log.info("Mountpoint %s picked as download location", mpoint)
-        pkgdir = '%s/%s' % (mpoint, DNF_PACKAGE_CACHE_DIR_SUFFIX)
+        pkgdirs = set()
         with self._repos_lock:
             for repo in self._base.repos.iter_enabled():
-                repo.pkgdir = pkgdir
+                if repo.id not in plan:
+                    continue
 
-        return pkgdir
+                repo.pkgdir = '%s/%s' % (plan[repo.id], DNF_PACKAGE_CACHE_DIR_SUFFIX)
+                pkgdirs.add(repo.pkgdir)
+
+        return sorted(pkgdirs)
 
     def _package_name_installable(self, package_name):
         """Check if the given package name looks instalable."""
@@ -806,16 +1134,25 @@ class DNFPayload(payload.PackagePayload):
             langpacks.append("langpacks-" + loc)
         return langpacks
 
-    def _sync_metadata(self, dnf_repo):
-        try:
-            dnf_repo.load()
-        except dnf.exceptions.RepoError as e:
-            id_ = dnf_repo.id
-            log.info('_sync_metadata: addon repo error: %s', e)
-            self.disable_repo(id_)
-            self.verbose_errors.append(str(e))
-        log.debug('repo %s: _sync_metadata success from %s', dnf_repo.id,
-                  dnf_repo.baseurl or dnf_repo.mirrorlist or dnf_repo.metalink)
+    def _sync_metadata(self, dnf_repos):
+        """Synchronize metadata of the given repositories.
+
+        The metadata are downloaded concurrently. Repositories that
+        failed to load are disabled and their errors are reported.
+
+        :param dnf_repos: a list of DNF repositories
+        """
+        errors_list = _load_repos_metadata(dnf_repos, load_function=self._load_repo)
+
+        for dnf_repo, error in zip(dnf_repos, errors_list):
+            if error:
+                log.info('_sync_metadata: addon repo error: %s', error)
+                self.disable_repo(dnf_repo.id)
+                self.verbose_errors.append(error)
+                continue
+
+            log.debug('repo %s: _sync_metadata success from %s', dnf_repo.id,
+                      dnf_repo.baseurl or dnf_repo.mirrorlist or dnf_repo.metalink)
 
     @property
     def base_repo(self):
@@ -849,8 +1186,8 @@ class DNFPayload(payload.PackagePayload):
             log.warning("Payload doesn't have storage")
             return size
 
-        download_size = self._download_space
-        valid_points = _df_map()
+        download_sizes = self._get_download_sizes()
+        valid_points = _get_free_space_map()
         root_mpoint = conf.target.system_root
         for (key, val) in self.storage.mountpoints.items():
             new_key = key
@@ -860,39 +1197,78 @@ class DNFPayload(payload.PackagePayload):
             if key.startswith('/') and ((root_mpoint + new_key) not in valid_points):
                 valid_points[root_mpoint + new_key] = val.format.free_space_estimate(val.size)
 
-        m_point = _pick_mpoint(valid_points, download_size, size, download_only=False)
-        if not m_point or m_point == root_mpoint:
-            # download and install to the same mount point
+        free_space = {key: val - DOWNLOAD_SPACE_RESERVE for (key, val) in valid_points.items()}
+        install_space = self._get_install_space_map()
+
+        plan = _plan_downloads(free_space, install_space, download_sizes, root_mpoint,
+                               download_only=False)
+
+        # Packages downloaded to the target system take its space.
+        if plan is None:
+            download_size = self._download_space
+        else:
+            download_size = Size(sum(download_sizes[repo_id] for (repo_id, mpoint) in plan.items()
+                                     if mpoint.startswith(root_mpoint)))
+            if download_size:
+                download_size += DOWNLOAD_SPACE_RESERVE
+
+        if download_size:
             size = size + download_size
             log.debug("Install + download space required %s", size)
         else:
-            log.debug("Download space required %s for mpoint %s (non-chroot)",
-                      download_size, m_point)
+            log.debug("Download space required %s (non-chroot)", self._download_space)
             log.debug("Installation space required %s", size)
         return size
 
     def _space_required(self):
+        return sum(self._space_required_by_mount_point().values(), Size(0))
+
+    def _space_required_by_mount_point(self, mount_points=("/",)):
+        """Return (mount point -> space required by installation) mapping.
+
+        The installed size of a package is split between the mount points
+        of the target system by the number of its files on them.
+
+        :param mount_points: a collection of mount points of the target system
+        :return: a dictionary of mount points and sizes
+        """
         transaction = self._base.transaction
         if transaction is None:
-            return Size("3000 MB")
+            return {"/": Size("3000 MB")}
+
+        mount_points = set(mount_points) | {"/"}
+        sizes = collections.defaultdict(int)
+        files = collections.defaultdict(int)
 
-        size = 0
-        files_nm = 0
         for tsi in transaction:
+            pkg_files = tsi.pkg.files
+
             # space taken by all files installed by the packages
-            size += tsi.pkg.installsize
-            # number of files installed on the system
-            files_nm += len(tsi.pkg.files)
-
-        # append bonus size depending on number of files
-        bonus_size = files_nm * BONUS_SIZE_ON_FILE
-        size = Size(size)
-        # add another 10% as safeguard
-        total_space = (size + bonus_size) * 1.1
-        log.debug("Size from DNF: %s", size)
-        log.debug("Bonus size %s by number of files %s", bonus_size, files_nm)
-        log.debug("Total size required %s", total_space)
-        return total_space
+            if len(mount_points) == 1 or not pkg_files:
+                sizes["/"] += tsi.pkg.installsize
+                files["/"] += len(pkg_files)
+                continue
+
+            counts = collections.Counter(_get_mount_point(path, mount_points)
+                                         for path in pkg_files)
+
+            for (mount_point, count) in counts.items():
+                sizes[mount_point] += tsi.pkg.installsize * count / len(pkg_files)
+                files[mount_point] += count
+
+        required = {}
+        for mount_point in sizes:
+            size = Size(int(sizes[mount_point]))
+            # append bonus size depending on number of files
+            bonus_size = files[mount_point] * BONUS_SIZE_ON_FILE
+            # add another 10% as safeguard
+            total_space = (size + bonus_size) * 1.1
+            log.debug("Size from DNF for %s: %s", mount_point, size)
+            log.debug("Bonus size %s by number of files %s", bonus_size, files[mount_point])
+            log.debug("Total size required %s", total_space)
+            required[mount_point] = total_space
+
+        return required
 
     def _is_group_visible(self, grpid):
         grp = self._base.comps.group_by_pattern(grpid)
@@ -1008,9 +1384,14 @@ class DNFPayload(payload.PackagePayload):
 
     def gather_repo_metadata(self):
         with self._repos_lock:
-            for repo in self._base.repos.iter_enabled():
-                self._sync_metadata(repo)
+            self._sync_metadata(list(self._base.repos.iter_enabled()))
         self._base.fill_sack(load_system_repo=False)
+
+        # the solv files are generated now, so cache the metadata
+        with self._repos_lock:
+            for repo in self._base.repos.iter_enabled():
+                self._store_repo_metadata(repo)
+
         self._base.read_comps(arch_filter=True)
         self._refresh_environment_addons()
 
@@ -1025,21 +1406,50 @@ class DNFPayload(payload.PackagePayload):
             self._setup_media(self.install_device)
         try:
             self.check_software_selection()
-            self._download_location = self._pick_download_location()
+            self._download_locations = self._pick_download_locations()
         except PayloadError as e:
             if errors.errorHandler.cb(e) == errors.ERROR_RAISE:
                 log.error("Installation failed: %r", e)
                 _failure_limbo()
 
-        if os.path.exists(self._download_location):
-            log.info("Removing existing package download location: %s", self._download_location)
-            shutil.rmtree(self._download_location)
-        pkgs_to_download = self._base.transaction.install_set
-        log.info('Downloading packages to %s.', self._download_location)
+        for location in self._download_locations:
+            if os.path.exists(location):
+                log.info("Removing existing package download location: %s", location)
+                shutil.rmtree(location)
+
+        log.info('Downloading packages to %s.', ", ".join(self._download_locations))
+        self._download_packages(self._base.transaction.install_set)
+        log.info('Downloading packages finished.')
+        self._run_transaction()
+
+        # Don't close the mother base here, because we still need it.
+        for location in self._download_locations:
+            if os.path.exists(location):
+                log.info("Cleaning up downloaded packages: %s", location)
+                shutil.rmtree(location)
+            else:
+                # Some installation sources, such as NFS, don't need to download packages to
+                # local storage, so the download location might not always exist. So for now
+                # warn about this, at least until the RFE in bug 1193121 is implemented and
+                # we don't have to care about clearing the download location ourselves.
+                log.warning("Can't delete nonexistent download location: %s", location)
+
+    def _download_packages(self, packages):
+        """Download the given packages.
+
+        Use the persistent package cache if it is configured.
+
+        :param packages: a list of DNF packages
+        """
+        package_cache = self._get_package_cache()
+
+        if package_cache:
+            self._restore_cached_packages(package_cache, packages)
+
         progressQ.send_message(_('Downloading packages'))
         progress = DownloadProgress()
         try:
-            self._base.download_packages(pkgs_to_download, progress)
+            self._base.download_packages(packages, progress)
         except dnf.exceptions.DownloadError as e:
             msg = 'Failed to download the following packages: %s' % str(e)
             exc = PayloadInstallError(msg)
@@ -1047,8 +1457,71 @@ class DNFPayload(payload.PackagePayload):
                 log.error("Installation failed: %r", exc)
                 _failure_limbo()
 
-        log.info('Downloading packages finished.')
+        if package_cache:
+            self._store_cached_packages(package_cache, progress.downloaded_packages)
+
+    def _get_package_cache(self):
+        """Get the persistent package cache.
+
+        :return: an instance of PackageCache or None
+        """
+        if not conf.payload.package_cache_dir:
+            return None
+
+        return PackageCache(conf.payload.package_cache_dir,
+                            Size("{} MiB".format(conf.payload.package_cache_size)))
+
+    def _get_downloaded_packages(self, packages):
+        """Get packages that are downloaded to the download location.
+
+        Packages from local repositories are not downloaded.
+
+        :param packages: a list of DNF packages
+        :return: a list of DNF packages
+        """
+        return [pkg for pkg in packages if self._is_downloaded_package(pkg)]
+
+    def _is_downloaded_package(self, package):
+        """Is the package downloaded to a download location?"""
+        return any(package.localPkg().startswith(location)
+                   for location in self._download_locations)
+
+    def _restore_cached_packages(self, package_cache, packages):
+        """Restore packages from the persistent package cache.
+
+        :param package_cache: an instance of PackageCache
+        :param packages: a list of DNF packages
+        """
+        restored = 0
+
+        for pkg in self._get_downloaded_packages(packages):
+            if package_cache.restore(pkg, pkg.localPkg()):
+                restored += 1
+
+        log.info("Restored %d of %d packages from the package cache %s.",
+                 restored, len(packages), package_cache.cache_dir)
+
+    def _store_cached_packages(self, package_cache, packages):
+        """Store downloaded packages in the persistent package cache.
 
+        The packages are verified by DNF when they are downloaded.
+
+        :param package_cache: an instance of PackageCache
+        :param packages: a list of DNF packages downloaded successfully
+        """
+        stored = 0
+
+        for pkg in self._get_downloaded_packages(packages):
+            if package_cache.store(pkg, pkg.localPkg()):
+                stored += 1
+
+        log.info("Stored %d packages in the package cache %s.", stored,
+                 package_cache.cache_dir)
+
+        package_cache.evict()
+
+    def _run_transaction(self):
+        """Run the DNF transaction in a separate process."""
         pre_msg = (N_("Preparing transaction from installation source"))
         progress_message(pre_msg)
 
@@ -1056,22 +1529,33 @@ class DNFPayload(payload.PackagePayload):
         process = multiprocessing.Process(target=do_transaction,
                                           args=(self._base, queue_instance))
         process.start()
+        self._wait_for_transaction(queue_instance)
+        process.join()
+
+    def _wait_for_transaction(self, queue_instance):
+        """Report the progress of the DNF transaction until it is done.
+
+        :param queue_instance: a queue for the progress messages
+        :raise: PayloadError if the transaction process has ended
+        """
         (token, msg) = queue_instance.get()
-        # When the installation works correctly it will get 'install' updates
+        last_state = None
+        last_report = 0
+        # When the installation works correctly it will get 'progress' updates
         # followed by a 'post' message and then a 'quit' message.
         # If the installation fails it will send 'quit' without 'post'
         while token:
-            if token == 'install':
-                msg = _("Installing %s") % msg
-                progressQ.send_message(msg)
-            elif token == 'configure':
-                msg = _("Configuring %s") % msg
-                progressQ.send_message(msg)
-            elif token == 'verify':
-                msg = _("Verifying %s") % msg
-                progressQ.send_message(msg)
+            if token == 'progress':
+                # Don't flood the user interface with updates.
+                now = time.time()
+                if not last_state or last_state.phase != msg.phase or \
+                        now - last_report >= TRANSACTION_PROGRESS_INTERVAL:
+                    self._report_transaction_progress(msg)
+                    last_report = now
+                last_state = msg
             elif token == 'log':
-                log.info(msg)
+                for line in msg:
+                    log.info(line)
             elif token == 'post':
                 msg = (N_("Performing post-installation setup tasks"))
                 progressQ.send_message(msg)
@@ -1087,17 +1571,20 @@ class DNFPayload(payload.PackagePayload):
                     _failure_limbo()
             (token, msg) = queue_instance.get()
 
-        process.join()
-        # Don't close the mother base here, because we still need it.
-        if os.path.exists(self._download_location):
-            log.info("Cleaning up downloaded packages: %s", self._download_location)
-            shutil.rmtree(self._download_location)
+    def _report_transaction_progress(self, state):
+        """Report the progress of the DNF transaction.
+
+        :param state: an instance of TransactionProgressState
+        """
+        if state.phase == TRANSACTION_PHASE_INSTALL:
+            msg = _("Installing %s") % ('%s (%d/%d)' % (state.item, state.done, state.total))
+        elif state.phase == TRANSACTION_PHASE_CONFIGURE:
+            msg = _("Configuring %s") % state.item
         else:
-            # Some installation sources, such as NFS, don't need to download packages to
-            # local storage, so the download location might not always exist. So for now
-            # warn about this, at least until the RFE in bug 1193121 is implemented and
-            # we don't have to care about clearing the download location ourselves.
-            log.warning("Can't delete nonexistent download location: %s", self._download_location)
+            msg = _("Verifying %s") % ('%s (%d/%d)' % (state.item, state.done, state.total))
+
+        progressQ.send_message(msg)
+        progressQ.send_percentage(state.percentage)
 
     def get_repo(self, repo_id):
         """Return the yum repo object."""
@@ -1110,14 +1597,34 @@ class DNFPayload(payload.PackagePayload):
             return super().is_repo_enabled(repo_id)
 
     def verify_available_repositories(self):
-        """Verify availability of repositories."""
+        """Verify availability of repositories.
+
+        The repositories are verified concurrently. The verification
+        stops with the first unavailable or changed repository.
+        """
         if not self._repoMD_list:
             return False
 
-        for repo in self._repoMD_list:
-            if not repo.verify_repoMD():
-                log.debug("Can't reach repo %s", repo.id)
-                return False
+        executor = ThreadPoolExecutor(max_workers=min(REPOMD_VERIFY_WORKERS,
+                                                      len(self._repoMD_list)),
+                                      thread_name_prefix="AnaRepoVerifyThread")
+        futures = {executor.submit(repo.verify_repoMD): repo for repo in self._repoMD_list}
+
+        try:
+            for future in as_completed(futures):
+                repo = futures[future]
+                log.debug("Repo %s: repomd.xml latencies %s", repo.id, repo.latencies)
+
+                if not future.result():
+                    log.debug("Can't reach repo %s", repo.id)
+                    return False
+        finally:
+            # Don't wait for the remaining repositories.
+            for future in futures:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+
         return True
 
     def language_groups(self):
@@ -1386,11 +1893,16 @@ class DNFPayload(payload.PackagePayload):
         Save repomd hash to test if the repositories can be reached.
         """
         super().post_setup()
-        self._repoMD_list = []
-        for repo in self._base.repos.iter_enabled():
-            repoMD = RepoMDMetaHash(self, repo)
-            repoMD.store_repoMD_hash()
-            self._repoMD_list.append(repoMD)
+        self._repoMD_list = [RepoMDMetaHash(self, repo, self._repomd_session)
+                             for repo in self._base.repos.iter_enabled()]
+
+        if not self._repoMD_list:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(REPOMD_VERIFY_WORKERS, len(self._repoMD_list)),
+                                thread_name_prefix="AnaRepoVerifyThread") as executor:
+            for repoMD in self._repoMD_list:
+                executor.submit(repoMD.store_repoMD_hash)
 
     def post_install(self):
         """Perform post-installation tasks."""
@@ -1422,12 +1934,16 @@ class RepoMDMetaHash(object):
     """Class that holds hash of a repomd.xml file content from a repository.
     This class can test availability of this repository by comparing hashes.
     """
-    def __init__(self, dnf_payload, repo):
+    def __init__(self, dnf_payload, repo, session=None):
         self._repoId = repo.id
         self._method = dnf_payload.data.method
         self._ssl_verify = repo.sslverify
         self._urls = repo.baseurl
         self._repomd_hash = ""
+        self._session = session
+        self._repomd_url = None
+        self._validators = {}
+        self._latencies = {}
 
     @property
     def repoMD_hash(self):
@@ -1439,26 +1955,75 @@ class RepoMDMetaHash(object):
         """Name of the repository."""
         return self._repoId
 
+    @property
+    def latencies(self):
+        """Return latencies of the last requests in seconds by urls."""
+        return dict(self._latencies)
+
     def store_repoMD_hash(self):
-        """Download and store hash of the repomd.xml file content."""
-        repomd = self._download_repoMD(self._method)
+        """Download and store hash of the repomd.xml file content.
+
+        The validators of the stored file are kept only for the url
+        that returned it.
+        """
+        repomd, url, validators = self._download_repoMD(self._method)
         self._repomd_hash = self._calculate_hash(repomd)
+        self._repomd_url = url
+        self._validators = validators
 
     def verify_repoMD(self):
-        """Download and compare with stored repomd.xml file."""
-        new_repomd = self._download_repoMD(self._method)
+        """Download and compare with stored repomd.xml file.
+
+        The url of the stored repomd.xml file is queried first, because
+        other mirrors can be synchronized at a different time. The download
+        is skipped if that url reports that the file hasn't been modified.
+        The other urls are used only if the stored url doesn't respond.
+        """
+        proxies = self._get_proxies(self._method)
+        success = False
+
+        if self._repomd_url in self._urls:
+            success, new_repomd, _validators = self._fetch_repoMD(self._repomd_url, proxies,
+                                                                  conditional=True)
+
+        if not success:
+            urls = [url for url in self._urls if url != self._repomd_url]
+            new_repomd, _url, _validators = self._download_repoMD(self._method, urls=urls)
+
+        if new_repomd is None:
+            log.debug("Repo %s: repomd.xml is not modified", self._repoId)
+            return True
+
         new_repomd_hash = self._calculate_hash(new_repomd)
         return new_repomd_hash == self._repomd_hash
 
-    def _calculate_hash(self, data):
+    def get_repoMD_key(self):
+        """Download repomd.xml and return a hex hash of its content.
+
+        :return: a string with the hash or an empty string if not available
+        """
+        repomd, _url, _validators = self._download_repoMD(self._method)
+        return self.calculate_repoMD_key(repomd)
+
+    @classmethod
+    def calculate_repoMD_key(cls, data):
+        """Return a hex hash of the given repomd.xml content.
+
+        :return: a string with the hash or an empty string if no data
+        """
+        if not data:
+            return ""
+
+        return cls._calculate_hash(data).hex()
+
+    @staticmethod
+    def _calculate_hash(data):
         m = hashlib.sha256()
         m.update(data.encode('ascii', 'backslashreplace'))
         return m.digest()
 
-    def _download_repoMD(self, method):
+    def _get_proxies(self, method):
         proxies = {}
-        repomd = ""
-        headers = {"user-agent": USER_AGENT}
 
         if hasattr(method, "proxy"):
             proxy_url = method.proxy
@@ -1470,23 +2035,92 @@ class RepoMDMetaHash(object):
                 log.info("Failed to parse proxy for test if repo available %s: %s",
                          proxy_url, e)
 
-        session = util.requests_session()
+        return proxies
 
-        # Test all urls for this repo. If any of these is working it is enough.
-        for url in self._urls:
-            try:
-                result = session.get("%s/repodata/repomd.xml" % url, headers=headers,
-                                     proxies=proxies, verify=self._ssl_verify,
-                                     timeout=constants.NETWORK_CONNECTION_TIMEOUT)
-                if result.ok:
-                    repomd = result.text
-                    break
-                else:
-                    log.debug("Server returned %i code when downloading repomd",
-                              result.status_code)
-                    continue
-            except RequestException as e:
-                log.debug("Can't download new repomd.xml from %s with proxy: %s. Error: %s",
-                          url, proxies, e)
+    def _download_repoMD(self, method, urls=None):
+        """Download repomd.xml from any of the repository urls.
+
+        All urls are tried at the same time. If any of these is working
+        it is enough.
+
+        :param method: an installation method
+        :param urls: a list of urls to try or None for all repository urls
+        :return: a tuple of a content of repomd.xml, the url that returned
+                 it and its validators; the content is an empty string if
+                 the file is not available
+        """
+        proxies = self._get_proxies(method)
+
+        if urls is None:
+            urls = self._urls
+
+        if len(urls) < 2:
+            for url in urls:
+                success, repomd, validators = self._fetch_repoMD(url, proxies)
+                if success:
+                    return repomd, url, validators
+            return "", None, {}
+
+        executor = ThreadPoolExecutor(max_workers=len(urls),
+                                      thread_name_prefix="AnaRepoVerifyThread")
+        futures = {executor.submit(self._fetch_repoMD, url, proxies): url
+                   for url in urls}
+
+        try:
+            for future in as_completed(futures):
+                success, repomd, validators = future.result()
+                if success:
+                    return repomd, futures[future], validators
+        finally:
+            # Don't wait for the slower urls.
+            executor.shutdown(wait=False)
+
+        return "", None, {}
+
+    def _fetch_repoMD(self, url, proxies, conditional=False):
+        """Fetch repomd.xml from the given url.
+
+        :return: a tuple of a success flag, the content of repomd.xml
+                 or None if the file is not modified, and the validators
+                 of the returned file
+        """
+        headers = {"user-agent": USER_AGENT}
+        validators = {}
+
+        # The validators are valid only for the url of the stored file.
+        if conditional and url == self._repomd_url:
+            validators = self._validators
 
-        return repomd
+        if "ETag" in validators:
+            headers["If-None-Match"] = validators["ETag"]
+
+        if "Last-Modified" in validators:
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        session = self._session or util.requests_session()
+        start = time.time()
+
+        try:
+            result = session.get("%s/repodata/repomd.xml" % url, headers=headers,
+                                 proxies=proxies, verify=self._ssl_verify,
+                                 timeout=constants.NETWORK_CONNECTION_TIMEOUT)
+        except RequestException as e:
+            log.debug("Can't download new repomd.xml from %s with proxy: %s. Error: %s",
+                      url, proxies, e)
+            return False, "", {}
+        finally:
+            self._latencies[url] = time.time() - start
+
+        if validators and result.status_code == 304:
+            return True, None, validators
+
+        if not result.ok:
+            log.debug("Server returned %i code when downloading repomd",
+                      result.status_code)
+            return False, "", {}
+
+        validators = {key: result.headers[key]
+                      for key in ("ETag", "Last-Modified")
+                      if key in result.headers}
+
+        return True, result.text, validators
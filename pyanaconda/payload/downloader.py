@@ -0,0 +1,504 @@
+# Downloader of installation images.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from requests.exceptions import RequestException
+
+from blivet.size import Size
+
+from pyanaconda.core.constants import NETWORK_CONNECTION_TIMEOUT
+from pyanaconda.core.i18n import _
+from pyanaconda.payload.utils import write_all
+
+from pyanaconda.anaconda_loggers import get_packaging_logger
+log = get_packaging_logger()
+
+__all__ = ["ImageDownloader", "ImageDownloadError", "DownloadProgress"]
+
+# The number of parallel connections.
+DOWNLOAD_CONNECTIONS = 4
+
+# The size of a segment downloaded by one request.
+DOWNLOAD_SEGMENT_SIZE = 64 * 1024 * 1024
+
+# The number of attempts to resume a failed request.
+DOWNLOAD_RETRIES = 5
+
+# The size of a chunk read from the response.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# The suffix of a file with the state of a partial download.
+DOWNLOAD_STATE_SUFFIX = ".download"
+
+_CONTENT_RANGE = re.compile(r"^bytes\s+\d+-\d+/(\d+)$")
+
+
+class ImageDownloadError(RequestException):
+    """The image can't be downloaded."""
+    pass
+
+
+class _IncompleteResponseError(RequestException):
+    """The response ended before all data were received."""
+    pass
+
+
+class ImageDownloader(object):
+    """Downloader of big files.
+
+    If the server supports HTTP range requests, the file is split into
+    segments downloaded over several connections. A failed request is
+    resumed from the last received byte. The finished segments are
+    recorded in a state file next to the downloaded file, so a partial
+    download can be resumed later.
+
+    Otherwise, the file is downloaded with a single request.
+
+    The response is never buffered in memory. The SHA256 checksum of
+    the file is computed during the download.
+    """
+
+    def __init__(self, session, url, path, proxies=None, verify=True,
+                 connections=DOWNLOAD_CONNECTIONS, segment_size=DOWNLOAD_SEGMENT_SIZE,
+                 retries=DOWNLOAD_RETRIES):
+        """Create a new downloader.
+
+        :param session: a Requests session
+        :param str url: a url of the file
+        :param str path: a path to the downloaded file
+        :param dict proxies: a dictionary of proxies or None
+        :param bool verify: should be the SSL certificates verified?
+        :param int connections: a number of parallel connections
+        :param int segment_size: a size of a segment in bytes
+        :param int retries: a number of attempts to resume a failed request
+        """
+        self._session = session
+        self._url = url
+        self._path = path
+        self._proxies = proxies or {}
+        self._verify = verify
+        self._connections = max(1, connections)
+        self._segment_size = max(1, segment_size)
+        self._retries = retries
+
+        self._probed = False
+        self._size = None
+        self._validator = None
+        self._accepts_ranges = False
+
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._bytes_done = 0
+        self._callback = None
+
+    @property
+    def size(self):
+        """The size of the file or None if it is not known."""
+        return self._size
+
+    @property
+    def state_path(self):
+        """A path to the state of the partial download."""
+        return self._path + DOWNLOAD_STATE_SUFFIX
+
+    def _get(self, headers=None):
+        """Send a GET request without reading the body."""
+        return self._session.get(self._url, proxies=self._proxies, verify=self._verify,
+                                 stream=True, timeout=NETWORK_CONNECTION_TIMEOUT,
+                                 headers=headers)
+
+    def probe(self):
+        """Find out the size of the file and the support of ranges.
+
+        :return: the size of the file or None
+        :raise: RequestException if the file is not available
+        """
+        response = self._get(headers={"Range": "bytes=0-0"})
+
+        try:
+            if response.status_code == 206:
+                match = _CONTENT_RANGE.match(response.headers.get("content-range", ""))
+
+                if match:
+                    self._size = int(match.group(1))
+                    self._accepts_ranges = True
+            elif response.status_code == 200:
+                if response.headers.get("content-length"):
+                    self._size = int(response.headers.get("content-length"))
+            else:
+                raise ImageDownloadError("http request returned %s" % response.status_code)
+
+            # Weak entity tags can't be used in the If-Range header.
+            etag = response.headers.get("etag")
+
+            if etag and not etag.startswith("W/"):
+                self._validator = etag
+            else:
+                self._validator = response.headers.get("last-modified")
+        finally:
+            response.close()
+
+        self._probed = True
+        log.debug("The image %s has %s bytes, ranges are %s.", self._url, self._size,
+                  "supported" if self._accepts_ranges else "not supported")
+        return self._size
+
+    def download(self, callback=None):
+        """Download the file.
+
+        :param callback: a function called with the number of downloaded bytes
+        :return: a SHA256 checksum of the file
+        :raise: RequestException or OSError if the file can't be downloaded
+        """
+        if not self._probed:
+            self.probe()
+
+        self._callback = callback
+        self._bytes_done = 0
+        self._abort.clear()
+
+        if self._accepts_ranges:
+            checksum = self._download_segments()
+        else:
+            checksum = self._download_stream()
+
+        if os.path.exists(self.state_path):
+            os.unlink(self.state_path)
+
+        return checksum
+
+    def _report_progress(self, size):
+        """Report the newly downloaded bytes."""
+        with self._lock:
+            self._bytes_done += size
+
+            if self._callback:
+                self._callback(self._bytes_done)
+
+    def _get_segments(self):
+        """Split the file into segments."""
+        return [(start, min(start + self._segment_size, self._size))
+                for start in range(0, self._size, self._segment_size)]
+
+    def _load_state(self):
+        """Load indexes of finished segments of a partial download."""
+        try:
+            with open(self.state_path, "rt") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+
+        if state.get("url") != self._url \
+                or state.get("size") != self._size \
+                or state.get("segment_size") != self._segment_size \
+                or not self._validator \
+                or state.get("validator") != self._validator \
+                or not os.path.exists(self._path):
+            return set()
+
+        return set(state.get("finished", []))
+
+    def _save_state(self, finished):
+        """Save indexes of finished segments of a partial download."""
+        state = {
+            "url": self._url,
+            "size": self._size,
+            "segment_size": self._segment_size,
+            "validator": self._validator,
+            "finished": sorted(finished)
+        }
+
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "wt") as f:
+            json.dump(state, f)
+
+        os.rename(tmp_path, self.state_path)
+
+    def _download_segments(self):
+        """Download segments of the file over parallel connections.
+
+        The checksum is computed from the beginning of the file as soon
+        as the segments are finished.
+        """
+        segments = self._get_segments()
+        finished = self._load_state()
+
+        if finished:
+            log.info("Resuming the download of %s, %d of %d segments are finished.",
+                     self._url, len(finished), len(segments))
+
+        flags = os.O_RDWR | os.O_CREAT | (0 if finished else os.O_TRUNC)
+        fd = os.open(self._path, flags, 0o644)
+        checksum = _SegmentsChecksum(fd, segments)
+
+        try:
+            os.ftruncate(fd, self._size)
+
+            for index in finished:
+                start, end = segments[index]
+                self._report_progress(end - start)
+
+            pending = [i for i in range(len(segments)) if i not in finished]
+            self._save_state(finished)
+            checksum.update(finished)
+
+            with ThreadPoolExecutor(max_workers=self._connections,
+                                    thread_name_prefix="AnaImageDownloadThread") as executor:
+                futures = {executor.submit(self._download_segment, fd, *segments[i]): i
+                           for i in pending}
+
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                        finished.add(futures[future])
+                        self._save_state(finished)
+                        checksum.update(finished)
+                except BaseException:
+                    self._abort.set()
+
+                    for future in futures:
+                        future.cancel()
+
+                    raise
+
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        return checksum.hexdigest()
+
+    def _download_segment(self, fd, start, end):
+        """Download a segment of the file.
+
+        The request is resumed from the last received byte on failure.
+        """
+        segment = _Segment(start, end)
+        attempt = 0
+
+        while segment.offset < end:
+            headers = {"Range": "bytes=%d-%d" % (segment.offset, end - 1)}
+
+            if self._validator:
+                headers["If-Range"] = self._validator
+
+            try:
+                self._receive_segment(fd, headers, segment)
+            except ImageDownloadError:
+                raise
+            except RequestException as e:
+                attempt = self._retry(e, attempt, segment.offset)
+
+    def _receive_segment(self, fd, headers, segment):
+        """Receive the rest of the segment.
+
+        The offset of the segment is moved after the received data.
+        """
+        if self._abort.is_set():
+            raise ImageDownloadError("The download of %s was aborted." % self._url)
+
+        response = self._get(headers=headers)
+
+        try:
+            if response.status_code != 206:
+                raise ImageDownloadError("The image %s has changed or doesn't support ranges: "
+                                         "http request returned %s"
+                                         % (self._url, response.status_code))
+
+            for buf in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                if self._abort.is_set():
+                    raise ImageDownloadError("The download of %s was aborted." % self._url)
+
+                buf = buf[:segment.end - segment.offset]
+                write_all(fd, buf, segment.offset)
+                segment.offset += len(buf)
+                self._report_progress(len(buf))
+
+                if segment.offset >= segment.end:
+                    break
+        finally:
+            response.close()
+
+        if segment.offset < segment.end:
+            raise _IncompleteResponseError("The response ended at %d of %d."
+                                           % (segment.offset, segment.end))
+
+    def _retry(self, error, attempt, offset):
+        """Wait before the next attempt or raise the error."""
+        if attempt >= self._retries:
+            raise error
+
+        attempt += 1
+        log.warning("The download of %s failed at %d: %s. Resuming (attempt %d of %d).",
+                    self._url, offset, error, attempt, self._retries)
+        time.sleep(attempt)
+        return attempt
+
+    def _download_stream(self):
+        """Download the file with a single request.
+
+        The download is restarted from the beginning on failure.
+        """
+        attempt = 0
+
+        while True:
+            try:
+                return self._receive_stream()
+            except ImageDownloadError:
+                raise
+            except RequestException as e:
+                attempt = self._retry(e, attempt, self._bytes_done)
+                self._bytes_done = 0
+
+    def _receive_stream(self):
+        """Receive the whole file.
+
+        :return: a SHA256 checksum of the file
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        response = self._get()
+
+        try:
+            if response.status_code != 200:
+                raise ImageDownloadError("http request returned %s" % response.status_code)
+
+            with open(self._path, "wb") as f:
+                for buf in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    if buf:
+                        sha256.update(buf)
+                        f.write(buf)
+                        size += len(buf)
+                        self._report_progress(len(buf))
+        finally:
+            response.close()
+
+        if self._size is not None and size != self._size:
+            raise _IncompleteResponseError("The response ended at %d of %d." % (size, self._size))
+
+        return sha256.hexdigest()
+
+
+class _Segment(object):
+    """A segment of the downloaded file."""
+
+    def __init__(self, start, end):
+        self.offset = start
+        self.end = end
+
+
+class _SegmentsChecksum(object):
+    """SHA256 checksum of the finished beginning of a file."""
+
+    def __init__(self, fd, segments):
+        self._fd = fd
+        self._segments = segments
+        self._sha256 = hashlib.sha256()
+        self._next = 0
+
+    def update(self, finished):
+        """Hash the finished segments that follow the hashed ones."""
+        while self._next in finished:
+            start, end = self._segments[self._next]
+
+            while start < end:
+                data = os.pread(self._fd, min(DOWNLOAD_CHUNK_SIZE, end - start), start)
+
+                if not data:
+                    raise ImageDownloadError("Unexpected end of the file at %d." % start)
+
+                self._sha256.update(data)
+                start += len(data)
+
+            self._next += 1
+
+    def hexdigest(self):
+        """Return the checksum of the file."""
+        if self._next != len(self._segments):
+            raise ImageDownloadError("The file is not downloaded.")
+
+        return self._sha256.hexdigest()
+
+
+class DownloadProgress(object):
+    """Report the progress of a download.
+
+    The messages are passed to the report callback. If the size of
+    the download is not known, the progress is reported every second.
+    """
+
+    def __init__(self, url, size, report_callback):
+        """Create a new progress.
+
+        :param str url: an URL of the download
+        :param size: a size of the download or None if it is not known
+        :param report_callback: a function called with a progress message
+        """
+        self.url = url
+        self.size = size
+        self._report = report_callback
+        self._pct = -1
+        self._start_time = time.monotonic()
+        self._report_time = 0
+
+    def _get_throughput(self, bytes_read, now):
+        """Get the average throughput of the download."""
+        elapsed = now - self._start_time
+        return Size(int(bytes_read / elapsed)) if elapsed > 0 else Size(0)
+
+    def update(self, bytes_read):
+        """Report the downloaded data.
+
+        :param int bytes_read: a number of bytes read so far
+        """
+        if not bytes_read:
+            return
+
+        now = time.monotonic()
+
+        # The size is not known, report the progress every second.
+        if not self.size:
+            if now - self._report_time < 1:
+                return
+
+            self._report_time = now
+            self._report(_("Downloading %(url)s (%(size)s, %(speed)s/s)") %
+                         {"url": self.url, "size": Size(bytes_read),
+                          "speed": self._get_throughput(bytes_read, now)})
+            return
+
+        pct = min(100, int(100 * bytes_read / self.size))
+
+        if pct == self._pct:
+            return
+
+        self._pct = pct
+        self._report(_("Downloading %(url)s (%(pct)d%%, %(speed)s/s)") %
+                     {"url": self.url, "pct": pct,
+                      "speed": self._get_throughput(bytes_read, now)})
+
+    def end(self):
+        """Report the end of the download."""
+        self._report(_("Downloading %(url)s (%(pct)d%%)") %
+                     {"url": self.url, "pct": 100})
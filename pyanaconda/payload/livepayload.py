@@ -32,6 +32,9 @@ import requests
 import hashlib
 import glob
 import functools
+import shutil
+import subprocess
+import tempfile
 from time import sleep
 from threading import Lock
 
@@ -42,6 +45,10 @@ from pyanaconda.core.i18n import _
 from pyanaconda.payload import Payload
 from pyanaconda.payload import payload_utils
 from pyanaconda.payload.errors import PayloadSetupError, PayloadInstallError
+from pyanaconda.payload.downloader import ImageDownloader, DownloadProgress
+from pyanaconda.payload.tree_copier import TreeCopier, LIVE_TREE_EXCLUDES, move_tree
+from pyanaconda.payload.block_image import BLOCK_DEPLOYMENT_FS_TYPES, get_image_size, \
+    get_image_fs_type, write_image, set_fs_identity, grow_fs
 from pyanaconda.threading import threadMgr, AnacondaThread
 from pyanaconda.errors import errorHandler, ERROR_RAISE
 from pyanaconda.progress import progressQ
@@ -54,6 +61,28 @@ from blivet.size import Size
 from pyanaconda.anaconda_loggers import get_packaging_logger
 log = get_packaging_logger()
 
+# The number of workers copying files of the install tree.
+LIVE_COPY_WORKERS = 8
+
+# Files of a deployed image that are not installed.
+DEPLOYED_IMAGE_REMOVALS = ["/tmp/*", "/boot/*rescue*", "/boot/loader", "/boot/efi/loader",
+                           "/etc/machine-id"]
+
+# The tar arguments for the extraction of a live image.
+# preserve: ACL's, xattrs, and SELinux context
+LIVE_TAR_ARGS = ["--numeric-owner", "--selinux", "--acls", "--xattrs", "--xattrs-include", "*",
+                 "--exclude", "dev/*", "--exclude", "proc/*", "--exclude", "tmp/*",
+                 "--exclude", "sys/*", "--exclude", "run/*", "--exclude", "boot/*rescue*",
+                 "--exclude", "boot/loader", "--exclude", "boot/efi/loader",
+                 "--exclude", "etc/machine-id"]
+
+# The tar options for the compression of a streamed archive.
+TAR_COMPRESSION_OPTIONS = [
+    ((".tgz", ".tar.gz"), "-z"),
+    ((".tbz", ".tar.bz2"), "-j"),
+    ((".txz", ".tar.xz"), "-J"),
+]
+
 
 class LiveImagePayload(Payload):
     """ A LivePayload copies the source image onto the target system. """
@@ -66,6 +95,9 @@ class LiveImagePayload(Payload):
         self.pct_lock = None
         self.source_size = 1
 
+        # The file system image mounted on the install tree.
+        self._fs_image = None
+
         self._kernel_version_list = []
 
     def setup(self):
@@ -85,6 +117,8 @@ class LiveImagePayload(Payload):
         if rc != 0:
             raise PayloadInstallError("Failed to mount the install tree")
 
+        self._fs_image = osimg.path
+
         # Grab the kernel version list now so it's available after umount
         self._update_kernel_version_list()
 
@@ -125,6 +159,19 @@ class LiveImagePayload(Payload):
                                        (min(100, self.pct),))
             sleep(0.777)
 
+    def _report_progress(self, pct):
+        """Update the hub's progress bar with the percentage of the installation.
+
+        :param int pct: a percentage of the installed data
+        """
+        with self.pct_lock:
+            if pct == self.pct:
+                return
+
+            self.pct = pct
+
+        progressQ.send_message(_("Installing software") + (" %d%%") % (pct,))
+
     def install(self):
         """ Install the payload. """
 
@@ -133,42 +180,178 @@ class LiveImagePayload(Payload):
 
         self.pct_lock = Lock()
         self.pct = 0
-        threadMgr.add(AnacondaThread(name=THREAD_LIVE_PROGRESS,
-                                     target=self.progress))
 
-        cmd = "rsync"
-        # preserve: permissions, owners, groups, ACL's, xattrs, times,
-        #           symlinks, hardlinks
-        # go recursively, include devices and special files, don't cross
-        # file system boundaries
-        args = ["-pogAXtlHrDx", "--exclude", "/dev/", "--exclude", "/proc/", "--exclude", "/tmp/*",
-                "--exclude", "/sys/", "--exclude", "/run/", "--exclude", "/boot/*rescue*",
-                "--exclude", "/boot/loader/", "--exclude", "/boot/efi/loader/",
-                "--exclude", "/etc/machine-id", INSTALL_TREE + "/", conf.target.system_root]
         try:
-            rc = util.execWithRedirect(cmd, args)
-        except (OSError, RuntimeError) as e:
-            msg = None
-            err = str(e)
-            log.error(err)
-        else:
-            err = None
-            msg = "%s exited with code %d" % (cmd, rc)
-            log.info(msg)
-
-        if err or rc == 11:
-            exn = PayloadInstallError(err or msg)
+            if self._can_deploy_image():
+                self._deploy_image()
+            else:
+                self._copy_install_tree()
+        except (OSError, PayloadInstallError) as e:
+            log.error("Failed to install the payload: %s", e)
+            exn = PayloadInstallError(str(e))
             if errorHandler.cb(exn) == ERROR_RAISE:
                 raise exn
 
-        # Wait for progress thread to finish
-        with self.pct_lock:
-            self.pct = 100
-        threadMgr.wait(THREAD_LIVE_PROGRESS)
-
         # Live needs to create the rescue image before bootloader is written
         self._create_rescue_image()
 
+    def _copy_install_tree(self):
+        """Copy the install tree to the target system."""
+        copier = TreeCopier(INSTALL_TREE, conf.target.system_root,
+                            excludes=LIVE_TREE_EXCLUDES,
+                            workers=LIVE_COPY_WORKERS,
+                            callback=lambda progress: self._report_progress(progress.percentage))
+        copier.run()
+
+        progress = copier.progress
+        log.info("Copied %d files (%s) of the install tree.",
+                 progress.files_done, Size(progress.bytes_done))
+
+    def _is_on_target(self, path):
+        """Is the image stored on the target system?
+
+        A block device is on the target if it is a device of a target
+        file system or one of its ancestors. A file is on the target if
+        it is stored on a target file system.
+        """
+        path_stat = os.stat(path)
+        devices = set()
+
+        # Collect the device numbers of the target devices.
+        for device in self.storage.mountpoints.values():
+            for ancestor in device.ancestors:
+                try:
+                    devices.add(os.stat(ancestor.path).st_rdev)
+                except OSError:
+                    continue
+
+        if stat.S_ISBLK(path_stat.st_mode):
+            return path_stat.st_rdev in devices
+
+        # Some file systems don't report the number of their device.
+        for mount_point in self.storage.mountpoints:
+            try:
+                devices.add(os.stat(conf.target.system_root + mount_point).st_dev)
+            except OSError:
+                continue
+
+        return path_stat.st_dev in devices
+
+    def _can_deploy_image(self):
+        """Can the file system image be written directly to the root device?"""
+        if not conf.payload.block_level_deployment:
+            return False
+
+        root_device = self.storage.root_device
+
+        if not self._fs_image or not root_device:
+            log.info("Block-level deployment is not possible, using the file copy.")
+            return False
+
+        fs_type = get_image_fs_type(self._fs_image)
+
+        if fs_type not in BLOCK_DEPLOYMENT_FS_TYPES or fs_type != root_device.format.type:
+            log.info("Can't deploy the %s image on the %s root device, using the file copy.",
+                     fs_type, root_device.format.type)
+            return False
+
+        # The options of the configured file system would be lost.
+        if root_device.format.create_options:
+            log.info("The root file system is created with custom options '%s', "
+                     "using the file copy.", root_device.format.create_options)
+            return False
+
+        if get_image_size(self._fs_image) > root_device.size:
+            log.info("The image %s doesn't fit on the root device, using the file copy.",
+                     self._fs_image)
+            return False
+
+        if self._is_on_target(self._fs_image):
+            log.info("The image %s is stored on the target, using the file copy.",
+                     self._fs_image)
+            return False
+
+        return True
+
+    def _deploy_image(self):
+        """Write the file system image directly to the root device.
+
+        The image is written to the unmounted root device and the file
+        system is grown to the size of the device. The content of other
+        mount points is copied from the install tree.
+
+        The file system of the image replaces the configured one. Only
+        its UUID and label are restored, the features and the block size
+        of the image are kept.
+        """
+        root_device = self.storage.root_device
+        fs_type = root_device.format.type
+
+        log.info("Deploying the image %s on %s.", self._fs_image, root_device.path)
+        log.info("The %s file system of the image is used with its features and block size "
+                 "instead of the configured ones.", fs_type)
+        self.storage.umount_filesystems(swapoff=False)
+
+        try:
+            write_image(self._fs_image, root_device.path, callback=self._report_write_progress)
+
+            # The configuration of the target refers to the created file system.
+            set_fs_identity(root_device.path, fs_type,
+                            uuid=root_device.format.uuid,
+                            label=root_device.format.label)
+
+            if fs_type != "xfs":
+                grow_fs(root_device.path, fs_type, conf.target.physical_root)
+        finally:
+            self.storage.mount_filesystems()
+
+        if fs_type == "xfs":
+            grow_fs(root_device.path, fs_type, conf.target.physical_root)
+
+        self._copy_mount_points()
+        self._remove_deployed_files()
+
+    def _report_write_progress(self, bytes_done, bytes_total):
+        """Report the progress of the image write."""
+        if bytes_total:
+            self._report_progress(min(100, int(100 * bytes_done / bytes_total)))
+
+    def _copy_mount_points(self):
+        """Copy the install tree to mount points other than the root.
+
+        The file systems mounted on top of the deployed root would hide
+        the files of the image, so their content is copied.
+        """
+        mount_points = sorted(mp for mp in self.storage.mountpoints if mp != "/")
+
+        for mount_point in mount_points:
+            # The nested mount points are copied with their parents.
+            if any(mount_point.startswith(mp + "/") for mp in mount_points):
+                continue
+
+            source = INSTALL_TREE + mount_point
+
+            if not os.path.isdir(source):
+                continue
+
+            excludes = [pattern[len(mount_point):] for pattern in LIVE_TREE_EXCLUDES
+                        if pattern.startswith(mount_point + "/")]
+
+            log.debug("Copying the content of %s.", mount_point)
+            TreeCopier(source, conf.target.system_root + mount_point,
+                       excludes=excludes, workers=LIVE_COPY_WORKERS).run()
+
+    def _remove_deployed_files(self):
+        """Remove files of the deployed image that shouldn't be installed."""
+        for pattern in DEPLOYED_IMAGE_REMOVALS:
+            for path in glob.glob(conf.target.system_root + pattern):
+                log.debug("Removing %s.", path)
+
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.unlink(path)
+
     def _create_rescue_image(self):
         """Create the rescue initrd images for each installed kernel. """
         # Always make sure the new system has a new machine-id, it won't boot without it
@@ -227,9 +410,9 @@ class LiveImagePayload(Payload):
         from pyanaconda.modules.payloads.base.utils import get_dir_size
         return Size(get_dir_size("/") * 1024)
 
-    def _update_kernel_version_list(self):
-        files = glob.glob(INSTALL_TREE + "/boot/vmlinuz-*")
-        files.extend(glob.glob(INSTALL_TREE + "/boot/efi/EFI/%s/vmlinuz-*" %
+    def _update_kernel_version_list(self, root=INSTALL_TREE):
+        files = glob.glob(root + "/boot/vmlinuz-*")
+        files.extend(glob.glob(root + "/boot/efi/EFI/%s/vmlinuz-*" %
                                conf.bootloader.efi_dir))
 
         self._kernel_version_list = sorted((f.split("/")[-1][8:] for f in files
@@ -241,53 +424,13 @@ class LiveImagePayload(Payload):
         return self._kernel_version_list
 
 
-class DownloadProgress(object):
-    """ Provide methods for download progress reporting."""
-
-    def start(self, url, size):
-        """ Start of download
-
-            :param url:      url of the download
-            :type url:       str
-            :param size:     length of the file
-            :type size:      int
-        """
-        self.url = url
-        self.size = size
-        self._pct = -1
-
-    def update(self, bytes_read):
-        """ Download update
-
-            :param bytes_read: Bytes read so far
-            :type bytes_read:  int
-        """
-        if not bytes_read:
-            return
-        pct = min(100, int(100 * bytes_read / self.size))
-
-        if pct == self._pct:
-            return
-        self._pct = pct
-        progressQ.send_message(_("Downloading %(url)s (%(pct)d%%)") %
-                               {"url": self.url, "pct": pct})
-
-    def end(self, bytes_read):
-        """ Download complete
-
-            :param bytes_read: Bytes read so far
-            :type bytes_read:  int
-        """
-        progressQ.send_message(_("Downloading %(url)s (%(pct)d%%)") %
-                               {"url": self.url, "pct": 100})
-
-
 class LiveImageKSPayload(LiveImagePayload):
     """ Install using a live filesystem image from the network """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._min_size = 0
         self._proxies = {}
+        self._image_checksum = None
         self.image_path = conf.target.system_root + "/disk.img"
 
     @property
@@ -295,6 +438,11 @@ class LiveImageKSPayload(LiveImagePayload):
         """ Return True if the url ends with a tar suffix """
         return any(self.data.method.url.endswith(suffix) for suffix in TAR_SUFFIX)
 
+    @property
+    def _is_streamed_tarfile(self):
+        """Is the tarball extracted from the download stream?"""
+        return self.is_tarfile and not self.data.method.url.startswith("file://")
+
     def _setup_url_image(self):
         """ Check to make sure the url is available and estimate the space
             needed to download and install it.
@@ -312,13 +460,16 @@ class LiveImageKSPayload(LiveImagePayload):
         error = None
         try:
             response = self._session.get(self.data.method.url, proxies=self._proxies, verify=True,
-                                         timeout=NETWORK_CONNECTION_TIMEOUT)
+                                         stream=True, timeout=NETWORK_CONNECTION_TIMEOUT)
+            response.close()
 
             # At this point we know we can get the image and what its size is
             # Make a guess as to minimum size needed:
             # Enough space for image and image * 3
+            # The streamed tarball is not stored on the target.
             if response.headers.get('content-length'):
-                self._min_size = int(response.headers.get('content-length')) * 4
+                multiplier = 3 if self._is_streamed_tarfile else 4
+                self._min_size = int(response.headers.get('content-length')) * multiplier
         except IOError as e:
             log.error("Error opening liveimg: %s", e)
             error = e
@@ -362,48 +513,96 @@ class LiveImageKSPayload(LiveImagePayload):
         # FIXME: this should be solved on a inheritance level not like this
         Payload.unsetup(self)
 
+    def _download_image(self, f):
+        """ Download the image using Requests with progress reporting
+
+            The image is hashed while it is downloaded.
+
+            :param f: a file object to write the image to
+            :return: an error or None
+        """
+        sha256 = hashlib.sha256()
+        try:
+            ssl_verify = not self.data.method.noverifyssl
+            response = self._session.get(self.data.method.url, proxies=self._proxies,
+                                         verify=ssl_verify, stream=True,
+                                         timeout=NETWORK_CONNECTION_TIMEOUT)
+            total_length = response.headers.get('content-length')
+            if total_length is None:  # no content length header
+                log.warning("content-length header is missing for the installation image, "
+                            "download progress reporting will not be available")
+
+            # requests return headers as strings, so convert total_length to int
+            progress = DownloadProgress(self.data.method.url, int(total_length or 0),
+                                        progressQ.send_message)
+            bytes_read = 0
+            for buf in response.iter_content(1024 * 1024):  # 1 MB chunks
+                if buf:
+                    sha256.update(buf)
+                    f.write(buf)
+                    bytes_read += len(buf)
+                    progress.update(bytes_read)
+            progress.end()
+        except requests.exceptions.RequestException as e:
+            log.error("Error downloading liveimg: %s", e)
+            return e
+
+        self._image_checksum = sha256.hexdigest()
+        return None
+
     def _pre_install_url_image(self):
-        """ Download the image using Requests with progress reporting"""
+        """ Download the image to the target
 
-        error = None
-        progress = DownloadProgress()
+            The image is downloaded over parallel connections if the server
+            supports ranges. A partial download is resumed.
+        """
+        downloader = ImageDownloader(self._session, self.data.method.url, self.image_path,
+                                     proxies=self._proxies,
+                                     verify=not self.data.method.noverifyssl)
         try:
             log.info("Starting image download")
-            with open(self.image_path, "wb") as f:
-                ssl_verify = not self.data.method.noverifyssl
-                response = self._session.get(self.data.method.url, proxies=self._proxies,
-                                             verify=ssl_verify, stream=True,
-                                             timeout=NETWORK_CONNECTION_TIMEOUT)
-                total_length = response.headers.get('content-length')
-                if total_length is None:  # no content length header
-                    # just download the file in one go and fake the progress reporting once done
-                    log.warning("content-length header is missing for the installation image, "
-                                "download progress reporting will not be available")
-                    f.write(response.content)
-                    size = f.tell()
-                    progress.start(self.data.method.url, size)
-                    progress.end(size)
-                else:
-                    # requests return headers as strings, so convert total_length to int
-                    progress.start(self.data.method.url, int(total_length))
-                    bytes_read = 0
-                    for buf in response.iter_content(1024 * 1024):  # 1 MB chunks
-                        if buf:
-                            f.write(buf)
-                            f.flush()
-                            bytes_read += len(buf)
-                            progress.update(bytes_read)
-                    progress.end(bytes_read)
-                log.info("Image download finished")
+            size = downloader.probe()
+            progress = DownloadProgress(self.data.method.url, size, progressQ.send_message)
+            self._image_checksum = downloader.download(callback=progress.update)
+            progress.end()
+            log.info("Image download finished")
         except requests.exceptions.RequestException as e:
             log.error("Error downloading liveimg: %s", e)
-            error = e
-        else:
-            if not os.path.exists(self.image_path):
-                error = "Failed to download %s, file doesn't exist" % self.data.method.url
-                log.error(error)
+            return e
 
-        return error
+        if not os.path.exists(self.image_path):
+            error = "Failed to download %s, file doesn't exist" % self.data.method.url
+            log.error(error)
+            return error
+
+        return None
+
+    def _verify_checksum(self):
+        """ Verify the checksum of the image
+
+            The checksum is computed while the image is downloaded,
+            otherwise the image file is read.
+        """
+        filesum = self._image_checksum
+
+        if not filesum:
+            progressQ.send_message(_("Checking image checksum"))
+            sha256 = hashlib.sha256()
+            with open(self.image_path, "rb") as f:
+                while True:
+                    data = f.read(1024 * 1024)
+                    if not data:
+                        break
+                    sha256.update(data)
+            filesum = sha256.hexdigest()
+
+        log.debug("sha256 of %s is %s", self.data.method.url, filesum)
+
+        if util.lowerASCII(self.data.method.checksum) != filesum:
+            log.error("%s does not match checksum.", self.data.method.checksum)
+            exn = PayloadInstallError("Checksum of image does not match")
+            if errorHandler.cb(exn) == ERROR_RAISE:
+                raise exn
 
     def pre_install(self):
         """ Get image and loopback mount it.
@@ -414,10 +613,17 @@ class LiveImageKSPayload(LiveImagePayload):
             callback).
 
             If it is a file:// source then use the file directly.
+
+            If it is a network tarball, it is extracted from the download
+            stream during the installation.
         """
         error = None
+        self._image_checksum = None
+
         if self.data.method.url.startswith("file://"):
             self.image_path = self.data.method.url[7:]
+        elif self._is_streamed_tarfile:
+            return
         else:
             error = self._pre_install_url_image()
 
@@ -430,22 +636,7 @@ class LiveImageKSPayload(LiveImagePayload):
         self._adj_size = os.stat(self.image_path)[stat.ST_SIZE]
 
         if self.data.method.checksum:
-            progressQ.send_message(_("Checking image checksum"))
-            sha256 = hashlib.sha256()
-            with open(self.image_path, "rb") as f:
-                while True:
-                    data = f.read(1024 * 1024)
-                    if not data:
-                        break
-                    sha256.update(data)
-            filesum = sha256.hexdigest()
-            log.debug("sha256 of %s is %s", self.data.method.url, filesum)
-
-            if util.lowerASCII(self.data.method.checksum) != filesum:
-                log.error("%s does not match checksum.", self.data.method.checksum)
-                exn = PayloadInstallError("Checksum of image does not match")
-                if errorHandler.cb(exn) == ERROR_RAISE:
-                    raise exn
+            self._verify_checksum()
 
         # If this looks like a tarfile, skip trying to mount it
         if self.is_tarfile:
@@ -474,6 +665,7 @@ class LiveImageKSPayload(LiveImagePayload):
 
         # Nothing more to mount
         if not os.path.exists(INSTALL_TREE + "/LiveOS"):
+            self._fs_image = self.image_path
             self._update_kernel_version_list()
             return
 
@@ -498,20 +690,43 @@ class LiveImageKSPayload(LiveImagePayload):
                 if errorHandler.cb(exn) == ERROR_RAISE:
                     raise exn
 
+            self._fs_image = img_file
             self._update_kernel_version_list()
 
             source = os.statvfs(INSTALL_TREE)
             self.source_size = source.f_frsize * (source.f_blocks - source.f_bfree)
 
+    def _can_deploy_image(self):
+        """Can the file system image be written directly to the root device?
+
+        The downloaded image can't be stored on the overwritten device.
+        """
+        if not super()._can_deploy_image():
+            return False
+
+        if self._is_on_target(self.image_path):
+            log.info("The image %s is stored on the target, using the file copy.",
+                     self.image_path)
+            return False
+
+        return True
+
     def install(self):
         """ Install the payload if it is a tar.
-            Otherwise fall back to rsync of INSTALL_TREE
+            Otherwise fall back to the copy of INSTALL_TREE
         """
         # If it doesn't look like a tarfile use the super's install()
         if not self.is_tarfile:
             super().install()
             return
 
+        if self._is_streamed_tarfile:
+            self._install_streamed_tarfile()
+
+            # Live needs to create the rescue image before bootloader is written
+            self._create_rescue_image()
+            return
+
         # Use 2x the archive's size to estimate the size of the install
         # This is used to drive the progress display
         self.source_size = os.stat(self.image_path)[stat.ST_SIZE] * 2
@@ -522,12 +737,7 @@ class LiveImageKSPayload(LiveImagePayload):
                                      target=self.progress))
 
         cmd = "tar"
-        # preserve: ACL's, xattrs, and SELinux context
-        args = ["--numeric-owner", "--selinux", "--acls", "--xattrs", "--xattrs-include", "*",
-                "--exclude", "dev/*", "--exclude", "proc/*", "--exclude", "tmp/*",
-                "--exclude", "sys/*", "--exclude", "run/*", "--exclude", "boot/*rescue*",
-                "--exclude", "boot/loader", "--exclude", "boot/efi/loader",
-                "--exclude", "etc/machine-id", "-xaf", self.image_path, "-C", conf.target.system_root]
+        args = LIVE_TAR_ARGS + ["-xaf", self.image_path, "-C", conf.target.system_root]
         try:
             rc = util.execWithRedirect(cmd, args)
         except (OSError, RuntimeError) as e:
@@ -552,6 +762,83 @@ class LiveImageKSPayload(LiveImagePayload):
         # Live needs to create the rescue image before bootloader is written
         self._create_rescue_image()
 
+    def _get_tar_compression_option(self):
+        """ Get the tar option for the compression of the streamed archive
+
+            Tar can't detect the compression of a stream.
+        """
+        for suffixes, option in TAR_COMPRESSION_OPTIONS:
+            if self.data.method.url.endswith(suffixes):
+                return [option]
+
+        return []
+
+    def _install_streamed_tarfile(self):
+        """ Download the tarball and extract it from the download stream
+
+            The tarball is never stored. If the checksum is set, the tarball
+            is extracted to a staging directory on the target, and moved in
+            place after the checksum of the stream is verified.
+        """
+        sysroot = conf.target.system_root
+        staging_dir = None
+        destination = sysroot
+
+        if self.data.method.checksum:
+            staging_dir = tempfile.mkdtemp(prefix=".liveimg-", dir=sysroot)
+            destination = staging_dir
+
+        cmd = "tar"
+        args = LIVE_TAR_ARGS + ["-x"] + self._get_tar_compression_option() \
+            + ["-f", "-", "-C", destination]
+
+        log.info("Running... %s", " ".join([cmd] + args))
+        with tempfile.TemporaryFile() as output:
+            proc = util.startProgram([cmd] + args, stdin=subprocess.PIPE, stdout=output)
+            error = None
+            tar_failed = False
+
+            try:
+                error = self._download_image(proc.stdin)
+            except BrokenPipeError:
+                tar_failed = True
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    tar_failed = True
+
+            rc = proc.wait()
+
+            output.seek(0)
+            for line in output.read().decode("utf-8", "replace").splitlines():
+                log.info("%s", line)
+
+        msg = "%s exited with code %d" % (cmd, rc)
+        log.info(msg)
+
+        if tar_failed:
+            error = msg
+
+        try:
+            if error:
+                exn = PayloadInstallError(str(error))
+                if errorHandler.cb(exn) == ERROR_RAISE:
+                    raise exn
+
+            if self.data.method.checksum:
+                self._verify_checksum()
+        except PayloadInstallError:
+            if staging_dir:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if staging_dir:
+            move_tree(staging_dir, sysroot)
+            os.rmdir(staging_dir)
+
+        self._update_kernel_version_list(sysroot)
+
     def post_install(self):
         """ Unmount and remove image
 
@@ -584,7 +871,7 @@ class LiveImageKSPayload(LiveImagePayload):
         if not self.is_tarfile:
             return super().kernel_version_list
 
-        if self._kernel_version_list:
+        if self._kernel_version_list or self._is_streamed_tarfile:
             return self._kernel_version_list
 
         # Cache a list of the kernels (the tar payload may be cleaned up on subsequent calls)
@@ -0,0 +1,250 @@
+# Content-addressed cache of repository metadata.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import glob
+import os
+import shutil
+import threading
+
+from blivet.size import Size
+
+from pyanaconda.payload.utils import link_or_copy
+
+from pyanaconda.anaconda_loggers import get_packaging_logger
+log = get_packaging_logger()
+
+__all__ = ["RepoMetadataCache"]
+
+# Names of the items stored in a cache entry.
+METADATA_DIR = "metadata"
+SOLV_DIR = "solv"
+
+
+def _get_tree_size(path, inodes):
+    """Return the size of the given directory tree in bytes.
+
+    Hardlinked files are counted only once.
+
+    :param str path: a path to the directory tree
+    :param set inodes: a set of already counted inodes
+    :return: a size in bytes
+    """
+    size = 0
+
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+
+            inode = (stat.st_dev, stat.st_ino)
+
+            if inode in inodes:
+                continue
+
+            inodes.add(inode)
+            size += stat.st_size
+
+    return size
+
+
+class RepoMetadataCache(object):
+    """Cache of repository metadata keyed by the hash of repomd.xml.
+
+    Every entry of the cache holds the downloaded metadata of a repository
+    and the solv files generated from them. The entries don't depend on
+    the repository id or urls, so the metadata can be reused by any
+    repository with the same content of the repomd.xml file.
+
+    The files are hardlinked between the cache and the DNF cache if
+    possible, so they shouldn't be modified in place. DNF replaces the
+    metadata and the solv files with new files.
+
+    The least recently used entries are removed when the total size of
+    the cache exceeds the limit. The size of the hardlinked files is
+    counted only once.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """Create a new cache.
+
+        :param str cache_dir: a path to the cache directory
+        :param Size max_size: a maximal size of the cache
+        """
+        self._cache_dir = cache_dir
+        self._max_size = Size(max_size)
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self):
+        """A path to the cache directory."""
+        return self._cache_dir
+
+    @property
+    def max_size(self):
+        """A maximal size of the cache."""
+        return self._max_size
+
+    @property
+    def size(self):
+        """The current size of the cache."""
+        with self._lock:
+            return Size(sum(size for _path, size in self._get_entries()))
+
+    def _get_entry_path(self, key):
+        return os.path.join(self._cache_dir, key)
+
+    def _get_entries(self):
+        """Return a list of (path, size) of entries from the oldest one."""
+        if not os.path.isdir(self._cache_dir):
+            return []
+
+        entries = []
+        inodes = set()
+
+        for name in os.listdir(self._cache_dir):
+            path = self._get_entry_path(name)
+
+            if name.endswith(".tmp") or not os.path.isdir(path):
+                continue
+
+            entries.append((os.stat(path).st_mtime, path))
+
+        # Count the shared files in the most recently used entries.
+        sizes = [(path, _get_tree_size(path, inodes)) for _mtime, path in
+                 sorted(entries, reverse=True)]
+
+        return list(reversed(sizes))
+
+    def contains(self, key):
+        """Is there an entry for the given key?
+
+        :param str key: a hash of the repomd.xml file
+        :return: True or False
+        """
+        return bool(key) and os.path.isdir(self._get_entry_path(key))
+
+    def store(self, key, repo_id, metadata_dir, solv_dir):
+        """Store the metadata of a repository.
+
+        :param str key: a hash of the repomd.xml file
+        :param str repo_id: an id of the repository
+        :param str metadata_dir: a path to the repository cache with the repodata directory
+        :param str solv_dir: a path to the directory with the solv files
+        :return: True if the metadata were stored, otherwise False
+        """
+        if not key:
+            return False
+
+        with self._lock:
+            entry_path = self._get_entry_path(key)
+
+            if os.path.isdir(entry_path):
+                # Just mark the entry as recently used.
+                os.utime(entry_path)
+                return True
+
+            tmp_path = entry_path + ".tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+            try:
+                shutil.copytree(metadata_dir, os.path.join(tmp_path, METADATA_DIR),
+                                ignore=shutil.ignore_patterns("packages"),
+                                copy_function=link_or_copy)
+
+                os.makedirs(os.path.join(tmp_path, SOLV_DIR))
+                for path in self._find_solv_files(solv_dir, repo_id):
+                    name = os.path.basename(path).replace(repo_id, "repo", 1)
+                    link_or_copy(path, os.path.join(tmp_path, SOLV_DIR, name))
+
+                os.rename(tmp_path, entry_path)
+            except OSError as e:
+                log.warning("Failed to cache metadata of the repo %s: %s", repo_id, e)
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return False
+
+            log.debug("Metadata of the repo %s are cached as %s.", repo_id, key)
+            self._evict()
+            return True
+
+    def restore(self, key, repo_id, metadata_dir, solv_dir):
+        """Restore the metadata of a repository.
+
+        :param str key: a hash of the repomd.xml file
+        :param str repo_id: an id of the repository
+        :param str metadata_dir: a path to the repository cache with the repodata directory
+        :param str solv_dir: a path to the directory for the solv files
+        :return: True if the metadata were restored, otherwise False
+        """
+        if not self.contains(key):
+            return False
+
+        with self._lock:
+            entry_path = self._get_entry_path(key)
+
+            try:
+                shutil.rmtree(metadata_dir, ignore_errors=True)
+                shutil.copytree(os.path.join(entry_path, METADATA_DIR), metadata_dir,
+                                copy_function=link_or_copy)
+
+                os.makedirs(solv_dir, exist_ok=True)
+                for path in glob.glob(os.path.join(entry_path, SOLV_DIR, "*")):
+                    name = os.path.basename(path).replace("repo", repo_id, 1)
+                    solv_path = os.path.join(solv_dir, name)
+
+                    # Never write into a file that might be linked.
+                    if os.path.lexists(solv_path):
+                        os.unlink(solv_path)
+
+                    link_or_copy(path, solv_path)
+
+                # Mark the entry as recently used.
+                os.utime(entry_path)
+            except OSError as e:
+                log.warning("Failed to restore cached metadata of the repo %s: %s", repo_id, e)
+                shutil.rmtree(metadata_dir, ignore_errors=True)
+                return False
+
+            log.debug("Metadata of the repo %s are restored from %s.", repo_id, key)
+            return True
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    def _find_solv_files(self, solv_dir, repo_id):
+        """Find the solv files of the given repository."""
+        main_file = os.path.join(solv_dir, repo_id + ".solv")
+        ext_pattern = os.path.join(glob.escape(solv_dir), glob.escape(repo_id) + "-*.solvx")
+        ext_files = glob.glob(ext_pattern)
+        return [main_file] + ext_files if os.path.exists(main_file) else ext_files
+
+    def _evict(self):
+        """Remove the least recently used entries over the size limit."""
+        entries = self._get_entries()
+        total_size = sum(size for _path, size in entries)
+
+        for path, size in entries:
+            if total_size <= self._max_size:
+                break
+
+            log.debug("Removing cached metadata %s of size %s.", path, Size(size))
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
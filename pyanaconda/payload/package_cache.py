@@ -0,0 +1,191 @@
+# Persistent cache of downloaded packages.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+
+from blivet.size import Size
+
+from pyanaconda.payload.utils import link_or_copy
+
+from pyanaconda.anaconda_loggers import get_packaging_logger
+log = get_packaging_logger()
+
+__all__ = ["PackageCache"]
+
+
+class PackageCache(object):
+    """Persistent cache of downloaded packages.
+
+    The cache can be stored on a mounted volume or a network share,
+    so it can be shared by many installations from the same repositories.
+
+    The packages are identified by their NEVRA and checksum. The cached
+    packages are hardlinked to the download location if possible, so they
+    shouldn't be modified in place. Only their size is checked here, DNF
+    verifies their checksums before the transaction and downloads the
+    packages that don't match again.
+
+    The least recently used packages are removed when the total size of
+    the cache exceeds the limit.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """Create a new cache.
+
+        :param str cache_dir: a path to the cache directory
+        :param Size max_size: a maximal size of the cache
+        """
+        self._cache_dir = cache_dir
+        self._max_size = Size(max_size)
+
+    @property
+    def cache_dir(self):
+        """A path to the cache directory."""
+        return self._cache_dir
+
+    @property
+    def max_size(self):
+        """A maximal size of the cache."""
+        return self._max_size
+
+    @property
+    def size(self):
+        """The current size of the cache."""
+        return Size(sum(size for _path, size in self._get_entries()))
+
+    def get_package_path(self, package):
+        """Get a path to the cached package.
+
+        :param package: a DNF package
+        :return: a path to the package in the cache or None
+        """
+        checksum_type, checksum = package.returnIdSum()
+
+        if not checksum:
+            return None
+
+        nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
+        return os.path.join(self._cache_dir, "%s-%s-%s.rpm" % (nevra, checksum_type, checksum))
+
+    def restore(self, package, path):
+        """Restore the package from the cache.
+
+        :param package: a DNF package
+        :param str path: a path to the restored package
+        :return: True if the package was restored, otherwise False
+        """
+        cached_path = self.get_package_path(package)
+
+        if not cached_path or not os.path.exists(cached_path):
+            return False
+
+        if os.path.getsize(cached_path) != package.downloadsize:
+            log.warning("The cached package %s has a wrong size.", cached_path)
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            if os.path.lexists(path):
+                os.unlink(path)
+
+            link_or_copy(cached_path, path)
+
+            # Mark the package as recently used.
+            os.utime(cached_path)
+        except OSError as e:
+            log.warning("Failed to restore the package %s from the cache: %s", package, e)
+            return False
+
+        return True
+
+    def store(self, package, path):
+        """Store the package in the cache.
+
+        The package should be verified by DNF. It replaces the cached
+        package with the same NEVRA and checksum if there is any.
+
+        :param package: a DNF package
+        :param str path: a path to the downloaded package
+        :return: True if the package was stored, otherwise False
+        """
+        cached_path = self.get_package_path(package)
+
+        if not cached_path or not os.path.exists(path):
+            return False
+
+        if os.path.exists(cached_path) and os.path.samefile(path, cached_path):
+            return True
+
+        # Other installations can use the cache at the same time.
+        tmp_path = "%s.%d.tmp" % (cached_path, os.getpid())
+
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            link_or_copy(path, tmp_path)
+            os.rename(tmp_path, cached_path)
+        except OSError as e:
+            log.warning("Failed to store the package %s in the cache: %s", package, e)
+
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+            return False
+
+        return True
+
+    def evict(self):
+        """Remove the least recently used packages over the size limit."""
+        entries = self._get_entries()
+        total_size = sum(size for _path, size in entries)
+
+        for path, size in entries:
+            if total_size <= self._max_size:
+                break
+
+            log.debug("Removing the cached package %s.", path)
+
+            try:
+                os.unlink(path)
+            except OSError as e:
+                log.warning("Failed to remove the cached package %s: %s", path, e)
+                continue
+
+            total_size -= size
+
+    def _get_entries(self):
+        """Return a list of (path, size) of cached packages from the oldest one."""
+        if not os.path.isdir(self._cache_dir):
+            return []
+
+        entries = []
+
+        for name in os.listdir(self._cache_dir):
+            path = os.path.join(self._cache_dir, name)
+
+            if not name.endswith(".rpm"):
+                continue
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, path, stat.st_size))
+
+        return [(path, size) for _mtime, path, size in sorted(entries)]
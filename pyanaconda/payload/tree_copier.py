@@ -0,0 +1,423 @@
+# Parallel copier of directory trees.
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import errno
+import fcntl
+import os
+import re
+import shutil
+import stat
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from pyanaconda.anaconda_loggers import get_packaging_logger
+log = get_packaging_logger()
+
+__all__ = ["TreeCopier", "TreeCopyProgress", "move_tree", "LIVE_TREE_EXCLUDES"]
+
+# The rsync-style patterns excluded from the copy of a live tree.
+LIVE_TREE_EXCLUDES = ["/dev/", "/proc/", "/tmp/*", "/sys/", "/run/", "/boot/*rescue*",
+                      "/boot/loader/", "/boot/efi/loader/", "/etc/machine-id"]
+
+# The ioctl request for cloning of a file (see ioctl_ficlone(2)).
+FICLONE = 0x40049409
+
+# The size of a chunk for copying of the file content.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Errors of the fast copy methods that mean the method is not available.
+_UNSUPPORTED_ERRORS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                       errno.ENOTTY, errno.EBADF)
+
+# Errors of the xattr calls that mean the attribute can't be copied.
+_XATTR_UNSUPPORTED_ERRORS = (errno.ENOTSUP, errno.EPERM, errno.ENODATA)
+
+
+class TreeCopyProgress(namedtuple("TreeCopyProgress", [
+        "files_done", "files_total", "bytes_done", "bytes_total"])):
+    """The progress of a tree copy."""
+
+    __slots__ = ()
+
+    @property
+    def percentage(self):
+        """The percentage of the copied data."""
+        if not self.bytes_total:
+            return 100 if self.files_done >= self.files_total else 0
+
+        return min(100, int(100 * self.bytes_done / self.bytes_total))
+
+
+def _compile_exclude(pattern):
+    """Compile an rsync-style exclude pattern.
+
+    The pattern is anchored to the root of the tree if it starts with
+    a slash and matches only directories if it ends with a slash. The
+    wildcards don't match the slash.
+
+    :param str pattern: an exclude pattern
+    :return: a tuple of a compiled regex and a directory flag
+    """
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+
+    if pattern.startswith("/"):
+        prefix = "^"
+        pattern = pattern[1:]
+    else:
+        prefix = "^(.*/)?"
+
+    regex = ""
+    for char in pattern:
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        else:
+            regex += re.escape(char)
+
+    return re.compile(prefix + regex + "$"), dir_only
+
+
+def _copy_content(src_fd, dst_fd, size):
+    """Copy the content of a file.
+
+    Try to clone the file first, then use copy_file_range and fall back
+    to the copying through the user space.
+
+    :param int src_fd: a descriptor of the source file
+    :param int dst_fd: a descriptor of the destination file
+    :param int size: a size of the source file
+    """
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED_ERRORS:
+            raise
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = 0
+            while copied < size:
+                count = os.copy_file_range(src_fd, dst_fd, size - copied)
+                if not count:
+                    break
+                copied += count
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRORS:
+                raise
+
+            os.lseek(src_fd, 0, os.SEEK_SET)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            os.ftruncate(dst_fd, 0)
+
+    while True:
+        data = os.read(src_fd, COPY_CHUNK_SIZE)
+        if not data:
+            break
+
+        view = memoryview(data)
+        while view:
+            view = view[os.write(dst_fd, view):]
+
+
+def _copy_xattrs(src_path, dst_path):
+    """Copy extended attributes of a file."""
+    try:
+        names = os.listxattr(src_path, follow_symlinks=False)
+    except OSError as e:
+        if e.errno in _XATTR_UNSUPPORTED_ERRORS:
+            return
+        raise
+
+    for name in names:
+        try:
+            value = os.getxattr(src_path, name, follow_symlinks=False)
+            os.setxattr(dst_path, name, value, follow_symlinks=False)
+        except OSError as e:
+            if e.errno not in _XATTR_UNSUPPORTED_ERRORS:
+                raise
+
+            log.debug("Failed to copy the attribute %s of %s: %s", name, src_path, e)
+
+
+def _copy_metadata(src_path, dst_path, st):
+    """Copy the owner, mode, extended attributes and times of a file."""
+    # Change the owner first, it resets the setuid bits and capabilities.
+    os.chown(dst_path, st.st_uid, st.st_gid, follow_symlinks=False)
+
+    if not stat.S_ISLNK(st.st_mode):
+        os.chmod(dst_path, stat.S_IMODE(st.st_mode))
+
+    _copy_xattrs(src_path, dst_path)
+    os.utime(dst_path, ns=(st.st_atime_ns, st.st_mtime_ns), follow_symlinks=False)
+
+
+def move_tree(source, destination):
+    """Move the content of a directory tree into another directory.
+
+    Existing directories are merged and existing files are replaced.
+    The entries are renamed if possible. Directories on a different
+    file system than the source are copied with their content.
+
+    :param str source: a path to the source directory
+    :param str destination: a path to the destination directory
+    :raise: OSError if the tree can't be moved
+    """
+    source_dev = os.lstat(source).st_dev
+
+    with os.scandir(source) as it:
+        entries = list(it)
+
+    for entry in entries:
+        src_path = entry.path
+        dst_path = os.path.join(destination, entry.name)
+
+        if entry.is_dir(follow_symlinks=False) \
+                and os.path.isdir(dst_path) and not os.path.islink(dst_path):
+
+            if os.lstat(dst_path).st_dev != source_dev:
+                TreeCopier(src_path, dst_path).run()
+                shutil.rmtree(src_path)
+                continue
+
+            move_tree(src_path, dst_path)
+
+            try:
+                _copy_metadata(src_path, dst_path, entry.stat(follow_symlinks=False))
+            except OSError as e:
+                log.warning("Failed to copy metadata of %s: %s", dst_path, e)
+
+            os.rmdir(src_path)
+            continue
+
+        if os.path.isdir(dst_path) and not os.path.islink(dst_path):
+            shutil.rmtree(dst_path)
+        elif os.path.lexists(dst_path):
+            os.unlink(dst_path)
+
+        os.rename(src_path, dst_path)
+
+
+class TreeCopier(object):
+    """Copier of a directory tree.
+
+    The copier preserves permissions, owners, groups, times, extended
+    attributes (including ACLs and SELinux contexts), symlinks, hardlinks,
+    devices and special files. It doesn't cross file system boundaries.
+
+    The source tree is scanned first, so the total number of files and
+    bytes is known in advance. Regular files are then copied by a pool
+    of workers and the progress is reported after every copied file.
+    """
+
+    def __init__(self, source, destination, excludes=(), workers=4, callback=None):
+        """Create a new copier.
+
+        :param str source: a path to the source directory
+        :param str destination: a path to the destination directory
+        :param excludes: a list of rsync-style exclude patterns
+        :param int workers: a number of workers copying the files
+        :param callback: a function called with TreeCopyProgress or None
+        """
+        self._source = source
+        self._destination = destination
+        self._excludes = [_compile_exclude(pattern) for pattern in excludes]
+        self._workers = max(1, workers)
+        self._callback = callback
+
+        self._lock = threading.Lock()
+        self._files_done = 0
+        self._files_total = 0
+        self._bytes_done = 0
+        self._bytes_total = 0
+
+    @property
+    def progress(self):
+        """The current progress of the copy."""
+        with self._lock:
+            return TreeCopyProgress(self._files_done, self._files_total,
+                                    self._bytes_done, self._bytes_total)
+
+    def run(self):
+        """Copy the tree.
+
+        :raise: OSError if the tree can't be copied
+        """
+        directories, files, links = self._scan()
+
+        with self._lock:
+            self._files_total = len(files) + len(links)
+            self._bytes_total = sum(st.st_size for _path, st in files if stat.S_ISREG(st.st_mode))
+
+        log.debug("Copying %d files of %d bytes from %s to %s.", self._files_total,
+                  self._bytes_total, self._source, self._destination)
+
+        for path, _st in directories:
+            self._create_directory(path)
+
+        with ThreadPoolExecutor(max_workers=self._workers,
+                                thread_name_prefix="AnaTreeCopyThread") as executor:
+            futures = [executor.submit(self._copy_file, path, st) for path, st in files]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+
+            for future in not_done:
+                future.cancel()
+
+            for future in done:
+                future.result()
+
+        for path, target in links:
+            self._create_hardlink(path, target)
+
+        # Set the metadata of directories after their content is created.
+        for path, st in reversed(directories):
+            self._copy_metadata(path, st)
+
+        log.debug("Copied %d files of %d bytes.", self._files_done, self._bytes_done)
+
+    def _is_excluded(self, path, is_dir):
+        """Is the relative path excluded from the copy?"""
+        for regex, dir_only in self._excludes:
+            if dir_only and not is_dir:
+                continue
+
+            if regex.match(path):
+                return True
+
+        return False
+
+    def _scan(self):
+        """Scan the source tree.
+
+        :return: a tuple of lists of directories, files and hardlinks
+        """
+        root_st = os.lstat(self._source)
+        directories = [("", root_st)]
+        files = []
+        links = []
+        inodes = {}
+
+        stack = [""]
+        while stack:
+            parent = stack.pop()
+
+            with os.scandir(os.path.join(self._source, parent)) as it:
+                entries = sorted(it, key=lambda e: e.name)
+
+            for entry in entries:
+                path = os.path.join(parent, entry.name)
+                st = entry.stat(follow_symlinks=False)
+                is_dir = stat.S_ISDIR(st.st_mode)
+
+                if self._is_excluded(path, is_dir):
+                    continue
+
+                if is_dir:
+                    directories.append((path, st))
+
+                    # Create the mount points, but don't copy their content.
+                    if st.st_dev == root_st.st_dev:
+                        stack.append(path)
+
+                    continue
+
+                if st.st_nlink > 1:
+                    key = (st.st_dev, st.st_ino)
+
+                    if key in inodes:
+                        links.append((path, inodes[key]))
+                        continue
+
+                    inodes[key] = path
+
+                files.append((path, st))
+
+        return directories, files, links
+
+    def _create_directory(self, path):
+        """Create a directory in the destination."""
+        os.makedirs(os.path.join(self._destination, path), exist_ok=True)
+
+    def _copy_file(self, path, st):
+        """Copy a non-directory file with its metadata."""
+        src_path = os.path.join(self._source, path)
+        dst_path = os.path.join(self._destination, path)
+        mode = st.st_mode
+
+        if os.path.lexists(dst_path) and (not stat.S_ISREG(mode) or os.path.islink(dst_path)):
+            os.unlink(dst_path)
+
+        if stat.S_ISREG(mode):
+            src_fd = os.open(src_path, os.O_RDONLY | os.O_NOFOLLOW)
+            try:
+                dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW,
+                                 0o600)
+                try:
+                    _copy_content(src_fd, dst_fd, st.st_size)
+                finally:
+                    os.close(dst_fd)
+            finally:
+                os.close(src_fd)
+        elif stat.S_ISLNK(mode):
+            os.symlink(os.readlink(src_path), dst_path)
+        else:
+            # Devices, fifos and sockets.
+            os.mknod(dst_path, mode, st.st_rdev)
+
+        self._copy_metadata(path, st)
+
+        with self._lock:
+            self._files_done += 1
+            if stat.S_ISREG(mode):
+                self._bytes_done += st.st_size
+
+        self._report_progress()
+
+    def _create_hardlink(self, path, target):
+        """Create a hardlink to the already copied file."""
+        dst_path = os.path.join(self._destination, path)
+
+        if os.path.lexists(dst_path):
+            os.unlink(dst_path)
+
+        os.link(os.path.join(self._destination, target), dst_path)
+
+        with self._lock:
+            self._files_done += 1
+
+        self._report_progress()
+
+    def _copy_metadata(self, path, st):
+        """Copy the metadata of a file.
+
+        Failures are logged, but they don't stop the copy.
+        """
+        try:
+            _copy_metadata(os.path.join(self._source, path),
+                           os.path.join(self._destination, path), st)
+        except OSError as e:
+            log.warning("Failed to copy metadata of %s: %s", path or "/", e)
+
+    def _report_progress(self):
+        """Report the current progress."""
+        if self._callback:
+            self._callback(self.progress)
@@ -17,11 +17,15 @@
 # Red Hat, Inc.
 #
 import os
+import shutil
+import time
 import blivet.util
 import blivet.arch
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from distutils.version import LooseVersion
 
+from pyanaconda.core import util
 from pyanaconda.anaconda_loggers import get_module_logger
 from pyanaconda.payload.errors import PayloadSetupError
 
@@ -122,6 +126,33 @@ def mount(device_path, mount_point, fstype, options):
         raise PayloadSetupError(str(e))
 
 
+def write_all(fd, data, offset):
+    """Write all data to the file descriptor at the given offset.
+
+    :param int fd: a file descriptor
+    :param data: a bytes-like object
+    :param int offset: an offset in the file
+    """
+    view = memoryview(data)
+
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def link_or_copy(src, dst):
+    """Hardlink the file or copy it if it is not possible.
+
+    :param str src: a path to the source file
+    :param str dst: a path to the new file
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 def arch_is_x86():
     """Does the hardware support X86?"""
     return blivet.arch.is_x86(32)
@@ -137,3 +168,89 @@ def version_cmp(v1, v2):
     first_version = LooseVersion(v1)
     second_version = LooseVersion(v2)
     return (first_version > second_version) - (first_version < second_version)
+
+
+def get_kernel_job_workers(kernel_version_list, max_workers=0):
+    """Get a number of workers for jobs run for every kernel.
+
+    :param kernel_version_list: a list of kernel versions
+    :param int max_workers: a maximal number of workers or 0 for the number of CPUs
+    :return: a number of workers
+    """
+    if max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+
+    return max(1, min(max_workers, len(kernel_version_list)))
+
+
+def exec_kernel_commands(kernel, commands, execute=None):
+    """Run commands for a kernel.
+
+    All commands are run even if some of them fail.
+
+    :param str kernel: a kernel version
+    :param commands: a list of tuples with a command and its arguments
+    :param execute: a function that runs a command and returns its exit code,
+                    the command runs in the target root by default
+    :return: a list of descriptions of failed commands
+    """
+    execute = execute or util.execInSysroot
+    failures = []
+
+    for command, argv in commands:
+        rc = execute(command, argv)
+
+        if rc:
+            log.error("%s failed for the kernel %s with the exit code %s.", command, kernel, rc)
+            failures.append("{} exited with {}".format(command, rc))
+
+    return failures
+
+
+def run_kernel_jobs(name, job, kernel_version_list, workers=1):
+    """Run a job for every kernel.
+
+    The jobs run in parallel with the given number of workers. A failure
+    of one job doesn't stop the others. The failures are logged together
+    when all jobs are finished.
+
+    :param str name: a name of the job used in logs
+    :param job: a function called with a kernel version, returns a list of failures
+    :param kernel_version_list: a list of kernel versions
+    :param int workers: a number of workers
+    :raise: the first error raised by a job
+    """
+    def run_job(kernel):
+        start = time.monotonic()
+        log.info("Started %s for %s.", name, kernel)
+
+        try:
+            return job(kernel) or []
+        finally:
+            log.info("Finished %s for %s in %.1f s.", name, kernel, time.monotonic() - start)
+
+    failures = {}
+    errors = []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix="AnaKernelJobThread") as executor:
+        futures = {executor.submit(run_job, kernel): kernel for kernel in kernel_version_list}
+
+        for future in as_completed(futures):
+            kernel = futures[future]
+
+            try:
+                result = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+                result = [str(e)]
+
+            if result:
+                failures[kernel] = result
+
+    for kernel in kernel_version_list:
+        if kernel in failures:
+            log.error("Failed %s for %s: %s", name, kernel, "; ".join(failures[kernel]))
+
+    if errors:
+        raise errors[0]
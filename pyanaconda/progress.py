@@ -37,6 +37,7 @@ progressQ.addMessage("step", 0)
 progressQ.addMessage("message", 1)          # message
 progressQ.addMessage("complete", 0)
 progressQ.addMessage("quit", 1)             # exit_code
+progressQ.addMessage("percentage", 1)       # percentage of the current step
 
 def progress_message(message):
     progressQ.send_message(_(message))
@@ -138,12 +138,18 @@ def load_plugin_s390():
     blockdev.reinit([plugin], reload=False)
 
 
-def reset_storage(storage, scan_all=False, retry=True):
+def reset_storage(storage, scan_all=False, retry=True, interface_ready=None, incremental=False):
     """Reset the storage model.
 
+    The storage can be reset before the user interface is set up.
+    In that case, errors of the reset are handled once the event
+    interface_ready is set.
+
     :param storage: an instance of the Blivet's storage object
     :param scan_all: should we scan all devices in the system?
     :param retry: should we allow to retry the reset?
+    :param interface_ready: an instance of threading.Event or None
+    :param incremental: should we scan only the changed devices?
     """
     # Clear the exclusive disks to scan all devices in the system.
     if scan_all:
@@ -153,13 +159,18 @@ def reset_storage(storage, scan_all=False, retry=True):
     # Do the reset.
     while True:
         try:
-            _reset_storage(storage)
+            _reset_storage(storage, incremental)
         except StorageError as e:
             # Is the retry allowed?
             if not retry:
                 raise
+
+            # Wait for the user interface that handles the error.
+            if interface_ready:
+                interface_ready.wait()
+
             # Does the user want to retry?
-            elif error_handler.cb(e) == ERROR_RAISE:
+            if error_handler.cb(e) == ERROR_RAISE:
                 raise
             # Retry the storage reset.
             else:
@@ -200,12 +211,13 @@ def select_all_disks_by_default(storage):
     return selected_disks
 
 
-def _reset_storage(storage):
+def _reset_storage(storage, incremental=False):
     """Do reset the storage.
 
     FIXME: Call the DBus task instead of this function.
 
     :param storage: an instance of the Blivet's storage object
+    :param incremental: should we scan only the changed devices?
     """
     # Set the ignored and exclusive disks.
     disk_select_proxy = STORAGE.get_proxy(DISK_SELECTION)
@@ -226,4 +238,7 @@ def _reset_storage(storage):
         zfcp_proxy.ReloadModule()
 
     # Do the reset.
-    storage.reset()
+    if incremental:
+        storage.refresh()
+    else:
+        storage.reset()
@@ -20,10 +20,15 @@
 
 """This module provides storage functions related to OS installation."""
 
+import copy
 import os
 
+from blivet import udev
+from blivet import util as blivet_util
 from blivet.blivet import Blivet
+from blivet.devicelibs.edd import get_edd_dict
 from blivet.devices import BTRFSSubVolumeDevice
+from blivet.devicetree import DeviceTree
 from blivet.formats import get_format
 from blivet.formats.disklabel import DiskLabel
 from blivet.size import Size
@@ -35,6 +40,8 @@ from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.constants import shortProductName
 from pyanaconda.storage.fsset import FSSet
 from pyanaconda.storage.utils import download_escrow_certificate, find_live_backing_device
+from pyanaconda.storage.refresh import get_udev_snapshot, get_udev_changes, find_stale_devices, \
+    drop_device_info_cache
 from pyanaconda.storage.root import find_existing_installations
 from pyanaconda.modules.common.constants.services import NETWORK
 
@@ -55,6 +62,8 @@ class InstallerStorage(Blivet):
         self.fsset = FSSet(self.devicetree)
         self._short_product_name = shortProductName
         self._default_luks_version = DEFAULT_LUKS_VERSION
+        self._udev_snapshot = None
+        self._udev_snapshot_filters = None
 
     @property
     def bootloader(self):
@@ -223,6 +232,56 @@ class InstallerStorage(Blivet):
 
         return list(filter(is_supported, disks))
 
+    def __deepcopy__(self, memo):
+        """Create a deep copy of the storage model.
+
+        The recorded state of the udev devices is replaced, but never
+        modified in place, so the copy shares its values.
+        """
+        return blivet_util.variable_copy(self, memo, shallow=("_udev_snapshot",))
+
+    def copy(self, devices=True):
+        """Create a copy of the storage model.
+
+        The copy of the device tree is the most expensive part. If the copy
+        is going to be reset anyway, there is no need to copy the devices.
+        In that case, the copy has an empty device tree and only keeps the
+        configuration of the storage and the saved passphrases.
+
+        :param bool devices: should we copy the devices?
+        :return: a new instance of the storage model
+        """
+        if devices:
+            return super().copy()
+
+        log.debug("starting a copy of the storage configuration")
+        # pylint: disable=protected-access
+        all_devices = self.devicetree._devices + self.devicetree._hidden
+
+        # Replace the device tree and all references to its devices.
+        memo = {id(device): None for device in all_devices}
+        memo[id(self.devicetree)] = DeviceTree(
+            ignored_disks=list(self.ignored_disks),
+            exclusive_disks=list(self.exclusive_disks),
+            disk_images=dict(self.disk_images)
+        )
+        memo[id(self.fsset)] = None
+        memo[id(self.roots)] = []
+
+        new = copy.deepcopy(self, memo)
+        new.fsset = FSSet(new.devicetree)
+        new.bootloader.reset()
+        new._hidden_protected_disks = []
+        new._udev_snapshot = None
+
+        # Keep the passphrases of the current devices.
+        for device in all_devices:
+            if device.format.type == "luks" and device.format.exists:
+                new.save_passphrase(device)
+
+        log.debug("finished a copy of the storage configuration")
+        return new
+
     def reset(self, cleanup_only=False):
         """ Reset storage configuration to reflect actual system state.
 
@@ -259,6 +318,153 @@ class InstallerStorage(Blivet):
         self.roots = find_existing_installations(self.devicetree)
         self.dump_state("initial")
 
+        # Record the state of the devices for the next refresh.
+        self._save_udev_snapshot()
+
+    def refresh(self):
+        """Refresh the storage configuration incrementally.
+
+        Scan again only devices that were added, removed or changed
+        since the last reset or refresh. The rest of the device tree
+        is reused. The existing installations are always searched on
+        all devices, because the content of a file system can change
+        without any udev event. Unchanged file systems are not mounted
+        again thanks to the cache of find_existing_installations.
+
+        Fall back to the reset if the changes can't be applied
+        incrementally, for example if there are scheduled actions
+        or if the changed devices are shared by other devices.
+        """
+        if not self._can_refresh():
+            self.reset()
+            return
+
+        # The rescanned devices can't be resolved with stale data.
+        drop_device_info_cache()
+
+        infos = udev.get_devices()
+        changes = get_udev_changes(self._udev_snapshot, get_udev_snapshot(infos))
+
+        if not any(changes):
+            log.debug("No devices have changed since the last scan.")
+            self._refresh_existing_installations()
+            return
+
+        log.debug("Changed devices: %s", changes)
+        stale_devices = find_stale_devices(self.devicetree, infos, changes)
+
+        if stale_devices is None:
+            log.debug("Unable to refresh the devices incrementally.")
+            self.reset()
+            return
+
+        try:
+            self._refresh_devices(infos, changes, stale_devices)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to refresh the devices incrementally.")
+            self.reset()
+
+    def _get_udev_snapshot_filters(self):
+        """Get the options that affect the scan of the devices."""
+        return (
+            list(self.ignored_disks),
+            list(self.exclusive_disks),
+            dict(self.disk_images),
+            list(self.protected_devices)
+        )
+
+    def _save_udev_snapshot(self):
+        """Save a snapshot of the block devices."""
+        self._udev_snapshot = get_udev_snapshot(udev.get_devices())
+        self._udev_snapshot_filters = self._get_udev_snapshot_filters()
+
+    def _can_refresh(self):
+        """Can the device tree be refreshed incrementally?"""
+        if self._udev_snapshot is None:
+            return False
+
+        if self._udev_snapshot_filters != self._get_udev_snapshot_filters():
+            log.debug("The disk selection has changed since the last scan.")
+            return False
+
+        if list(self.devicetree.actions):
+            log.debug("There are scheduled actions.")
+            return False
+
+        return True
+
+    def _refresh_devices(self, infos, changes, stale_devices):
+        """Scan again the added devices and the stale subtrees.
+
+        :param infos: a list of udev infos of the current block devices
+        :param changes: an instance of UdevChanges
+        :param stale_devices: a list of top-most stale devices
+        """
+        old_devices = {d.id for d in self.devicetree.devices}
+        paths = set(changes.added)
+
+        # save passphrases for luks devices so we don't have to reprompt
+        for device in stale_devices:
+            for dependent in [device] + self.devicetree.get_dependent_devices(device):
+                paths.add(dependent.sysfs_path)
+
+                if dependent.format.type == "luks" and dependent.format.exists:
+                    self.save_passphrase(dependent)
+
+        # Remove the stale subtrees. Keep only disks that still exist.
+        for device in stale_devices:
+            log.debug("Removing the stale device %s.", device.name)
+            self.devicetree.recursive_remove(device, actions=False)
+
+            if device.sysfs_path in changes.removed:
+                self.devicetree._remove_device(device)  # pylint: disable=protected-access
+
+        # Scan the devices again.
+        for info in infos:
+            if udev.device_get_sysfs_path(info) in paths:
+                self.devicetree.handle_device(info, update_orig_fmt=True)
+
+        self.devicetree._hide_ignored_disks()  # pylint: disable=protected-access
+        self.edd_dict = get_edd_dict(self.partitioned)
+        self.devicetree.edd_dict = self.edd_dict
+
+        # Find the affected devices.
+        affected = [d for d in self.devicetree.devices if d.id not in old_devices]
+        affected.extend(d for d in stale_devices if d in self.devicetree.devices)
+
+        # Protect devices from teardown.
+        self._mark_protected_devices()
+        self._teardown_devices(affected)
+
+        self.fsset = FSSet(self.devicetree)
+
+        # Clear out attributes that refer to devices that are no longer in the tree.
+        self.bootloader.reset()
+
+        self._refresh_existing_installations()
+        self.dump_state("initial")
+
+        # Record the state of the devices for the next refresh.
+        self._save_udev_snapshot()
+
+    def _refresh_existing_installations(self):
+        """Find existing installations on all devices again."""
+        self.roots = []
+        self.roots = find_existing_installations(self.devicetree)
+
+    def _teardown_devices(self, devices):
+        """Tear down the given devices and their dependents."""
+        device_ids = {d.id for d in devices}
+
+        for leaf in self.devicetree.leaves:
+            if leaf.protected or not any(a.id in device_ids for a in leaf.ancestors):
+                continue
+
+            try:
+                leaf.teardown(recursive=True)
+            except Exception as e:  # pylint: disable=broad-except
+                log.info("teardown of %s failed: %s", leaf.name, e)
+
     def _mark_protected_devices(self):
         """Mark protected devices.
 
@@ -377,6 +583,22 @@ class InstallerStorage(Blivet):
                 if disk not in self.devices:
                     self.devicetree.unhide(disk)
 
+    def are_disks_selected(self, selected_names):
+        """Are only the specified usable disks visible?
+
+        If they are, select_disks wouldn't change anything.
+
+        :param selected_names: a list of disk names
+        :return: True or False
+        """
+        devices = self.devices
+
+        for disk in self.usable_disks:
+            if (disk.name in selected_names) != (disk in devices):
+                return False
+
+        return True
+
     def hide_protected_disks(self):
         """Hide protected disks."""
         for disk in self.disks:
@@ -0,0 +1,200 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Support for the incremental refresh of the device tree.
+
+The state of the block devices reported by udev is recorded after every
+reset of the storage. The next refresh compares the recorded state with
+the current one and rescans only the subtrees of the device tree that
+were affected by the changes.
+"""
+from collections import namedtuple
+
+from blivet import udev
+from blivet.static_data import lvs_info, pvs_info, mpath_members
+from blivet.util import get_sysfs_attr
+
+from pyanaconda.anaconda_loggers import get_module_logger
+log = get_module_logger(__name__)
+
+__all__ = ["UdevChanges", "get_udev_snapshot", "get_udev_changes", "find_stale_devices",
+           "drop_device_info_cache"]
+
+# The udev properties that identify the content of a block device.
+UDEV_FINGERPRINT_PROPERTIES = [
+    "DEVNAME",
+    "DEVTYPE",
+    "ID_FS_TYPE",
+    "ID_FS_UUID",
+    "ID_FS_LABEL",
+    "ID_FS_VERSION",
+    "ID_PART_TABLE_TYPE",
+    "ID_PART_TABLE_UUID",
+    "ID_PART_ENTRY_UUID",
+    "DM_NAME",
+    "DM_UUID",
+    "MD_UUID",
+]
+
+UdevChanges = namedtuple("UdevChanges", ["added", "removed", "changed"])
+
+
+def drop_device_info_cache():
+    """Prepare for a new scan of the devices.
+
+    Wait for udev to process the pending events and drop the cached
+    information about LVM and multipath devices, like Blivet does
+    before it populates the device tree.
+    """
+    udev.settle()
+    lvs_info.drop_cache()
+    pvs_info.drop_cache()
+    mpath_members.drop_cache()
+
+
+def get_device_fingerprint(info):
+    """Get a fingerprint of the block device.
+
+    :param info: udev info of the device
+    :return: a tuple of values that change with the device
+    """
+    sysfs_path = udev.device_get_sysfs_path(info)
+    values = [info.get(name) for name in UDEV_FINGERPRINT_PROPERTIES]
+    values.append(get_sysfs_attr(sysfs_path, "size"))
+    return tuple(values)
+
+
+def get_udev_snapshot(infos):
+    """Get a snapshot of the block devices.
+
+    :param infos: a list of udev infos of block devices
+    :return: a dictionary of sysfs paths and fingerprints
+    """
+    return {
+        udev.device_get_sysfs_path(info): get_device_fingerprint(info)
+        for info in infos
+    }
+
+
+def get_udev_changes(old_snapshot, new_snapshot):
+    """Get changes between two snapshots of the block devices.
+
+    :param old_snapshot: a dictionary of sysfs paths and fingerprints
+    :param new_snapshot: a dictionary of sysfs paths and fingerprints
+    :return: an instance of UdevChanges with sets of sysfs paths
+    """
+    old_paths = set(old_snapshot)
+    new_paths = set(new_snapshot)
+
+    return UdevChanges(
+        added=new_paths - old_paths,
+        removed=old_paths - new_paths,
+        changed={p for p in old_paths & new_paths if old_snapshot[p] != new_snapshot[p]}
+    )
+
+
+def _get_partition_disk(devicetree, info, infos):
+    """Get a disk of the added partition.
+
+    :return: a device or None if the device is not a partition
+    """
+    disk_number = info.get("ID_PART_ENTRY_DISK")
+
+    if not disk_number:
+        return None
+
+    for disk_info in infos:
+        if "{}:{}".format(disk_info.get("MAJOR"), disk_info.get("MINOR")) == disk_number:
+            return devicetree.get_device_by_sysfs_path(
+                udev.device_get_sysfs_path(disk_info), hidden=True
+            )
+
+    return None
+
+
+def _is_stale_subtree_closed(devicetree, device):
+    """Is the subtree of the device independent of other devices?
+
+    All dependent devices have to be created only from devices of
+    the subtree, so the subtree can be removed and scanned again.
+    """
+    subtree = [device] + devicetree.get_dependent_devices(device, hidden=True)
+    subtree_ids = {d.id for d in subtree}
+
+    for dependent in subtree[1:]:
+        if any(parent.id not in subtree_ids for parent in dependent.parents):
+            return False
+
+    return True
+
+
+def find_stale_devices(devicetree, infos, changes):
+    """Find devices whose subtrees should be scanned again.
+
+    Only changes of disks and partitions are supported. An added device
+    is scanned without removing any other devices, unless it is a new
+    partition. In that case, the whole disk is stale.
+
+    :param devicetree: a device tree
+    :param infos: a list of udev infos of the current block devices
+    :param changes: an instance of UdevChanges
+    :return: a list of top-most stale devices or None if not supported
+    """
+    stale = []
+
+    for path in changes.removed | changes.changed:
+        device = devicetree.get_device_by_sysfs_path(path, incomplete=True, hidden=True)
+
+        if device is None:
+            continue
+
+        if device.type == "partition":
+            device = device.disk
+        elif not device.is_disk:
+            log.debug("Unsupported change of the device %s.", device.name)
+            return None
+
+        stale.append(device)
+
+    for info in infos:
+        if udev.device_get_sysfs_path(info) not in changes.added:
+            continue
+
+        disk = _get_partition_disk(devicetree, info, infos)
+
+        if disk is not None:
+            stale.append(disk)
+
+    # Remove duplicates and devices with stale ancestors.
+    stale_ids = {d.id for d in stale}
+    result = []
+
+    for device in stale:
+        if device in result or any(a.id in stale_ids for a in device.ancestors if a is not device):
+            continue
+
+        if device.protected or device in devicetree._hidden:  # pylint: disable=protected-access
+            log.debug("Unsupported change of the protected or hidden device %s.", device.name)
+            return None
+
+        if not _is_stale_subtree_closed(devicetree, device):
+            log.debug("Unsupported change of the shared device %s.", device.name)
+            return None
+
+        result.append(device)
+
+    return result
@@ -15,8 +15,13 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import mmap
 import os
 import shlex
+import struct
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from blivet import util as blivet_util
 from blivet.errors import StorageError
@@ -32,6 +37,22 @@ log = get_module_logger(__name__)
 
 __all__ = ["mount_existing_system", "find_existing_installations", "Root"]
 
+# The maximal number of devices probed at the same time.
+ROOT_DETECTION_WORKERS = 4
+
+# The size of the start of a device that contains the superblocks.
+SUPERBLOCK_AREA_SIZE = 128 * 1024
+
+# Files of an installation that are needed to find its devices.
+INSTALLATION_FILES = ["etc/fstab", "etc/crypttab", "etc/blkid/blkid.tab"]
+
+# The cache of the probed devices.
+_probe_cache = {}
+_probe_cache_lock = threading.Lock()
+
+# The result of a device that failed to be probed.
+_PROBE_FAILED = object()
+
 
 def mount_existing_system(storage, root_device, read_only=None):
     """Mount filesystems specified in root_device's /etc/fstab file."""
@@ -69,15 +90,16 @@ def mount_existing_system(storage, root_device, read_only=None):
         storage.make_mtab(chroot=root_path)
 
 
-def find_existing_installations(devicetree, teardown_all=True):
+def find_existing_installations(devicetree, teardown_all=True, devices=None):
     """Find existing GNU/Linux installations on devices from the device tree.
 
     :param devicetree: a device tree to find existing installations in
     :param bool teardown_all: whether to tear down all devices in the end
+    :param devices: a list of devices to check or None for all devices
     :return: roots of all found installations
     """
     try:
-        roots = _find_existing_installations(devicetree)
+        roots = _find_existing_installations(devicetree, devices)
         return roots
     except Exception:  # pylint: disable=broad-except
         log_exception_info(log.info, "failure detecting existing installations")
@@ -88,19 +110,30 @@ def find_existing_installations(devicetree, teardown_all=True):
     return []
 
 
-def _find_existing_installations(devicetree):
+def _find_existing_installations(devicetree, devices=None):
     """Find existing GNU/Linux installations on devices from the device tree.
 
+    The devices are set up one by one, but they are mounted and probed
+    concurrently. File systems with the same UUID can't be mounted at
+    the same time, so they are probed one after another. The results
+    are cached by the UUID of the file system and its change counters,
+    so unchanged file systems are not mounted again by the next reset
+    of the storage.
+
     :param devicetree: a device tree to find existing installations in
+    :param devices: a list of devices to check or None for all devices
     :return: roots of all found installations
     """
-    if not os.path.exists(conf.target.physical_root):
-        blivet_util.makedirs(conf.target.physical_root)
+    if devices is None:
+        devices = devicetree.devices
+
+    candidates = []
+    results = {}
+
+    for device in devices:
+        if not device.direct:
+            continue
 
-    sysroot = conf.target.physical_root
-    roots = []
-    direct_devices = (dev for dev in devicetree.devices if dev.direct)
-    for device in direct_devices:
         if not device.format.linux_native or not device.format.mountable or \
            not device.controllable or not device.format.exists:
             continue
@@ -111,45 +144,266 @@ def _find_existing_installations(devicetree):
             log_exception_info(log.warning, "setup of %s failed", [device.name])
             continue
 
-        options = device.format.options + ",ro"
-        try:
-            device.format.mount(options=options, mountpoint=sysroot)
-        except Exception:  # pylint: disable=broad-except
-            log_exception_info(log.warning, "mount of %s as %s failed", [device.name, device.format.type])
-            blivet_util.umount(mountpoint=sysroot)
+        key = _get_probe_key(device)
+
+        with _probe_cache_lock:
+            cached = key is not None and key in _probe_cache
+
+            if cached:
+                log.debug("Using the cached result for %s.", device.name)
+                results[device.id] = _probe_cache[key]
+
+        candidates.append((device, key, cached))
+
+    # Probe the devices that are not cached. XFS refuses to mount a file
+    # system with the UUID of a mounted one and btrfs merges them, so
+    # the devices are grouped by the UUID of the file system.
+    groups = {}
+
+    for device, key, cached in candidates:
+        if cached:
             continue
 
-        if not os.access(sysroot + "/etc/fstab", os.R_OK):
-            blivet_util.umount(mountpoint=sysroot)
-            device.teardown()
+        group_id = ("uuid", device.format.uuid) if device.format.uuid else ("id", device.id)
+        groups.setdefault(group_id, []).append((device, key))
+
+    if groups:
+        workers = min(len(groups), ROOT_DETECTION_WORKERS)
+
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix="AnaRootThread") as executor:
+            futures = [executor.submit(_probe_devices, [d for d, _key in group])
+                       for group in groups.values()]
+
+            for group, future in zip(groups.values(), futures):
+                for (device, key), result in zip(group, future.result()):
+                    results[device.id] = result
+
+                    if key is not None and result is not _PROBE_FAILED:
+                        with _probe_cache_lock:
+                            _probe_cache[key] = result
+
+    # Create the roots in the order of the devices.
+    roots = []
+
+    for device, _key, _cached in candidates:
+        result = results.get(device.id)
+
+        if not result or result is _PROBE_FAILED:
             continue
 
-        try:
-            (architecture, product, version) = get_release_string(chroot=sysroot)
-        except ValueError:
-            name = _("Linux on %s") % device.name
-        else:
-            # I'd like to make this finer grained, but it'd be very difficult
-            # to translate.
-            if not product or not version or not architecture:
-                name = _("Unknown Linux")
-            elif "linux" in product.lower():
-                name = _("%(product)s %(version)s for %(arch)s") % \
-                    {"product": product, "version": version, "arch": architecture}
-            else:
-                name = _("%(product)s Linux %(version)s for %(arch)s") % \
-                    {"product": product, "version": version, "arch": architecture}
+        name, files = result
+        (mounts, swaps) = _parse_installation_files(devicetree, files)
 
-        (mounts, swaps) = _parse_fstab(devicetree, chroot=sysroot)
-        blivet_util.umount(mountpoint=sysroot)
         if not mounts and not swaps:
             # empty /etc/fstab. weird, but I've seen it happen.
             continue
+
+        # The cached result doesn't depend on the name of the device.
+        if not name:
+            name = _("Linux on %s") % device.name
+
         roots.append(Root(mounts=mounts, swaps=swaps, name=name))
 
     return roots
 
 
+def _read_superblock_area(device):
+    """Read the start of the device with the superblocks.
+
+    The device is read with O_DIRECT, because the file systems don't
+    have to update the page cache of the block device.
+
+    :return: bytes or None
+    """
+    try:
+        fd = os.open(device.path, os.O_RDONLY | os.O_DIRECT)
+    except OSError as e:
+        log.debug("Failed to open %s: %s", device.name, e)
+        return None
+
+    # The buffer of O_DIRECT has to be aligned. Anonymous maps are.
+    try:
+        with mmap.mmap(-1, SUPERBLOCK_AREA_SIZE) as buffer:
+            size = os.readv(fd, [buffer])
+            return buffer[:size]
+    except OSError as e:
+        log.debug("Failed to read the superblocks of %s: %s", device.name, e)
+        return None
+    finally:
+        os.close(fd)
+
+
+def _unpack_superblock(data, offset, magic_offset, magic, fields):
+    """Unpack fields of a superblock.
+
+    :param data: the start of the device
+    :param offset: an offset of the superblock
+    :param magic_offset: an offset of the magic number in the superblock
+    :param magic: bytes of the magic number
+    :param fields: a list of tuples with offsets and struct formats
+    :return: a tuple of values or None if the superblock is not found
+    """
+    end = max([magic_offset + len(magic)] + [o + struct.calcsize(f) for o, f in fields])
+
+    if not data or len(data) < offset + end:
+        return None
+
+    if data[offset + magic_offset:offset + magic_offset + len(magic)] != magic:
+        return None
+
+    return tuple(struct.unpack_from(f, data, offset + o)[0] for o, f in fields)
+
+
+def _get_change_counters(fmt_type, data):
+    """Get values that change with every change of the file system.
+
+    ext2/3/4: the mount and write times, the mount count, the number
+    of written kilobytes and the checksum of the superblock.
+
+    btrfs: the generation and the checksum of the superblock.
+
+    xfs: the log sequence number, the inode and block counters and
+    the checksum of the superblock. Only the version 5 has them.
+
+    :param fmt_type: a type of the file system
+    :param data: the start of the device
+    :return: a tuple of values or None if not supported
+    """
+    if fmt_type in ("ext2", "ext3", "ext4"):
+        return _unpack_superblock(data, 1024, 0x38, b"\x53\xef", [
+            (0x2C, "<I"), (0x30, "<I"), (0x34, "<H"), (0x178, "<Q"), (0x3FC, "<I")
+        ])
+
+    if fmt_type == "btrfs":
+        return _unpack_superblock(data, 0x10000, 0x40, b"_BHRfS_M", [
+            (0x48, "<Q"), (0x00, "32s")
+        ])
+
+    if fmt_type == "xfs":
+        version = _unpack_superblock(data, 0, 0, b"XFSB", [(100, ">H")])
+
+        if not version or version[0] & 0xF < 5:
+            return None
+
+        return _unpack_superblock(data, 0, 0, b"XFSB", [
+            (240, ">Q"), (128, ">Q"), (136, ">Q"), (144, ">Q"), (224, ">I")
+        ])
+
+    return None
+
+
+def _get_probe_key(device):
+    """Get a key of the probed device in the cache.
+
+    The key changes with the change counters of the file system.
+
+    :return: a tuple or None if the result can't be cached
+    """
+    if not device.format.uuid:
+        return None
+
+    counters = _get_change_counters(device.format.type, _read_superblock_area(device))
+
+    if counters is None:
+        return None
+
+    return device.format.uuid, device.format.type, counters
+
+
+def _probe_devices(devices):
+    """Probe the devices one after another.
+
+    :return: a list of results of _probe_device
+    """
+    return [_probe_device(device) for device in devices]
+
+
+def _probe_device(device):
+    """Mount the device and read the installation files.
+
+    The device is mounted read-only to a temporary directory without
+    the help of Blivet, because Blivet runs one program at a time.
+
+    :return: a tuple of a name and a dictionary of files, None or _PROBE_FAILED
+    """
+    sysroot = tempfile.mkdtemp(prefix="anaconda-root-")
+
+    try:
+        options = device.format.options + ",ro"
+        argv = ["-t", device.format.mount_type, "-o", options, device.path, sysroot]
+
+        if util.execWithRedirect("mount", argv) != 0:
+            log.warning("mount of %s as %s failed", device.name, device.format.type)
+            return _PROBE_FAILED
+
+        try:
+            return _read_installation(sysroot)
+        finally:
+            util.execWithRedirect("umount", [sysroot])
+    finally:
+        os.rmdir(sysroot)
+
+
+def _read_installation(sysroot):
+    """Read the installation mounted at the sysroot.
+
+    The name is None if the release is not known.
+
+    :return: a tuple of a name and a dictionary of files or None
+    """
+    if not os.access(sysroot + "/etc/fstab", os.R_OK):
+        return None
+
+    try:
+        (architecture, product, version) = get_release_string(chroot=sysroot)
+    except ValueError:
+        name = None
+    else:
+        # I'd like to make this finer grained, but it'd be very difficult
+        # to translate.
+        if not product or not version or not architecture:
+            name = _("Unknown Linux")
+        elif "linux" in product.lower():
+            name = _("%(product)s %(version)s for %(arch)s") % \
+                {"product": product, "version": version, "arch": architecture}
+        else:
+            name = _("%(product)s Linux %(version)s for %(arch)s") % \
+                {"product": product, "version": version, "arch": architecture}
+
+    files = {}
+
+    for path in INSTALLATION_FILES:
+        try:
+            with open(os.path.join(sysroot, path), "rt") as f:
+                files[path] = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+
+    return name, files
+
+
+def _parse_installation_files(devicetree, files):
+    """Parse the files of the installation.
+
+    The files are written to a temporary directory, so the parsers
+    of the files can read them like in the installation.
+
+    :param devicetree: a device tree
+    :param files: a dictionary of paths and contents
+    :return: a tuple of a mount dict and swap list
+    """
+    with tempfile.TemporaryDirectory(prefix="anaconda-root-") as chroot:
+        for path, content in files.items():
+            full_path = os.path.join(chroot, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+            with open(full_path, "wt") as f:
+                f.write(content)
+
+        return _parse_fstab(devicetree, chroot=chroot)
+
+
 def get_release_string(chroot):
     """Identify the installation of a Linux distribution.
 
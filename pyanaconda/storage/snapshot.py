@@ -66,15 +66,18 @@ class StorageSnapshot(object):
 
         # we need to create a new copy from the snapshot first -- simple
         # assignment from the snapshot would result in snapshot being modified
-        # by further changes of 'storage'
-        new_copy = self._storage_snap.copy()
+        # by further changes of 'storage'; a disposed snapshot is not used
+        # anymore, so it can be handed over without the copy
+        if dispose:
+            new_copy = self._storage_snap
+            self.dispose_snapshot()
+        else:
+            new_copy = self._storage_snap.copy()
+
         storage.devicetree = new_copy.devicetree
         storage.roots = new_copy.roots
         storage.fsset = new_copy.fsset
 
-        if dispose:
-            self.dispose_snapshot()
-
 
 # A snapshot of early storage as we got it from scanning disks without doing any changes.
 on_disk_storage = StorageSnapshot()
@@ -18,6 +18,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import queue
+import sys
 import threading
 
 from pyanaconda.anaconda_loggers import get_module_logger
@@ -125,7 +127,9 @@ class ThreadManager(object):
             names = list(self._objs.keys())
 
         for name in names:
-            if self.get(name) == threading.current_thread():
+            obj = self.get(name)
+            if obj == threading.current_thread() \
+                    or getattr(obj, "worker", None) == threading.current_thread():
                 continue
             log.debug("Waiting for thread %s to exit", name)
             self.wait(name)
@@ -287,4 +291,188 @@ class AnacondaThread(threading.Thread):
             self._target_stopped()
 
 
+class AnacondaWorkerPool(object):
+    """A bounded pool of reusable worker threads.
+
+    The pool runs instances of AnacondaJob. The worker threads are
+    started on demand up to the maximal number of workers and they
+    are reused by the next jobs. The workers are daemonic.
+
+    A job started from a worker of the pool can start an overflow
+    worker even if the limit is reached, so jobs that wait for other
+    jobs of the pool never block each other. The overflow workers
+    exit as soon as there are no jobs to run.
+    """
+
+    def __init__(self, max_workers, prefix=_WORKER_THREAD_PREFIX):
+        """Create a new pool.
+
+        :param int max_workers: a maximal number of workers
+        :param str prefix: a prefix of names of the workers
+        """
+        self._max_workers = max(1, max_workers)
+        self._prefix = prefix
+        self._jobs = queue.SimpleQueue()
+        self._workers = []
+        self._workers_lock = threading.Lock()
+        self._idle_workers = 0
+        self._pending_jobs = 0
+        self._started_workers = 0
+
+    @property
+    def max_workers(self):
+        """A maximal number of workers."""
+        return self._max_workers
+
+    @property
+    def workers(self):
+        """A number of started workers."""
+        with self._workers_lock:
+            return len(self._workers)
+
+    def submit(self, job):
+        """Run the job in a worker of the pool.
+
+        :param job: an instance of AnacondaJob
+        """
+        with self._workers_lock:
+            self._jobs.put(job)
+            self._pending_jobs += 1
+
+            # Use an idle worker if there is any.
+            if self._pending_jobs <= self._idle_workers:
+                return
+
+            if len(self._workers) >= self._max_workers:
+                if threading.current_thread() not in self._workers:
+                    return
+
+                log.warning("Exceeding the limit of %d workers to run %s.",
+                            self._max_workers, job.name)
+
+            self._started_workers += 1
+            worker = threading.Thread(
+                name="{}{}".format(self._prefix, self._started_workers),
+                target=self._run_worker,
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _run_worker(self):
+        """Run the submitted jobs."""
+        while True:
+            with self._workers_lock:
+                # Stop an overflow worker if there are no jobs to run.
+                if len(self._workers) > self._max_workers \
+                        and self._pending_jobs <= self._idle_workers:
+                    self._workers.remove(threading.current_thread())
+                    return
+
+                self._idle_workers += 1
+
+            job = self._jobs.get()
+
+            with self._workers_lock:
+                self._idle_workers -= 1
+                self._pending_jobs -= 1
+
+            try:
+                job.run()
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Job %s has failed.", job.name)
+
+
+class AnacondaJob(object):
+    """A job run by a worker of AnacondaWorkerPool.
+
+    The job behaves like AnacondaThread. It is added to the thread
+    manager by its unique name, it calls the same callbacks and it
+    removes itself from the thread manager when completed.
+    """
+
+    def __init__(self, pool, name, target, target_started=None, target_stopped=None,
+                 target_failed=None, fatal=True):
+        """Create a new job.
+
+        :param pool: an instance of AnacondaWorkerPool
+        :param str name: a unique name of the job
+        :param target: a function to run
+        :param target_started: a function called when the job is started
+        :param target_stopped: a function called when the job is stopped
+        :param target_failed: a function called with the exception info on failure
+        :param bool fatal: should a failure invoke the exception handling?
+        """
+        self.name = name
+        self._pool = pool
+        self._target = target
+        self._target_started_callback = target_started
+        self._target_stopped_callback = target_stopped
+        self._target_failed_callback = target_failed
+        self._fatal = fatal
+        self._worker = None
+        self._started = False
+        self._done = threading.Event()
+
+    @property
+    def worker(self):
+        """The worker thread running the job or None."""
+        return self._worker
+
+    def start(self):
+        """Submit the job to the pool."""
+        self._started = True
+        self._pool.submit(self)
+
+    def is_alive(self):
+        """Is the job submitted and not done?"""
+        return self._started and not self._done.is_set()
+
+    def join(self, timeout=None):
+        """Wait for the job to finish."""
+        self._done.wait(timeout)
+
+    def _target_started(self):
+        log.info("Running Job: %s (%s)", self.name, self._worker.name)
+
+        if self._target_started_callback:
+            self._target_started_callback()
+
+    def _target_stopped(self):
+        log.info("Job Done: %s (%s)", self.name, self._worker.name)
+
+        if self._target_stopped_callback:
+            self._target_stopped_callback()
+
+    def _target_failed(self, *exc_info):
+        log.info("Job Failed: %s (%s)", self.name, self._worker.name)
+
+        if self._fatal:
+            sys.excepthook(*exc_info)
+        else:
+            threadMgr.set_error(self.name, *exc_info)
+
+        if self._target_failed_callback:
+            self._target_failed_callback(*exc_info)
+
+    def run(self):
+        """Run the job in the current thread."""
+        self._worker = threading.current_thread()
+
+        try:
+            self._target_started()
+            self._target()
+
+        except:  # pylint: disable=bare-except
+            self._target_failed(*sys.exc_info())
+
+        finally:
+            threadMgr.remove(self.name)
+
+            try:
+                self._target_stopped()
+            finally:
+                self._done.set()
+
+
 threadMgr = ThreadManager()
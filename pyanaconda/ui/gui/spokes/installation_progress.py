@@ -90,6 +90,8 @@ class ProgressSpoke(StandaloneSpoke):
                 self._step_progress_bar()
             elif code == progressQ.PROGRESS_CODE_MESSAGE:
                 self._update_progress_message(args[0])
+            elif code == progressQ.PROGRESS_CODE_PERCENTAGE:
+                self._update_step_percentage(args[0])
             elif code == progressQ.PROGRESS_CODE_COMPLETE:
                 q.task_done()
 
@@ -199,6 +201,13 @@ class ProgressSpoke(StandaloneSpoke):
         self._currentStep += 1
         gtk_call_once(self._progressBar.set_fraction, self._currentStep/self._totalSteps)
 
+    def _update_step_percentage(self, percentage):
+        if not self._totalSteps:
+            return
+
+        fraction = (self._currentStep + min(percentage, 100) / 100) / self._totalSteps
+        gtk_call_once(self._progressBar.set_fraction, fraction)
+
     def _update_progress_message(self, message):
         if not self._totalSteps:
             return
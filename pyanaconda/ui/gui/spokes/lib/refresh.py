@@ -84,11 +84,12 @@ class RefreshDialog(GUIObject):
         self._ok_button.set_sensitive(False)
         self._notebook.set_current_page(1)
 
-        # And now to fire up the storage reinitialization.
+        # And now to fire up the storage reinitialization. Only the devices
+        # changed since the last scan are scanned again if it is possible.
         threadMgr.add(AnacondaThread(name=constants.THREAD_STORAGE,
                                      target=reset_storage,
                                      args=(self.storage, ),
-                                     kwargs={"scan_all": True}))
+                                     kwargs={"scan_all": True, "incremental": True}))
 
         self._elapsed = 0
 
@@ -100,6 +100,9 @@ class ProgressSpoke(StandaloneTUISpoke):
                     self._stepped = False
                     print('')
                 print(args[0])
+            elif code == progressQ.PROGRESS_CODE_PERCENTAGE:
+                # Text mode doesn't have a finite progress bar
+                pass
             elif code == progressQ.PROGRESS_CODE_COMPLETE:
                 # There shouldn't be any more progress updates, so return
                 q.task_done()
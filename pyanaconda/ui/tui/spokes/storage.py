@@ -823,7 +823,7 @@ class MountPointAssignSpoke(NormalTUISpoke):
             return
 
         print(_("Scanning disks. This may take a moment..."))
-        reset_storage(self.storage, scan_all=True)
+        reset_storage(self.storage, scan_all=True, incremental=True)
 
         # Forget the mount point requests.
         self._manual_part_proxy.SetRequests([])
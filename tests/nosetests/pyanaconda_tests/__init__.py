@@ -20,11 +20,14 @@ gi.require_version("GLib", "2.0")
 from gi.repository import GLib
 
 import locale
+import os
 
 from contextlib import ContextDecorator
+from tempfile import TemporaryDirectory
 from textwrap import dedent
 from unittest.mock import Mock, patch
 
+from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.constants import DEFAULT_LANG
 from dasbus.server.template import BasicInterfaceTemplate
 from pyanaconda.modules.common.constants.interfaces import KICKSTART_MODULE
@@ -36,6 +39,10 @@ from dasbus.typing import get_native
 # Set the default locale.
 locale.setlocale(locale.LC_ALL, DEFAULT_LANG)
 
+# Trace the tasks of the tests to a temporary file.
+_trace_dir = TemporaryDirectory(prefix="anaconda-tests-")
+conf.anaconda._set_option("trace_file", os.path.join(_trace_dir.name, "trace.json"))
+
 
 class run_in_glib(object):
     """Run the test methods in GLib.
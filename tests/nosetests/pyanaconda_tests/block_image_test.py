@@ -0,0 +1,162 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import unittest
+
+from tempfile import TemporaryDirectory
+from unittest.mock import patch, call
+
+from pyanaconda.payload.block_image import write_image, get_image_size, set_fs_identity, \
+    grow_fs, IMAGE_CHUNK_SIZE
+from pyanaconda.payload.errors import PayloadInstallError
+
+
+class WriteImageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.image = os.path.join(self._temp_dir.name, "image")
+        self.device = os.path.join(self._temp_dir.name, "device")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _create_image(self, chunks):
+        """Create an image from a list of (offset, data)."""
+        with open(self.image, "wb") as f:
+            for offset, data in chunks:
+                f.seek(offset)
+                f.write(data)
+
+    def _create_device(self, size, fill=b"\xff"):
+        with open(self.device, "wb") as f:
+            f.write(fill * size)
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def write_image_test(self):
+        """Test the write of an image."""
+        size = 3 * IMAGE_CHUNK_SIZE
+        self._create_image([(0, os.urandom(size))])
+        self._create_device(size)
+
+        written, zeroed = write_image(self.image, self.device)
+
+        self.assertEqual(self._read(self.device), self._read(self.image))
+        self.assertEqual(written, size)
+        self.assertEqual(zeroed, 0)
+
+    def write_sparse_image_test(self):
+        """Test the write of a sparse image."""
+        size = 4 * IMAGE_CHUNK_SIZE
+        self._create_image([
+            (10, b"data"),
+            (2 * IMAGE_CHUNK_SIZE + 100, b"more data"),
+            (size - 1, b"x")
+        ])
+        self._create_device(size)
+
+        written, zeroed = write_image(self.image, self.device)
+
+        self.assertEqual(get_image_size(self.image), size)
+        self.assertEqual(self._read(self.device), self._read(self.image))
+        self.assertEqual(written + zeroed, size)
+        self.assertLessEqual(written, 3 * IMAGE_CHUNK_SIZE)
+        self.assertGreaterEqual(zeroed, IMAGE_CHUNK_SIZE)
+
+    def write_zero_blocks_test(self):
+        """Test the write of an image with zero blocks."""
+        size = 3 * IMAGE_CHUNK_SIZE
+        self._create_image([
+            (0, os.urandom(IMAGE_CHUNK_SIZE)),
+            (IMAGE_CHUNK_SIZE, bytes(IMAGE_CHUNK_SIZE)),
+            (2 * IMAGE_CHUNK_SIZE, os.urandom(IMAGE_CHUNK_SIZE - 10)),
+            (size - 10, bytes(10))
+        ])
+        self._create_device(size)
+
+        written, zeroed = write_image(self.image, self.device)
+
+        self.assertEqual(self._read(self.device), self._read(self.image))
+        self.assertEqual(written, 2 * IMAGE_CHUNK_SIZE)
+        self.assertEqual(zeroed, IMAGE_CHUNK_SIZE)
+
+    def write_progress_test(self):
+        """Test the progress of the write."""
+        size = 2 * IMAGE_CHUNK_SIZE + 100
+        self._create_image([(0, os.urandom(size))])
+        self._create_device(size)
+
+        reported = []
+        write_image(self.image, self.device, callback=lambda *args: reported.append(args))
+
+        self.assertEqual(reported, [
+            (IMAGE_CHUNK_SIZE, size),
+            (2 * IMAGE_CHUNK_SIZE, size),
+            (size, size),
+            (size, size)
+        ])
+
+    def write_missing_image_test(self):
+        """Test the write of a missing image."""
+        self._create_device(10)
+
+        with self.assertRaises(OSError):
+            write_image(self.image, self.device)
+
+
+class FileSystemIdentityTestCase(unittest.TestCase):
+
+    @patch("pyanaconda.payload.block_image.util.execWithRedirect")
+    def set_ext4_identity_test(self, exec_mock):
+        """Test the identity of ext4."""
+        exec_mock.return_value = 0
+        set_fs_identity("/dev/sda1", "ext4", uuid="1234", label="root")
+
+        exec_mock.assert_has_calls([
+            call("e2fsck", ["-f", "-p", "/dev/sda1"]),
+            call("tune2fs", ["-U", "1234", "/dev/sda1"]),
+            call("e2label", ["/dev/sda1", "root"])
+        ])
+
+    @patch("pyanaconda.payload.block_image.util.execWithRedirect")
+    def set_xfs_identity_test(self, exec_mock):
+        """Test the identity of xfs."""
+        exec_mock.return_value = 0
+        set_fs_identity("/dev/sda1", "xfs", uuid="1234")
+
+        exec_mock.assert_called_once_with("xfs_admin", ["-U", "1234", "/dev/sda1"])
+
+    @patch("pyanaconda.payload.block_image.util.execWithRedirect")
+    def grow_fs_test(self, exec_mock):
+        """Test the grow of file systems."""
+        exec_mock.return_value = 0
+
+        grow_fs("/dev/sda1", "ext4", "/mnt/sysroot")
+        exec_mock.assert_called_once_with("resize2fs", ["/dev/sda1"])
+        exec_mock.reset_mock()
+
+        grow_fs("/dev/sda1", "xfs", "/mnt/sysroot")
+        exec_mock.assert_called_once_with("xfs_growfs", ["/mnt/sysroot"])
+        exec_mock.reset_mock()
+
+        exec_mock.return_value = 1
+        with self.assertRaises(PayloadInstallError):
+            grow_fs("/dev/sda1", "ext4", "/mnt/sysroot")
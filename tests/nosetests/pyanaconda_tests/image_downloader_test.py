@@ -0,0 +1,274 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import hashlib
+import json
+import os
+import threading
+import unittest
+
+from tempfile import TemporaryDirectory
+from unittest.mock import patch, Mock, call
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from pyanaconda.payload.downloader import ImageDownloader, ImageDownloadError, DownloadProgress
+
+URL = "http://server/image.img"
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, headers, data, fail_after=None):
+        self.status_code = status_code
+        self.headers = headers
+        self._data = data
+        self._fail_after = fail_after
+
+    def iter_content(self, chunk_size):
+        sent = 0
+
+        for i in range(0, len(self._data), chunk_size):
+            chunk = self._data[i:i + chunk_size]
+
+            if self._fail_after is not None and sent + len(chunk) > self._fail_after:
+                yield chunk[:self._fail_after - sent]
+                raise RequestsConnectionError("Connection reset.")
+
+            sent += len(chunk)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class FakeSession(object):
+    """A session serving one file."""
+
+    def __init__(self, data, ranges=True, etag='"1"', failures=None):
+        self.data = data
+        self.ranges = ranges
+        self.etag = etag
+        # A list of numbers of bytes sent before the connection fails.
+        self.failures = list(failures or [])
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+
+        with self._lock:
+            self.requests.append(headers)
+            fail_after = self.failures.pop(0) if self.failures else None
+
+        response_headers = {}
+        if self.etag:
+            response_headers["etag"] = self.etag
+
+        if not self.ranges or "Range" not in headers \
+                or headers.get("If-Range", self.etag) != self.etag:
+            response_headers["content-length"] = str(len(self.data))
+            return FakeResponse(200, response_headers, self.data, fail_after)
+
+        start, end = headers["Range"][6:].split("-")
+        start, end = int(start), int(end)
+        response_headers["content-range"] = "bytes %d-%d/%d" % (start, end, len(self.data))
+        return FakeResponse(206, response_headers, self.data[start:end + 1], fail_after)
+
+
+class ImageDownloaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        for patcher in [patch("pyanaconda.payload.downloader.time.sleep"),
+                        patch("pyanaconda.payload.downloader.DOWNLOAD_CHUNK_SIZE", 100)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self._temp_dir = TemporaryDirectory()
+        self.path = os.path.join(self._temp_dir.name, "image.img")
+        self.data = os.urandom(1000)
+        self.checksum = hashlib.sha256(self.data).hexdigest()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def probe_test(self):
+        """Test the probe of the image."""
+        downloader = ImageDownloader(FakeSession(self.data), URL, self.path)
+        self.assertEqual(downloader.probe(), 1000)
+        self.assertEqual(downloader.size, 1000)
+
+        downloader = ImageDownloader(FakeSession(self.data, ranges=False), URL, self.path)
+        self.assertEqual(downloader.probe(), 1000)
+
+    def download_segments_test(self):
+        """Test the download of segments."""
+        session = FakeSession(self.data)
+        downloader = ImageDownloader(session, URL, self.path, segment_size=300, connections=3)
+
+        reported = []
+        checksum = downloader.download(callback=reported.append)
+
+        self.assertEqual(self._read(), self.data)
+        self.assertEqual(checksum, self.checksum)
+        self.assertEqual(reported[-1], 1000)
+        self.assertEqual(sorted(reported), reported)
+        self.assertFalse(os.path.exists(downloader.state_path))
+
+        ranges = sorted(h["Range"] for h in session.requests[1:])
+        self.assertEqual(ranges, ["bytes=0-299", "bytes=300-599", "bytes=600-899",
+                                  "bytes=900-999"])
+
+    def download_resume_request_test(self):
+        """Test the resume of a failed request."""
+        session = FakeSession(self.data, failures=[None, 150, 10])
+        downloader = ImageDownloader(session, URL, self.path, segment_size=1000)
+
+        checksum = downloader.download()
+
+        self.assertEqual(self._read(), self.data)
+        self.assertEqual(checksum, self.checksum)
+        self.assertEqual([h.get("Range") for h in session.requests[1:]],
+                         ["bytes=0-999", "bytes=150-999", "bytes=160-999"])
+        self.assertEqual(session.requests[-1]["If-Range"], '"1"')
+
+    def download_retries_test(self):
+        """Test the download with too many failures."""
+        session = FakeSession(self.data, failures=[None, 0, 0, 0])
+        downloader = ImageDownloader(session, URL, self.path, retries=2)
+
+        with self.assertRaises(RequestsConnectionError):
+            downloader.download()
+
+    def download_changed_test(self):
+        """Test the download of a changed image."""
+        session = FakeSession(self.data)
+        downloader = ImageDownloader(session, URL, self.path)
+        downloader.probe()
+
+        session.etag = '"2"'
+
+        with self.assertRaises(ImageDownloadError):
+            downloader.download()
+
+    def download_resume_file_test(self):
+        """Test the resume of a partial download."""
+        with open(self.path, "wb") as f:
+            f.write(self.data[:600])
+
+        with open(self.path + ".download", "wt") as f:
+            json.dump({
+                "url": URL,
+                "size": 1000,
+                "segment_size": 300,
+                "validator": '"1"',
+                "finished": [0, 1]
+            }, f)
+
+        session = FakeSession(self.data)
+        downloader = ImageDownloader(session, URL, self.path, segment_size=300)
+
+        reported = []
+        checksum = downloader.download(callback=reported.append)
+
+        self.assertEqual(self._read(), self.data)
+        self.assertEqual(checksum, self.checksum)
+        self.assertEqual(reported[:2], [300, 600])
+        self.assertEqual(sorted(h["Range"] for h in session.requests[1:]),
+                         ["bytes=600-899", "bytes=900-999"])
+
+    def download_stale_state_test(self):
+        """Test the download with a state of a different image."""
+        with open(self.path, "wb") as f:
+            f.write(bytes(1000))
+
+        with open(self.path + ".download", "wt") as f:
+            json.dump({
+                "url": URL,
+                "size": 1000,
+                "segment_size": 300,
+                "validator": '"0"',
+                "finished": [0, 1, 2, 3]
+            }, f)
+
+        downloader = ImageDownloader(FakeSession(self.data), URL, self.path, segment_size=300)
+        self.assertEqual(downloader.download(), self.checksum)
+        self.assertEqual(self._read(), self.data)
+
+    def download_stream_test(self):
+        """Test the download without ranges."""
+        session = FakeSession(self.data, ranges=False, failures=[None, 500])
+        downloader = ImageDownloader(session, URL, self.path)
+
+        checksum = downloader.download()
+
+        self.assertEqual(self._read(), self.data)
+        self.assertEqual(checksum, self.checksum)
+        self.assertEqual(len(session.requests), 3)
+
+    def download_missing_test(self):
+        """Test the download of a missing image."""
+        session = FakeSession(self.data)
+        session.get = lambda *args, **kwargs: FakeResponse(404, {}, b"")
+        downloader = ImageDownloader(session, URL, self.path)
+
+        with self.assertRaises(ImageDownloadError):
+            downloader.download()
+
+
+class DownloadProgressTestCase(unittest.TestCase):
+
+    @patch("pyanaconda.payload.downloader.time.monotonic")
+    def progress_test(self, monotonic):
+        """Test the progress of a download."""
+        callback = Mock()
+        monotonic.return_value = 0
+        progress = DownloadProgress(URL, 1000, callback)
+
+        monotonic.return_value = 1
+        progress.update(0)
+        progress.update(100)
+        progress.update(101)
+        progress.update(200)
+        progress.end()
+
+        self.assertEqual(callback.call_args_list, [
+            call("Downloading {} (10%, 100 B/s)".format(URL)),
+            call("Downloading {} (20%, 200 B/s)".format(URL)),
+            call("Downloading {} (100%)".format(URL)),
+        ])
+
+    @patch("pyanaconda.payload.downloader.time.monotonic")
+    def unknown_size_progress_test(self, monotonic):
+        """Test the progress of a download of an unknown size."""
+        callback = Mock()
+        monotonic.return_value = 0
+        progress = DownloadProgress(URL, None, callback)
+
+        monotonic.return_value = 2
+        progress.update(100)
+        progress.update(200)
+
+        monotonic.return_value = 4
+        progress.update(400)
+
+        self.assertEqual(callback.call_count, 2)
+        callback.assert_called_with("Downloading {} (400 B, 100 B/s)".format(URL))
@@ -18,6 +18,7 @@
 # with the express permission of Red Hat, Inc.
 #
 
+import threading
 import unittest
 
 from pyanaconda.installation_tasks import Task
@@ -369,3 +370,85 @@ class InstallTasksTestCase(unittest.TestCase):
         self.assertEqual(self._test_variable1, 3)
         self.assertEqual(self._test_variable2, 2)
         self.assertEqual(self._test_variable3, 1)
+
+    def task_dependencies_test(self):
+        """Check the dependencies of tasks."""
+        task1 = Task("task 1", provides=("users",))
+        task2 = Task("task 2", provides=("services",))
+        task3 = Task("task 3", requires=("users",))
+        task4 = Task("task 4", requires=("users",), provides=("kickstart",))
+        task5 = Task("task 5")
+
+        self.assertEqual(task1.provides, frozenset(["users"]))
+        self.assertEqual(task3.requires, frozenset(["users"]))
+        self.assertFalse(task2.depends_on(task1))
+        self.assertTrue(task3.depends_on(task1))
+        self.assertFalse(task4.depends_on(task3))
+        self.assertTrue(task4.depends_on(task1))
+        self.assertTrue(task1.depends_on(task3))
+        self.assertTrue(task5.depends_on(task2))
+        self.assertTrue(task2.depends_on(task5))
+
+    def parallel_task_queue_test(self):
+        """Check that independent tasks of a parallel queue run at the same time."""
+        barrier = threading.Barrier(3, timeout=10)
+        order = []
+
+        def wait_for_others(name):
+            barrier.wait()
+            order.append(name)
+
+        queue = TaskQueue("queue", parallel=True)
+        queue.append(Task("first", order.append, ("first",)))
+        queue.append(Task("a", wait_for_others, ("a",), provides=("a",)))
+        queue.append(Task("b", wait_for_others, ("b",), provides=("b",)))
+        queue.append(Task("c", wait_for_others, ("c",), provides=("c",)))
+        queue.append(Task("last", order.append, ("last",)))
+
+        started = []
+        completed = []
+        queue.task_started.connect(lambda task: started.append(task.name))
+        queue.task_completed.connect(lambda task: completed.append(task.name))
+
+        queue.start()
+
+        self.assertTrue(queue.done)
+        self.assertFalse(queue.running)
+        self.assertEqual(order[0], "first")
+        self.assertEqual(sorted(order[1:4]), ["a", "b", "c"])
+        self.assertEqual(order[4], "last")
+        self.assertEqual(len(started), 5)
+        self.assertEqual(len(completed), 5)
+
+    def parallel_task_queue_order_test(self):
+        """Check that dependent tasks of a parallel queue keep their order."""
+        order = []
+
+        queue = TaskQueue("queue", parallel=True, max_workers=3)
+        queue.append(Task("services 1", order.append, ("services 1",), provides=("services",)))
+        queue.append(Task("services 2", order.append, ("services 2",), provides=("services",)))
+        queue.append(Task("users", order.append, ("users",), provides=("users",)))
+        queue.append(Task("services 3", order.append, ("services 3",),
+                          requires=("users",), provides=("services",)))
+        queue.start()
+
+        self.assertEqual(len(order), 4)
+        self.assertLess(order.index("services 1"), order.index("services 2"))
+        self.assertLess(order.index("services 2"), order.index("services 3"))
+        self.assertLess(order.index("users"), order.index("services 3"))
+
+    def parallel_task_queue_failure_test(self):
+        """Check the failure of a task in a parallel queue."""
+        def fail():
+            raise ValueError("Failed!")
+
+        queue = TaskQueue("queue", parallel=True)
+        queue.append(Task("fail", fail, provides=("a",)))
+        queue.append(Task("increment var 1", self._increment_var1, requires=("a",)))
+        queue.append(Task("increment var 2", self._increment_var2))
+
+        with self.assertRaises(ValueError):
+            queue.start()
+
+        self.assertEqual(self._test_variable1, 0)
+        self.assertEqual(self._test_variable2, 0)
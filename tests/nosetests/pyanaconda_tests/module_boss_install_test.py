@@ -16,7 +16,7 @@
 # Red Hat, Inc.
 #
 import unittest
-from unittest.mock import Mock, call
+from unittest.mock import Mock, call, patch
 
 from pyanaconda.modules.boss.install_manager import InstallManager
 from pyanaconda.modules.common.task import DBusMetaTask
@@ -142,3 +142,29 @@ class InstallManagerTestCase(unittest.TestCase):
         self.assertIsInstance(main_task, DBusMetaTask)
         self.assertEqual(main_task.name, "Configure the runtime system")
         self.assertEqual(main_task._subtasks, [task_proxy, task_proxy, task_proxy])
+
+    @patch_dbus_get_proxy
+    @patch("pyanaconda.modules.boss.install_manager.install_manager.conf")
+    def install_independent_tasks_test(self, conf_mock, proxy_getter):
+        """Install with tasks of independent modules."""
+        conf_mock.anaconda.independent_modules = ["B", "C"]
+        observers = []
+
+        for name, tasks in [("A", ["/A/1"]), ("B", ["/B/1", "/B/2"]), ("C", ["/C/1"])]:
+            observer = Mock()
+            observer.is_service_available = True
+            observer.service_name = name
+            observer.proxy.InstallWithTasks.return_value = tasks
+            observers.append(observer)
+
+        proxy_getter.side_effect = lambda name, path: Mock(Steps=1, Name=path)
+
+        install_manager = InstallManager()
+        install_manager.on_module_observers_changed(observers)
+        main_task = install_manager.install_system_with_task()
+
+        self.assertIsInstance(main_task, DBusMetaTask)
+        self.assertEqual(main_task.steps, 4)
+        self.assertEqual([t.Name for t in main_task._subtasks], ["/A/1"])
+        self.assertEqual([[t.Name for t in chain] for chain in main_task._independent_subtasks],
+                         [["/B/1", "/B/2"], ["/C/1"]])
@@ -18,11 +18,13 @@
 
 import unittest
 import os
+import threading
 from contextlib import contextmanager
 from unittest.mock import Mock
 
 from pyanaconda.modules.boss.kickstart_manager import KickstartManager
 from pyanaconda.modules.boss.module_manager.module_observer import ModuleObserver
+from pyanaconda.modules.common.constants.services import TIMEZONE
 from pyanaconda.modules.common.structures.kickstart import KickstartReport, KickstartMessage
 
 KICKSTART1 = """
@@ -213,8 +215,10 @@ class KickstartManagerTestCase(unittest.TestCase):
         for filename, _content in kickstart:
             os.remove(filename)
 
-    def _get_module_observer(self, service_path, module_proxy, available=True):
-        observer = ModuleObserver(Mock(), service_path)
+    def _get_module_observer(self, service_path, module_proxy, available=True, on_demand=False,
+                             addon=False):
+        observer = ModuleObserver(Mock(), service_path, is_addon=addon, is_on_demand=on_demand)
+        observer._message_bus.get_proxy.return_value = module_proxy
         observer._proxy = module_proxy
         observer._is_service_available = available
         return observer
@@ -264,6 +268,127 @@ class KickstartManagerTestCase(unittest.TestCase):
 
         self.assertEqual(manager.generate_kickstart(), self._m123_kickstart)
 
+    def distribute_in_parallel_test(self):
+        """Test the distribution of kickstart to modules at the same time."""
+        manager = KickstartManager()
+        barrier = threading.Barrier(2, timeout=5)
+
+        module1 = BlockingTestModule(barrier, commands=["network"])
+        module2 = BlockingTestModule(barrier, commands=["firewall"])
+
+        manager.on_module_observers_changed([
+            self._get_module_observer("1", module1),
+            self._get_module_observer("2", module2)
+        ])
+
+        ks_content = "network --device=ens3\nfirewall --enabled\n"
+
+        # The modules wait for each other, so they have to be called at the same time.
+        with self._create_ks_files([("ks.mgr.test.parallel.cfg", ks_content)]) as filename:
+            report = manager.read_kickstart_file(filename)
+
+        self.assertEqual(report.is_valid(), True)
+        self.assertEqual(module1.kickstart, "network --device=ens3\n")
+        self.assertEqual(module2.kickstart, "firewall --enabled\n")
+
+        self.assertEqual(manager.generate_kickstart(),
+                         "network --device=ens3\n\nfirewall --enabled")
+
+    def distribute_on_demand_test(self):
+        """Test the distribution of kickstart to modules started on demand."""
+        manager = KickstartManager()
+
+        module1 = TestModule(commands=["network"])
+        module2 = TestModule(commands=["timezone"])
+
+        m1_observer = self._get_module_observer("1", module1)
+        m2_observer = self._get_module_observer(TIMEZONE.service_name, module2,
+                                                available=False, on_demand=True)
+        manager.on_module_observers_changed([m1_observer, m2_observer])
+
+        # The running modules handle the kickstart.
+        with self._create_ks_files([("ks.mgr.test.demand.cfg", "network --device=ens3\n")]) \
+                as filename:
+            report = manager.read_kickstart_file(filename)
+
+        self.assertEqual(report.is_valid(), True)
+        self.assertEqual(module1.kickstart, "network --device=ens3\n")
+        self.assertEqual(m2_observer.is_service_available, False)
+        m2_observer._message_bus.proxy.StartServiceByName.assert_not_called()
+
+        # The module started on demand handles the kickstart.
+        ks_content = "network --device=ens4\ntimezone Europe/Prague\n"
+
+        with self._create_ks_files([("ks.mgr.test.demand.cfg", ks_content)]) as filename:
+            report = manager.read_kickstart_file(filename)
+
+        self.assertEqual(report.is_valid(), True)
+        self.assertEqual(module1.kickstart, "network --device=ens4\n")
+        self.assertEqual(module2.kickstart, "timezone Europe/Prague\n")
+        self.assertEqual(m2_observer.is_service_available, True)
+        m2_observer._message_bus.proxy.StartServiceByName.assert_called_once_with(
+            TIMEZONE.service_name, 0
+        )
+
+    def distribute_on_demand_unhandled_test(self):
+        """Test that unhandled kickstart data don't start modules on demand."""
+        manager = KickstartManager()
+
+        module1 = TestModule(commands=["network"])
+        module2 = TestModule(commands=["timezone"])
+        module3 = TestModule(addons=["pony"])
+
+        m1_observer = self._get_module_observer("1", module1)
+        m2_observer = self._get_module_observer(TIMEZONE.service_name, module2,
+                                                available=False, on_demand=True)
+        m3_observer = self._get_module_observer("3", module3, available=False,
+                                                on_demand=True, addon=True)
+        manager.on_module_observers_changed([m1_observer, m2_observer, m3_observer])
+
+        ks_content = "network --device=ens3\nreboot\n%post\necho hello\n%end\n"
+
+        with self._create_ks_files([("ks.mgr.test.demand.cfg", ks_content)]) as filename:
+            report = manager.read_kickstart_file(filename)
+
+        self.assertEqual(report.is_valid(), True)
+        self.assertEqual(module1.kickstart, "network --device=ens3\n")
+
+        for observer in (m2_observer, m3_observer):
+            self.assertEqual(observer.is_service_available, False)
+            observer._message_bus.proxy.StartServiceByName.assert_not_called()
+
+        # Only the addons are started for the addon sections.
+        ks_content = "%addon pony\nfoo\n%end\n"
+
+        with self._create_ks_files([("ks.mgr.test.demand.cfg", ks_content)]) as filename:
+            report = manager.read_kickstart_file(filename)
+
+        self.assertEqual(report.is_valid(), True)
+        self.assertEqual(module3.kickstart, "%addon pony\nfoo\n%end\n")
+        self.assertEqual(m3_observer.is_service_available, True)
+        m2_observer._message_bus.proxy.StartServiceByName.assert_not_called()
+
+    def distribute_on_demand_main_thread_test(self):
+        """Test that the modules started on demand are started in the calling thread."""
+        manager = KickstartManager()
+        module = TestModule(commands=["timezone"])
+        observer = self._get_module_observer(TIMEZONE.service_name, module,
+                                             available=False, on_demand=True)
+        manager.on_module_observers_changed([observer])
+
+        threads = []
+        observer._message_bus.proxy.StartServiceByName.side_effect = \
+            lambda *args: threads.append(threading.current_thread())
+
+        with self._create_ks_files([("ks.mgr.test.demand.cfg", "timezone Europe/Prague\n")]) \
+                as filename:
+            report = manager.read_kickstart_file(filename)
+
+        self.assertEqual(report.is_valid(), True)
+        self.assertEqual(module.kickstart, "timezone Europe/Prague\n")
+        self.assertEqual(threads, [threading.current_thread()])
+        self.assertEqual(observer.is_service_available, True)
+
     def nothing_to_parse_test(self):
         ks_content = ""
         manager = KickstartManager()
@@ -383,3 +508,19 @@ class TestModule(object):
     def GenerateKickstart(self):
         """Mock generating a kickstart."""
         return self.kickstart
+
+
+class BlockingTestModule(TestModule):
+    """Test module that waits for other modules."""
+
+    def __init__(self, barrier, **kwargs):
+        super().__init__(**kwargs)
+        self._barrier = barrier
+
+    def ReadKickstart(self, kickstart):
+        self._barrier.wait()
+        return super().ReadKickstart(kickstart)
+
+    def GenerateKickstart(self):
+        self._barrier.wait()
+        return super().GenerateKickstart()
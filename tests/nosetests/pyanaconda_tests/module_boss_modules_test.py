@@ -16,10 +16,13 @@
 # Red Hat, Inc.
 #
 import unittest
+from threading import Event, Thread
 from unittest.mock import Mock, patch
 
+from dasbus.client.observer import DBusObserverError
 from dasbus.constants import DBUS_START_REPLY_SUCCESS, DBUS_FLAG_NONE
 from pyanaconda.modules.boss.module_manager import ModuleManager
+from pyanaconda.modules.boss.module_manager.module_observer import ModuleObserver
 from pyanaconda.modules.boss.module_manager.start_modules import StartModulesTask
 from pyanaconda.modules.common.errors import DBusError
 from pyanaconda.modules.common.errors.module import UnavailableModuleError
@@ -107,6 +110,138 @@ class ModuleManagerTestCase(unittest.TestCase):
         task = StartModulesTask(self._message_bus, [], addons_enabled=True)
         self._check_started_modules(task, service_names)
 
+    @patch("dasbus.client.observer.Gio")
+    def start_modules_on_demand_test(self, gio):
+        """Start modules on demand."""
+        service_names = [
+            "org.fedoraproject.Anaconda.Modules.A",
+            "org.fedoraproject.Anaconda.Modules.B",
+        ]
+
+        task = StartModulesTask(
+            self._message_bus,
+            service_names,
+            addons_enabled=False,
+            prefetched_modules=["org.fedoraproject.Anaconda.Modules.A"]
+        )
+
+        def fake_callbacks():
+            observer = task._module_observers[0]
+            observer._is_service_available = True
+            task._start_service_by_name_callback(lambda: DBUS_START_REPLY_SUCCESS, observer)
+            task._service_available_callback(observer)
+
+        task._callbacks.put(fake_callbacks)
+        observer_a, observer_b = task.run()
+
+        self.assertEqual(observer_a.is_on_demand, False)
+        self.assertEqual(observer_b.is_on_demand, True)
+        self.assertEqual(observer_b.is_service_available, False)
+
+        # Only the prefetched module is started.
+        bus_proxy = self._message_bus.proxy
+        bus_proxy.StartServiceByName.assert_called_once_with(
+            "org.fedoraproject.Anaconda.Modules.A",
+            DBUS_FLAG_NONE,
+            callback=task._start_service_by_name_callback,
+            callback_args=(observer_a,)
+        )
+
+        # Both modules are watched.
+        self.assertEqual(gio.bus_watch_name_on_connection.call_count, 2)
+
+        # The module is started when the proxy is accessed.
+        bus_proxy.StartServiceByName.reset_mock()
+        self.assertIsNotNone(observer_b.proxy)
+        self.assertEqual(observer_b.is_service_available, True)
+        bus_proxy.StartServiceByName.assert_called_once_with(
+            "org.fedoraproject.Anaconda.Modules.B",
+            DBUS_FLAG_NONE
+        )
+
+    @patch("dasbus.client.observer.Gio")
+    def set_locale_on_demand_test(self, gio):
+        """Set the locale of modules started on demand."""
+        task = StartModulesTask(
+            self._message_bus,
+            ["org.fedoraproject.Anaconda.Modules.A"],
+            addons_enabled=False,
+            prefetched_modules=[]
+        )
+
+        (observer, ) = task.run()
+        self._manager.set_module_observers([observer])
+        self._manager.set_modules_locale("cs_CZ.UTF-8")
+        self._message_bus.get_proxy.assert_not_called()
+
+        observer.activate()
+        self._message_bus.get_proxy.return_value.SetLocale.assert_called_once_with("cs_CZ.UTF-8")
+
+    def activate_in_thread_test(self):
+        """Start a module on demand from another thread."""
+        observer = ModuleObserver(
+            self._message_bus,
+            "org.fedoraproject.Anaconda.Modules.A",
+            is_on_demand=True
+        )
+
+        callback = Mock()
+        observer.service_available.connect(callback)
+
+        started = Event()
+        self._message_bus.proxy.StartServiceByName.side_effect = \
+            lambda *args: started.set()
+
+        threads = [Thread(target=observer.activate) for _i in range(2)]
+
+        for thread in threads:
+            thread.start()
+
+        # The watch of the name enables the service in the main thread.
+        self.assertTrue(started.wait(timeout=10))
+        self.assertEqual(observer.is_service_available, False)
+        observer._service_name_appeared_callback()
+        observer._service_name_appeared_callback()
+
+        for thread in threads:
+            thread.join(timeout=10)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual(observer.is_service_available, True)
+        self._message_bus.proxy.StartServiceByName.assert_called_once_with(
+            "org.fedoraproject.Anaconda.Modules.A",
+            DBUS_FLAG_NONE
+        )
+        callback.assert_called_once_with(observer)
+
+        # The service is already enabled.
+        observer.activate()
+        callback.assert_called_once_with(observer)
+
+    @patch("pyanaconda.modules.boss.module_manager.module_observer.SERVICE_ACTIVATION_TIMEOUT", 0)
+    def activate_in_thread_timeout_test(self):
+        """Fail to start a module on demand from another thread."""
+        observer = ModuleObserver(
+            self._message_bus,
+            "org.fedoraproject.Anaconda.Modules.A",
+            is_on_demand=True
+        )
+
+        errors = []
+
+        def activate():
+            try:
+                observer.activate()
+            except DBusObserverError as e:
+                errors.append(e)
+
+        thread = Thread(target=activate)
+        thread.start()
+        thread.join(timeout=10)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(observer.is_service_available, False)
+
     def start_failed_test(self):
         """Fail to start a module."""
         service_names = [
@@ -32,6 +32,7 @@ from blivet.formats.luks import LUKS
 from blivet.size import Size
 
 from dasbus.typing import *  # pylint: disable=wildcard-import
+from pyanaconda.modules.common.errors import InvalidValueError
 from pyanaconda.modules.common.errors.storage import UnknownDeviceError, MountFilesystemError
 from pyanaconda.modules.storage.devicetree import DeviceTreeModule
 from pyanaconda.modules.storage.devicetree.devicetree_interface import DeviceTreeInterface
@@ -284,6 +285,76 @@ class DeviceTreeInterfaceTestCase(unittest.TestCase):
             'description': get_variant(Str, 'LUKS'),
         })
 
+    def get_devices_data_test(self):
+        """Test GetDevicesData."""
+        self.assertEqual(self.interface.GetDevicesData([], []), [])
+
+        dev1 = StorageDevice("dev1", size=Size("10 GiB"))
+        self._add_device(dev1)
+
+        dev2 = StorageDevice("dev2", parents=[dev1], size=Size("5 GiB"))
+        self._add_device(dev2)
+
+        self.assertEqual(self.interface.GetDevicesData([], ["name", "parents"]), [
+            {
+                'name': get_variant(Str, 'dev1'),
+                'parents': get_variant(List[Str], []),
+            },
+            {
+                'name': get_variant(Str, 'dev2'),
+                'parents': get_variant(List[Str], ['dev1']),
+            }
+        ])
+
+        self.assertEqual(
+            self.interface.GetDevicesData(["dev2"], []),
+            [self.interface.GetDeviceData("dev2")]
+        )
+
+        with self.assertRaises(UnknownDeviceError):
+            self.interface.GetDevicesData(["dev3"], [])
+
+        with self.assertRaises(InvalidValueError):
+            self.interface.GetDevicesData([], ["name", "unknown"])
+
+    def get_formats_data_test(self):
+        """Test GetFormatsData."""
+        self.assertEqual(self.interface.GetFormatsData([], []), [])
+
+        dev1 = StorageDevice("dev1", fmt=get_format("ext4"), size=Size("10 GiB"))
+        self._add_device(dev1)
+
+        dev2 = StorageDevice("dev2", fmt=get_format("swap"), size=Size("1 GiB"))
+        self._add_device(dev2)
+
+        self.assertEqual(self.interface.GetFormatsData([], ["type"]), [
+            {'type': get_variant(Str, 'ext4')},
+            {'type': get_variant(Str, 'swap')},
+        ])
+
+        self.assertEqual(
+            self.interface.GetFormatsData(["dev2", "dev1"], []),
+            [self.interface.GetFormatData("dev2"), self.interface.GetFormatData("dev1")]
+        )
+
+        with self.assertRaises(UnknownDeviceError):
+            self.interface.GetFormatsData(["dev3"], [])
+
+        with self.assertRaises(InvalidValueError):
+            self.interface.GetFormatsData([], ["unknown"])
+
+    def get_device_tree_generation_test(self):
+        """Test GetDeviceTreeGeneration."""
+        generation = self.interface.GetDeviceTreeGeneration()
+        self.assertEqual(self.interface.GetDeviceTreeGeneration(), generation)
+
+        self.module.on_storage_changed(create_storage())
+        self.assertEqual(self.interface.GetDeviceTreeGeneration(), generation + 1)
+        self.assertEqual(self.interface.GetDeviceTreeGeneration(), generation + 1)
+
+        # The generations of modules are independent.
+        self.assertEqual(DeviceTreeModule().get_device_tree_generation(), 0)
+
     def get_format_type_data_test(self):
         """Test GetFormatTypeData."""
         self.assertEqual(self.interface.GetFormatTypeData("swap"), {
@@ -547,7 +618,9 @@ class DeviceTreeInterfaceTestCase(unittest.TestCase):
         dev2 = LUKSDevice("dev2", parents=[dev1], fmt=get_format("luks"), size=Size("10 GiB"))
         self._add_device(dev2)
 
+        generation = self.interface.GetDeviceTreeGeneration()
         self.assertEqual(self.interface.UnlockDevice("dev2", "passphrase"), True)
+        self.assertEqual(self.interface.GetDeviceTreeGeneration(), generation + 1)
 
         device_setup.assert_called_once()
         format_setup.assert_called_once()
@@ -638,6 +711,10 @@ class DeviceTreeInterfaceTestCase(unittest.TestCase):
         self.assertEqual(obj.implementation._device.name, "dev1")
         self.assertEqual(obj.implementation._read_only, True)
 
+        generation = self.interface.GetDeviceTreeGeneration()
+        obj.implementation.stopped_signal.emit()
+        self.assertEqual(self.interface.GetDeviceTreeGeneration(), generation + 1)
+
     @patch_dbus_publish_object
     def find_devices_with_task_test(self, publisher):
         """Test FindDevicesWithTask."""
@@ -647,6 +724,10 @@ class DeviceTreeInterfaceTestCase(unittest.TestCase):
 
         self.assertEqual(obj.implementation._devicetree, self.module.storage.devicetree)
 
+        generation = self.interface.GetDeviceTreeGeneration()
+        obj.implementation.stopped_signal.emit()
+        self.assertEqual(self.interface.GetDeviceTreeGeneration(), generation + 1)
+
 
 class DeviceTreeTasksTestCase(unittest.TestCase):
     """Test the storage tasks."""
@@ -0,0 +1,173 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+from tempfile import TemporaryDirectory
+
+import pyanaconda
+
+FAKE_MODULE = """
+import atexit
+import os
+import sys
+import time
+
+print("Running {} in {}.".format(os.environ["FAKE_MODULE_VALUE"], os.getcwd()))
+atexit.register(print, "Exiting.")
+
+if "FAKE_MODULE_PID_FILE" in os.environ:
+    with open(os.environ["FAKE_MODULE_PID_FILE"], "wt") as f:
+        f.write(str(os.getpid()))
+
+    time.sleep(60)
+
+sys.exit(3)
+"""
+
+HOST_CODE = """
+import sys
+from pyanaconda.core.startup.module_host import ModuleHost
+ModuleHost(sys.argv[1], preload=["fake_module"]).run()
+"""
+
+
+class ModuleHostTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.socket_path = os.path.join(self._temp_dir.name, "module-host.socket")
+
+        package_dir = os.path.join(self._temp_dir.name, "fake_module")
+        os.mkdir(package_dir)
+
+        with open(os.path.join(package_dir, "__init__.py"), "wt"):
+            pass
+
+        with open(os.path.join(package_dir, "__main__.py"), "wt") as f:
+            f.write(FAKE_MODULE)
+
+        top_dir = os.path.dirname(os.path.dirname(os.path.abspath(pyanaconda.__file__)))
+        self.env = dict(os.environ)
+        self.env["PYTHONPATH"] = os.pathsep.join([top_dir, self._temp_dir.name])
+        self.env["FAKE_MODULE_VALUE"] = "a fake module"
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _start_module(self, cwd):
+        return subprocess.run(
+            [sys.executable, "-m", "pyanaconda.core.startup.module_host",
+             "--start", self.socket_path, "fake_module"],
+            env=self.env,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30
+        )
+
+    def _wait_for_socket(self):
+        for _i in range(300):
+            if os.path.exists(self.socket_path):
+                return
+
+            time.sleep(0.1)
+
+        self.fail("The module host is not running.")
+
+    def _start_host(self):
+        return subprocess.Popen(
+            [sys.executable, "-c", HOST_CODE, self.socket_path],
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+    def start_module_test(self):
+        """Test a module started by the module host."""
+        host = self._start_host()
+
+        try:
+            self._wait_for_socket()
+
+            for _i in range(2):
+                result = self._start_module(cwd=self._temp_dir.name)
+                self.assertEqual(result.returncode, 3)
+                self.assertEqual(
+                    result.stdout.decode("utf-8"),
+                    "Running a fake module in {}.\nExiting.\n".format(self._temp_dir.name)
+                )
+                # The client hasn't fallen back to running the module itself.
+                self.assertEqual(result.stderr, b"")
+        finally:
+            host.terminate()
+            host.wait(30)
+
+    def kill_client_test(self):
+        """Test a module of a killed client."""
+        pid_file = os.path.join(self._temp_dir.name, "fake_module.pid")
+        self.env["FAKE_MODULE_PID_FILE"] = pid_file
+        host = self._start_host()
+
+        try:
+            self._wait_for_socket()
+            client = subprocess.Popen(
+                [sys.executable, "-m", "pyanaconda.core.startup.module_host",
+                 "--start", self.socket_path, "fake_module"],
+                env=self.env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+            for _i in range(300):
+                if os.path.exists(pid_file) and os.path.getsize(pid_file):
+                    break
+
+                time.sleep(0.1)
+
+            with open(pid_file, "rt") as f:
+                pid = int(f.read())
+
+            client.kill()
+            client.wait(30)
+
+            # The module is terminated.
+            for _i in range(300):
+                try:
+                    os.kill(pid, 0)
+                except ProcessLookupError:
+                    break
+
+                time.sleep(0.1)
+            else:
+                self.fail("The module is still running.")
+        finally:
+            host.terminate()
+            host.wait(30)
+
+    def start_module_without_host_test(self):
+        """Test a module started without the module host."""
+        result = self._start_module(cwd=self._temp_dir.name)
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(
+            result.stdout.decode("utf-8"),
+            "Running a fake module in {}.\nExiting.\n".format(self._temp_dir.name)
+        )
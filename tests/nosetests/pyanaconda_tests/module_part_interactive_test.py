@@ -107,6 +107,57 @@ class InteractivePartitioningInterfaceTestCase(unittest.TestCase):
 
         self.assertEqual(obj.implementation._storage, self.module.storage)
 
+    def device_tree_generation_test(self):
+        """Test the generation of the device tree."""
+        self.module.on_storage_changed(Mock())
+        device_tree = self.module.get_device_tree()
+
+        # The partitioning task changes the storage playground.
+        task = self.module.configure_with_task()
+        generation = device_tree.get_device_tree_generation()
+        task.stopped_signal.emit()
+        self.assertEqual(device_tree.get_device_tree_generation(), generation + 1)
+
+        # The storage playground is dropped.
+        self.module.on_partitioning_reset()
+        self.assertEqual(device_tree.get_device_tree_generation(), generation + 2)
+
+    def shared_storage_test(self):
+        """Test the shared storage model of the device tree."""
+        storage = Mock()
+        storage.are_disks_selected.return_value = True
+        self.module.on_storage_changed(storage)
+        self.module.on_selected_disks_changed(["sda"])
+
+        # The current storage model is shared.
+        device_tree = self.module.get_device_tree()
+        storage.are_disks_selected.assert_called_once_with(["sda"])
+        storage.copy.assert_not_called()
+        self.assertEqual(device_tree.storage, storage)
+        self.assertIsNone(self.module._storage_playground)
+
+        # The device tree is changed on a copy.
+        device_tree.setup_device("sda")
+        storage.copy.assert_called_once_with()
+        playground = storage.copy.return_value
+        playground.select_disks.assert_called_once_with(["sda"])
+        self.assertEqual(device_tree.storage, playground)
+        self.assertEqual(self.module.storage, playground)
+
+        # The copy is created only once.
+        device_tree.setup_device("sda")
+        storage.copy.assert_called_once_with()
+
+    def unshared_storage_test(self):
+        """Test the device tree without the shared storage model."""
+        storage = Mock()
+        storage.are_disks_selected.return_value = False
+        self.module.on_storage_changed(storage)
+
+        device_tree = self.module.get_device_tree()
+        storage.copy.assert_called_once_with()
+        self.assertEqual(device_tree.storage, storage.copy.return_value)
+
 
 class InteractiveUtilsTestCase(unittest.TestCase):
     """Test utilities for the interactive partitioning."""
@@ -30,6 +30,7 @@ from pyanaconda.modules.common.errors.payload import InstallError
 from pyanaconda.modules.payloads.base.initialization import UpdateBLSConfigurationTask
 from pyanaconda.modules.payloads.base.installation import InstallFromImageTask
 from pyanaconda.modules.payloads.base.utils import create_rescue_image, get_kernel_version_list
+from pyanaconda.payload.utils import run_kernel_jobs, get_kernel_job_workers
 
 
 class LiveUtilsTestCase(unittest.TestCase):
@@ -102,6 +103,7 @@ class LiveUtilsTestCase(unittest.TestCase):
     @patch("pyanaconda.modules.payloads.base.utils.execWithRedirect")
     def create_rescue_image_with_new_kernel_pkg_test(self, exec_with_redirect):
         """Test creation of rescue image with kernel pkg."""
+        exec_with_redirect.return_value = 0
         kernel_version_list = ["kernel-v1.fc2000.x86_64", "kernel-sad-kernel"]
         with TemporaryDirectory() as temp:
             self._prepare_rescue_test_dirs(temp,
@@ -120,6 +122,7 @@ class LiveUtilsTestCase(unittest.TestCase):
     @patch("pyanaconda.modules.payloads.base.utils.execWithRedirect")
     def create_rescue_image_without_machine_id_test(self, exec_with_redirect):
         """Test creation of rescue image without machine-id file."""
+        exec_with_redirect.return_value = 0
         kernel_version_list = ["kernel-v1.fc2000.x86_64", "kernel-sad-kernel"]
         with TemporaryDirectory() as temp:
             self._prepare_rescue_test_dirs(temp,
@@ -138,6 +141,7 @@ class LiveUtilsTestCase(unittest.TestCase):
     @patch("pyanaconda.modules.payloads.base.utils.execWithRedirect")
     def create_rescue_image_with_postinst_scripts_test(self, exec_with_redirect):
         """Test creation of rescue image with postinst scripts."""
+        exec_with_redirect.return_value = 0
         kernel_version_list = ["kernel-v1.fc2000.x86_64", "kernel-sad-kernel"]
         postinst_scripts = ["01-create", "02-rule", "03-aaaand-we-lost"]
         with TemporaryDirectory() as temp:
@@ -161,6 +165,63 @@ class LiveUtilsTestCase(unittest.TestCase):
 
             exec_with_redirect.assert_has_calls(calls)
 
+    @patch("pyanaconda.modules.payloads.base.utils.execWithRedirect")
+    def create_rescue_image_failure_test(self, exec_with_redirect):
+        """Test creation of rescue image with a failed postinst script."""
+        kernel_version_list = ["kernel-1", "kernel-2", "kernel-3"]
+        postinst_scripts = ["01-create", "02-rule"]
+        exec_with_redirect.side_effect = \
+            lambda cmd, argv, root: 1 if argv and argv[0] == "kernel-2" else 0
+
+        with TemporaryDirectory() as temp:
+            self._prepare_rescue_test_dirs(temp,
+                                           fake_machine_id=True,
+                                           fake_new_kernel_pkg=False,
+                                           fake_postinst_scripts_list=postinst_scripts)
+
+            with self.assertLogs(level="ERROR") as cm:
+                create_rescue_image(temp, kernel_version_list)
+
+            self.assertTrue(any("Failed rescue image generation for kernel-2" in x
+                                for x in cm.output))
+
+            # The kernels are processed one at a time.
+            kernels = [c[0][1][0] for c in exec_with_redirect.call_args_list[1:]]
+            self.assertEqual(kernels, ["kernel-1", "kernel-1", "kernel-2", "kernel-2",
+                                       "kernel-3", "kernel-3"])
+
+    def run_kernel_jobs_test(self):
+        """Test the jobs run for every kernel."""
+        kernels = ["kernel-1", "kernel-2", "kernel-3"]
+        processed = []
+
+        def job(kernel):
+            processed.append(kernel)
+
+            if kernel == "kernel-2":
+                raise OSError("Failed!")
+
+            if kernel == "kernel-3":
+                return ["dracut exited with 1"]
+
+            return []
+
+        with self.assertLogs(level="ERROR") as cm:
+            with self.assertRaises(OSError):
+                run_kernel_jobs("test job", job, kernels, workers=2)
+
+        self.assertEqual(sorted(processed), kernels)
+        self.assertTrue(any("Failed test job for kernel-2: Failed!" in x for x in cm.output))
+        self.assertTrue(any("Failed test job for kernel-3: dracut exited with 1" in x
+                            for x in cm.output))
+
+    def kernel_job_workers_test(self):
+        """Test the number of workers for kernel jobs."""
+        self.assertEqual(get_kernel_job_workers([], 4), 1)
+        self.assertEqual(get_kernel_job_workers(["a", "b"], 4), 2)
+        self.assertEqual(get_kernel_job_workers(["a", "b", "c"], 2), 2)
+        self.assertGreaterEqual(get_kernel_job_workers(["a", "b"], 0), 1)
+
 
 class LiveTasksTestCase(unittest.TestCase):
 
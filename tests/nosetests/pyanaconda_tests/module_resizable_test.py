@@ -185,7 +185,9 @@ class ResizableDeviceTreeTestCase(unittest.TestCase):
         self.assertNotIn(dev3, self.module.storage.devices)
 
         dev2.protected = False
+        generation = self.module.get_device_tree_generation()
         self.interface.RemoveDevice("dev1")
+        self.assertEqual(self.module.get_device_tree_generation(), generation + 1)
 
         self.assertNotIn(dev1, self.module.storage.devices)
         self.assertNotIn(dev2, self.module.storage.devices)
@@ -17,7 +17,7 @@
 #
 import unittest
 from time import sleep
-from unittest.mock import Mock, call
+from unittest.mock import Mock, call, patch
 
 from dasbus.server.interface import dbus_class
 from dasbus.typing import *  # pylint: disable=wildcard-import
@@ -236,6 +236,74 @@ class TaskInterfaceTestCase(unittest.TestCase):
         self.task.report_progress("G", step_number=20)
         self._check_progress_changed(20, "G")
 
+    class CoalescedTask(Task):
+
+        _progress_interval = 100
+
+        @property
+        def name(self):
+            return "Coalesced Task"
+
+        @property
+        def steps(self):
+            return 10
+
+        def run(self):
+            for step in range(1, 11):
+                self.report_progress("Step {}".format(step), step_number=step)
+
+    @patch("pyanaconda.modules.common.task.progress.Timer")
+    def coalesced_progress_reporting_test(self, timer_cls):
+        """Test coalesced progress reporting."""
+        self._set_up_task(self.CoalescedTask())
+        self.assertEqual(self.task.progress_interval, 100)
+
+        self.task.report_progress("A", step_number=2)
+        self.task.report_progress("B", step_number=5)
+        self.task.report_progress("C", step_number=3)
+
+        # The progress is updated, but the signal is not emitted yet.
+        self._check_progress_changed(5, "C", changed=False)
+        self.assertEqual(self.task.coalesced_progress_changes, 2)
+        timer_cls.return_value.timeout_msec.assert_called_once_with(
+            100, self.task._flush_progress_callback
+        )
+
+        # The timer emits the merged change.
+        self.assertEqual(self.task._flush_progress_callback(), False)
+        self._check_progress_changed(5, "C")
+
+        # There is nothing to emit.
+        self.task.flush_progress()
+        self._check_progress_changed(5, "C", changed=False)
+
+        # The next change starts a new interval.
+        self.task.report_progress("D", step_size=1)
+        self.assertEqual(timer_cls.return_value.timeout_msec.call_count, 2)
+        self.task.flush_progress()
+        self._check_progress_changed(6, "D")
+
+    def coalesced_run_test(self):
+        """Run a task with coalesced progress reporting."""
+        self._set_up_task(self.CoalescedTask())
+
+        with self.assertLogs(level="DEBUG") as cm:
+            self._run_task()
+
+        self._finish_task()
+
+        # The number of coalesced changes is logged.
+        msg = "'Coalesced Task' has coalesced {} progress changes.".format(
+            self.task.coalesced_progress_changes
+        )
+        self.assertIn(msg, "\n".join(cm.output))
+        self.assertGreater(self.task.coalesced_progress_changes, 0)
+
+        # The last change is emitted before the task stops.
+        self.assertEqual(self.task_interface.Progress, (10, "Step 10"))
+        self.assertEqual(self.progress_changed_callback.call_args, call(10, "Step 10"))
+        self.assertLess(self.progress_changed_callback.call_count, 11)
+
     class RunningTask(Task):
 
         @property
@@ -484,6 +552,44 @@ class TaskInterfaceTestCase(unittest.TestCase):
             call(8, "Install C")
         ])
 
+    def install_with_independent_tasks_test(self):
+        """Install with independent tasks."""
+        self._set_up_task(
+            DBusMetaTask("Task", [
+                TaskInterface(self.InstallationTaskA()),
+                TaskInterface(self.InstallationTaskB()),
+            ], [
+                [TaskInterface(self.IncompleteTask())],
+                [TaskInterface(self.InstallationTaskC())]
+            ])
+        )
+        self._check_steps(8)
+        self._run_task()
+        self._finish_task()
+
+        self.assertEqual(self.task_interface.Progress[0], 8)
+        steps = [c[0][0] for c in self.progress_changed_callback.call_args_list]
+        self.assertEqual(len(steps), 4)
+        self.assertEqual(steps, sorted(steps))
+
+    def install_with_failing_independent_task_test(self):
+        """Install with a failing independent task."""
+        self._set_up_task(
+            DBusMetaTask("Task", [
+                TaskInterface(self.CanceledTask()),
+                TaskInterface(self.InstallationTaskA()),
+            ], [
+                [TaskInterface(self.FailingTask())]
+            ])
+        )
+        self._check_steps(3)
+        self._run_task()
+        self._finish_failed_task()
+
+        # The other task was canceled, the next one wasn't started.
+        names = [c[0][1] for c in self.progress_changed_callback.call_args_list]
+        self.assertNotIn("Install A", names)
+
     class NoReturningTask(Task):
 
         @property
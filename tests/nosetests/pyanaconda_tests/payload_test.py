@@ -23,17 +23,21 @@ import tempfile
 import os
 import hashlib
 import shutil
+import threading
 import gi
 
 from tempfile import TemporaryDirectory
-from unittest.mock import patch, Mock, call
+from unittest.mock import patch, Mock, call, mock_open
 
 from blivet.size import Size
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.modules.common.structures.requirement import Requirement
 from pyanaconda.payload import dnfpayload
 from pyanaconda.payload.flatpak import FlatpakPayload
+from pyanaconda.payload.metadata_cache import RepoMetadataCache
+from pyanaconda.payload.package_cache import PackageCache
 from pyanaconda.payload.dnfpayload import RepoMDMetaHash
 from pyanaconda.payload.requirement import PayloadRequirements
 from pyanaconda.payload.errors import PayloadRequirementsMissingApply
@@ -43,17 +47,26 @@ from gi.repository.Flatpak import RefKind
 
 
 class PickLocation(unittest.TestCase):
+
+    def _plan_downloads(self, free_space, install_space, download_sizes, download_only):
+        root = conf.target.system_root
+        return dnfpayload._plan_downloads(
+            {os.path.normpath(root + "/" + key): val for (key, val) in free_space.items()},
+            {os.path.normpath(root + "/" + key): val for (key, val) in install_space.items()},
+            download_sizes,
+            root,
+            download_only
+        )
+
     def pick_download_location_test(self):
         """Take the biggest mountpoint which can be used for download"""
-        df_map = {os.path.join(conf.target.system_root, "not_used"): Size("20 G"),
-                  os.path.join(conf.target.system_root, "home"): Size("2 G"),
-                  os.path.join(conf.target.system_root): Size("5 G")}
-        download_size = Size("1.5 G")
-        install_size = Size("1.8 G")
+        free_space = {"not_used": Size("20 G"), "home": Size("2 G"), "": Size("5 G")}
+        install_space = {"": Size("1.8 G")}
+        download_sizes = {"anaconda": Size("1.5 G")}
 
-        mpoint = dnfpayload._pick_mpoint(df_map, download_size, install_size, True)
+        plan = self._plan_downloads(free_space, install_space, download_sizes, True)
 
-        self.assertEqual(mpoint, os.path.join(conf.target.system_root, "home"))
+        self.assertEqual(plan, {"anaconda": os.path.join(conf.target.system_root, "home")})
 
     def pick_download_root_test(self):
         """Take the root for download because there are no other available mountpoints
@@ -61,39 +74,438 @@ class PickLocation(unittest.TestCase):
 
            This is required when user skipped the space check.
         """
-        df_map = {os.path.join(conf.target.system_root, "not_used"): Size("20 G"),
-                  os.path.join(conf.target.system_root, "home"): Size("2 G"),
-                  os.path.join(conf.target.system_root): Size("5 G")}
-        download_size = Size("2.5 G")
-        install_size = Size("3.0 G")
+        free_space = {"not_used": Size("20 G"), "home": Size("2 G"), "": Size("5 G")}
+        install_space = {"": Size("3.0 G")}
+        download_sizes = {"anaconda": Size("2.5 G")}
 
-        mpoint = dnfpayload._pick_mpoint(df_map, download_size, install_size, True)
+        plan = self._plan_downloads(free_space, install_space, download_sizes, True)
 
-        self.assertEqual(mpoint, os.path.join(conf.target.system_root))
+        self.assertEqual(plan, {"anaconda": conf.target.system_root})
 
     def pick_install_location_test(self):
-        """Take the root for download and install."""
-        df_map = {os.path.join(conf.target.system_root, "not_used"): Size("20 G"),
-                  os.path.join(conf.target.system_root, "home"): Size("2 G"),
-                  os.path.join(conf.target.system_root): Size("6 G")}
-        download_size = Size("1.5 G")
-        install_size = Size("3.0 G")
+        """Don't take the root for download if another mountpoint is sufficient."""
+        free_space = {"not_used": Size("20 G"), "home": Size("2 G"), "": Size("6 G")}
+        install_space = {"": Size("3.0 G")}
+        download_sizes = {"anaconda": Size("1.5 G")}
+
+        plan = self._plan_downloads(free_space, install_space, download_sizes, False)
 
-        mpoint = dnfpayload._pick_mpoint(df_map, download_size, install_size, False)
+        self.assertEqual(plan, {"anaconda": os.path.join(conf.target.system_root, "home")})
 
-        self.assertEqual(mpoint, conf.target.system_root)
+        # The root is the only sufficient mountpoint.
+        download_sizes = {"anaconda": Size("2.5 G")}
+
+        plan = self._plan_downloads(free_space, install_space, download_sizes, False)
+
+        self.assertEqual(plan, {"anaconda": conf.target.system_root})
 
     def pick_install_location_error_test(self):
         """No suitable location is found."""
-        df_map = {os.path.join(conf.target.system_root, "not_used"): Size("20 G"),
-                  os.path.join(conf.target.system_root, "home"): Size("1 G"),
-                  os.path.join(conf.target.system_root): Size("4 G")}
-        download_size = Size("1.5 G")
-        install_size = Size("3.0 G")
+        free_space = {"not_used": Size("20 G"), "home": Size("1 G"), "": Size("4 G")}
+        install_space = {"": Size("3.0 G")}
+        download_sizes = {"anaconda": Size("1.5 G")}
+
+        plan = self._plan_downloads(free_space, install_space, download_sizes, False)
+
+        self.assertEqual(plan, None)
+
+    def split_download_locations_test(self):
+        """Split the downloads of repositories between mountpoints."""
+        free_space = {"home": Size("2 G"), "var": Size("1.2 G"), "": Size("5 G")}
+        install_space = {"": Size("4.5 G")}
+        download_sizes = {"anaconda": Size("1.5 G"), "updates": Size("1.0 G")}
+
+        plan = self._plan_downloads(free_space, install_space, download_sizes, True)
+
+        self.assertEqual(plan, {
+            "anaconda": os.path.join(conf.target.system_root, "home"),
+            "updates": os.path.join(conf.target.system_root, "var"),
+        })
+
+    def install_space_location_test(self):
+        """Respect the space required by installation on other mountpoints."""
+        free_space = {"var": Size("2 G"), "": Size("5 G")}
+        install_space = {"var": Size("1.5 G"), "": Size("3.0 G")}
+        download_sizes = {"anaconda": Size("1 G")}
+
+        plan = self._plan_downloads(free_space, install_space, download_sizes, False)
+
+        self.assertEqual(plan, {"anaconda": conf.target.system_root})
+
+    def get_mount_point_test(self):
+        """Test finding of a mount point of a path."""
+        mount_points = {"/", "/usr", "/var", "/var/log"}
+
+        self.assertEqual(dnfpayload._get_mount_point("/usr/bin/bash", mount_points), "/usr")
+        self.assertEqual(dnfpayload._get_mount_point("/var/log/messages", mount_points),
+                         "/var/log")
+        self.assertEqual(dnfpayload._get_mount_point("/var/lib/rpm", mount_points), "/var")
+        self.assertEqual(dnfpayload._get_mount_point("/etc/passwd", mount_points), "/")
+        self.assertEqual(dnfpayload._get_mount_point("/usr", mount_points), "/usr")
+
+    def get_mount_points_test(self):
+        """Test reading of mount points."""
+        mounts = "\n".join([
+            "/dev/sda1 / ext4 rw 0 0",
+            "/dev/sda2 /mnt/my\\040disk ext4 rw 0 0",
+            "/dev/sda3 /mnt/back\\134slash ext4 rw 0 0",
+            "/dev/sda4 /mnt/příliš ext4 rw 0 0",
+            "",
+        ])
+
+        with patch("pyanaconda.payload.dnfpayload.open", mock_open(read_data=mounts), create=True):
+            self.assertEqual(dnfpayload._get_mount_points(), [
+                "/", "/mnt/my disk", "/mnt/back\\slash", "/mnt/příliš"
+            ])
+
+
+class LoadReposMetadataTestCase(unittest.TestCase):
+
+    def _get_repo(self, repo_id, load=None):
+        repo = Mock()
+        repo.id = repo_id
+        repo.load = load or Mock()
+        return repo
+
+    def load_repos_metadata_test(self):
+        """Test loading of repositories metadata."""
+        self.assertEqual(dnfpayload._load_repos_metadata([]), [])
+
+        repos = [self._get_repo("r{}".format(i)) for i in range(6)]
+        results = dnfpayload._load_repos_metadata(repos, max_workers=3)
+
+        self.assertEqual(results, [None] * 6)
+        for repo in repos:
+            repo.load.assert_called_once_with()
+
+    def load_repos_metadata_error_test(self):
+        """Test that a failed repository doesn't affect the others."""
+        from dnf.exceptions import RepoError
+
+        failing = self._get_repo("failing", Mock(side_effect=RepoError("Broken!")))
+        repos = [self._get_repo("first"), failing, self._get_repo("last")]
+        results = dnfpayload._load_repos_metadata(repos)
+
+        self.assertEqual(results, [None, "Broken!", None])
+
+    def load_repos_metadata_wait_test(self):
+        """Test that slow repositories are loaded before returning."""
+        import threading
+        import time
+        loaded = threading.Event()
+
+        def load_slowly():
+            time.sleep(0.2)
+            loaded.set()
+
+        slow = self._get_repo("slow", Mock(side_effect=load_slowly))
+        repos = [slow, self._get_repo("fast")]
+        results = dnfpayload._load_repos_metadata(repos)
+
+        self.assertTrue(loaded.is_set())
+        self.assertEqual(results, [None, None])
+
+
+class RepoMetadataCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp(suffix="pyanaconda_tests")
+        self._cache_dir = os.path.join(self._temp_dir, "cache")
+        self._solv_dir = os.path.join(self._temp_dir, "dnf")
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _create_repo_metadata(self, repo_id, size=10):
+        metadata_dir = os.path.join(self._solv_dir, repo_id + "-123456")
+        os.makedirs(os.path.join(metadata_dir, "repodata"))
+        os.makedirs(os.path.join(metadata_dir, "packages"))
+
+        for path in [os.path.join(metadata_dir, "repodata", "repomd.xml"),
+                     os.path.join(metadata_dir, "packages", "package.rpm"),
+                     os.path.join(self._solv_dir, repo_id + ".solv"),
+                     os.path.join(self._solv_dir, repo_id + "-filenames.solvx")]:
+            with open(path, "w") as f:
+                f.write("x" * size)
+
+        return metadata_dir
+
+    def store_and_restore_test(self):
+        """Test storing and restoring of cached metadata."""
+        cache = RepoMetadataCache(self._cache_dir, Size("1 MiB"))
+        metadata_dir = self._create_repo_metadata("fedora")
+
+        self.assertFalse(cache.contains("abcd"))
+        self.assertFalse(cache.store("", "fedora", metadata_dir, self._solv_dir))
+        self.assertTrue(cache.store("abcd", "fedora", metadata_dir, self._solv_dir))
+        self.assertTrue(cache.contains("abcd"))
+
+        # Restore the metadata for a repository with a different id.
+        new_dir = os.path.join(self._solv_dir, "mirror-654321")
+        self.assertTrue(cache.restore("abcd", "mirror", new_dir, self._solv_dir))
+        self.assertTrue(os.path.exists(os.path.join(new_dir, "repodata", "repomd.xml")))
+        self.assertFalse(os.path.exists(os.path.join(new_dir, "packages")))
+        self.assertTrue(os.path.exists(os.path.join(self._solv_dir, "mirror.solv")))
+        self.assertTrue(os.path.exists(os.path.join(self._solv_dir, "mirror-filenames.solvx")))
+
+        self.assertFalse(cache.restore("efgh", "mirror", new_dir, self._solv_dir))
+
+        cache.clear()
+        self.assertFalse(cache.contains("abcd"))
+
+    def evict_test(self):
+        """Test eviction of the least recently used metadata."""
+        cache = RepoMetadataCache(self._cache_dir, Size("2500 B"))
+
+        for key in ["a", "b"]:
+            metadata_dir = self._create_repo_metadata(key, size=400)
+            self.assertTrue(cache.store(key, key, metadata_dir, self._solv_dir))
 
-        mpoint = dnfpayload._pick_mpoint(df_map, download_size, install_size, False)
+        os.utime(os.path.join(self._cache_dir, "a"), (1, 1))
+        os.utime(os.path.join(self._cache_dir, "b"), (2, 2))
+        self.assertEqual(cache.size, Size("2400 B"))
 
-        self.assertEqual(mpoint, None)
+        metadata_dir = self._create_repo_metadata("c", size=400)
+        self.assertTrue(cache.store("c", "c", metadata_dir, self._solv_dir))
+        self.assertFalse(cache.contains("a"))
+        self.assertTrue(cache.contains("b"))
+        self.assertTrue(cache.contains("c"))
+
+    def hardlink_test(self):
+        """Test hardlinking of cached metadata."""
+        cache = RepoMetadataCache(self._cache_dir, Size("1 MiB"))
+        metadata_dir = self._create_repo_metadata("fedora", size=400)
+        solv_path = os.path.join(self._solv_dir, "fedora.solv")
+
+        # The files are linked, so they are counted only once.
+        self.assertTrue(cache.store("a", "fedora", metadata_dir, self._solv_dir))
+        self.assertTrue(cache.store("b", "fedora", metadata_dir, self._solv_dir))
+        self.assertEqual(cache.size, Size("1200 B"))
+
+        cached_path = os.path.join(self._cache_dir, "a", "solv", "repo.solv")
+        self.assertTrue(os.path.samefile(solv_path, cached_path))
+
+        # The restored files replace the existing ones.
+        os.unlink(solv_path)
+
+        with open(solv_path, "w") as f:
+            f.write("y")
+
+        self.assertTrue(cache.restore("a", "fedora", metadata_dir, self._solv_dir))
+        self.assertTrue(os.path.samefile(solv_path, cached_path))
+
+        with open(cached_path) as f:
+            self.assertEqual(f.read(), "x" * 400)
+
+    @patch("pyanaconda.payload.utils.os.link", side_effect=OSError)
+    def copy_test(self, link):
+        """Test copying of cached metadata."""
+        cache = RepoMetadataCache(self._cache_dir, Size("1 MiB"))
+        metadata_dir = self._create_repo_metadata("fedora", size=400)
+
+        self.assertTrue(cache.store("a", "fedora", metadata_dir, self._solv_dir))
+        link.assert_called()
+
+        cached_path = os.path.join(self._cache_dir, "a", "solv", "repo.solv")
+        solv_path = os.path.join(self._solv_dir, "fedora.solv")
+        self.assertFalse(os.path.samefile(solv_path, cached_path))
+        self.assertEqual(cache.size, Size("1200 B"))
+
+
+class PackageCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp(suffix="pyanaconda_tests")
+        self._cache_dir = os.path.join(self._temp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _get_package(self, name, size=100, checksum=None):
+        if checksum is None:
+            checksum = hashlib.sha256(b"x" * size).hexdigest()
+
+        package = Mock()
+        package.name = name
+        package.evr = "1.0-1"
+        package.arch = "x86_64"
+        package.downloadsize = size
+        package.returnIdSum.return_value = ("sha256", checksum)
+        return package
+
+    def _create_file(self, name, size):
+        path = os.path.join(self._temp_dir, name)
+        with open(path, "w") as f:
+            f.write("x" * size)
+        return path
+
+    def package_path_test(self):
+        """Test paths of cached packages."""
+        cache = PackageCache(self._cache_dir, Size("1 MiB"))
+
+        self.assertEqual(cache.get_package_path(self._get_package("bash", checksum="abcd")),
+                         os.path.join(self._cache_dir, "bash-1.0-1.x86_64-sha256-abcd.rpm"))
+        self.assertIsNone(cache.get_package_path(self._get_package("bash", checksum="")))
+
+    def store_and_restore_test(self):
+        """Test storing and restoring of cached packages."""
+        cache = PackageCache(self._cache_dir, Size("1 MiB"))
+        package = self._get_package("bash")
+        path = self._create_file("bash.rpm", 100)
+        restored_path = os.path.join(self._temp_dir, "download", "bash.rpm")
+
+        self.assertFalse(cache.restore(package, restored_path))
+        self.assertFalse(cache.store(package, restored_path))
+        self.assertTrue(cache.store(package, path))
+        self.assertEqual(cache.size, Size("100 B"))
+
+        self.assertTrue(cache.restore(package, restored_path))
+        self.assertTrue(os.path.exists(restored_path))
+
+        # A different checksum means a different package.
+        self.assertFalse(cache.restore(self._get_package("bash", checksum="efgh"), restored_path))
+
+    def invalid_entry_test(self):
+        """Test replacing of invalid cached packages."""
+        cache = PackageCache(self._cache_dir, Size("1 MiB"))
+        package = self._get_package("bash")
+        restored_path = os.path.join(self._temp_dir, "download", "bash.rpm")
+
+        # A truncated package.
+        os.makedirs(self._cache_dir)
+        cached_path = cache.get_package_path(package)
+
+        with open(cached_path, "w") as f:
+            f.write("x" * 50)
+
+        self.assertFalse(cache.restore(package, restored_path))
+        self.assertFalse(os.path.exists(restored_path))
+
+        # A downloaded package replaces the cached one.
+        self.assertTrue(cache.store(package, self._create_file("bash.rpm", 100)))
+        self.assertEqual(os.path.getsize(cached_path), 100)
+        self.assertTrue(cache.restore(package, restored_path))
+
+        with open(restored_path, "r") as f:
+            self.assertEqual(f.read(), "x" * 100)
+
+    def link_test(self):
+        """Test hardlinking of cached packages."""
+        cache = PackageCache(self._cache_dir, Size("1 MiB"))
+        package = self._get_package("bash")
+        path = self._create_file("bash.rpm", 100)
+        restored_path = os.path.join(self._temp_dir, "download", "bash.rpm")
+
+        self.assertTrue(cache.store(package, path))
+        cached_path = cache.get_package_path(package)
+        self.assertTrue(os.path.samefile(path, cached_path))
+
+        # Replace an existing file in the download location.
+        os.makedirs(os.path.dirname(restored_path))
+        self._create_file(restored_path, 10)
+
+        self.assertTrue(cache.restore(package, restored_path))
+        self.assertTrue(os.path.samefile(restored_path, cached_path))
+
+        # The package is already stored.
+        self.assertTrue(cache.store(package, restored_path))
+        self.assertEqual(cache.size, Size("100 B"))
+
+    @patch("pyanaconda.payload.utils.os.link", side_effect=OSError)
+    def copy_test(self, link):
+        """Test copying of cached packages."""
+        cache = PackageCache(self._cache_dir, Size("1 MiB"))
+        package = self._get_package("bash")
+        path = self._create_file("bash.rpm", 100)
+        restored_path = os.path.join(self._temp_dir, "download", "bash.rpm")
+
+        self.assertTrue(cache.store(package, path))
+        self.assertTrue(cache.restore(package, restored_path))
+        link.assert_called()
+
+        self.assertFalse(os.path.samefile(restored_path, cache.get_package_path(package)))
+
+    def evict_test(self):
+        """Test eviction of the least recently used packages."""
+        cache = PackageCache(self._cache_dir, Size("250 B"))
+
+        for i, name in enumerate(["a", "b", "c"]):
+            package = self._get_package(name)
+            self.assertTrue(cache.store(package, self._create_file(name, 100)))
+            os.utime(cache.get_package_path(package), (i, i))
+
+        self.assertEqual(cache.size, Size("300 B"))
+        cache.evict()
+        self.assertEqual(cache.size, Size("200 B"))
+        self.assertFalse(os.path.exists(cache.get_package_path(self._get_package("a"))))
+
+class PayloadRPMDisplayTestCase(unittest.TestCase):
+
+    def _get_package(self, name):
+        package = Mock()
+        package.name = name
+        package.arch = "noarch"
+        package.evr = "1.0-1"
+        package.buildtime = 0
+        package.returnIdSum.return_value = ("sha256", "abcd")
+        return package
+
+    def _get_messages(self, queue):
+        return [c[0][0] for c in queue.put.call_args_list]
+
+    def coalesced_progress_test(self):
+        """Test that the progress of the transaction is coalesced."""
+        from dnf.transaction import PKG_INSTALL, TRANS_POST, PKG_VERIFY
+
+        queue = Mock()
+        display = dnfpayload.PayloadRPMDisplay(queue, bytes_total=300)
+        packages = [self._get_package(name) for name in ["a", "b", "c"]]
+
+        for i, package in enumerate(packages, start=1):
+            display.progress(package, PKG_INSTALL, 0, 100, i, 3)
+            display.progress(package, PKG_INSTALL, 100, 100, i, 3)
+
+        # Only the first update is sent immediately.
+        messages = self._get_messages(queue)
+        self.assertEqual(messages, [
+            ('log', ["Installed: a-1.0-1.noarch 0 abcd"]),
+            ('progress', dnfpayload.TransactionProgressState("install", "a.noarch", 1, 3, 0, 300))
+        ])
+
+        display.progress(None, TRANS_POST, 0, 0, 3, 3)
+        messages = self._get_messages(queue)
+        self.assertEqual(messages[2][0], 'log')
+        self.assertEqual(len(messages[2][1]), 3)
+        self.assertEqual(messages[3], (
+            'progress', dnfpayload.TransactionProgressState("install", "c.noarch", 3, 3, 300, 300)
+        ))
+        self.assertEqual(messages[3][1].percentage, 100)
+        self.assertEqual(messages[4], ('post', None))
+
+        for i, package in enumerate(packages, start=1):
+            display.progress(package, PKG_VERIFY, 0, 0, i, 3)
+
+        messages = self._get_messages(queue)
+        self.assertEqual(messages[-1], ('done', None))
+        self.assertEqual(messages[-2][1].phase, "verify")
+        self.assertEqual(messages[-2][1].done, 3)
+
+    def progress_percentage_test(self):
+        """Test the percentage of the transaction progress."""
+        state = dnfpayload.TransactionProgressState("install", "a", 1, 2, 50, 200)
+        self.assertEqual(state.percentage, 25)
+
+        state = dnfpayload.TransactionProgressState("install", "a", 1, 2, 50, 0)
+        self.assertEqual(state.percentage, 0)
+
+        state = dnfpayload.TransactionProgressState("verify", "a", 1, 2, 200, 200)
+        self.assertEqual(state.percentage, 100)
+
+        state = dnfpayload.TransactionProgressState("verify", "a", 1, 2, 100, 200)
+        self.assertEqual(state.percentage, 50)
+
+        state = dnfpayload.TransactionProgressState("verify", "a", 1, 2, 0, 0)
+        self.assertEqual(state.percentage, 100)
 
 
 class DummyRepo(object):
@@ -163,6 +575,94 @@ or it should be. Nah it's just a test!
         os.remove(self._md_file)
         self.assertFalse(r.verify_repoMD())
 
+    def verify_repo_not_modified_test(self):
+        """Test verification with a conditional request."""
+        session = Mock()
+        session.get.return_value = Mock(ok=True, status_code=200, text="repomd",
+                                        headers={"ETag": '"123"'})
+
+        self._dummyRepo.baseurl = ["http://server/repo"]
+        r = RepoMDMetaHash(DummyPayload(), self._dummyRepo, session)
+        r.store_repoMD_hash()
+
+        self.assertNotIn("If-None-Match", session.get.call_args[1]["headers"])
+        self.assertIn("http://server/repo", r.latencies)
+
+        session.get.return_value = Mock(ok=False, status_code=304, text="", headers={})
+        self.assertTrue(r.verify_repoMD())
+        self.assertEqual(session.get.call_args[1]["headers"]["If-None-Match"], '"123"')
+
+    def verify_repo_validators_url_test(self):
+        """Test that the validators are used only for the url of the stored file."""
+        released = threading.Event()
+
+        def get(url, headers, **kwargs):
+            if url.startswith("http://first/"):
+                if first_down.is_set():
+                    raise RequestsConnectionError("Connection refused.")
+
+                return Mock(ok=True, status_code=200, text="repomd", headers={"ETag": '"1"'})
+
+            # The second url answers after the first one.
+            released.wait(timeout=10)
+
+            if headers.get("If-None-Match") == '"2"':
+                return Mock(ok=False, status_code=304, text="", headers={})
+
+            return Mock(ok=True, status_code=200, text="other", headers={"ETag": '"2"'})
+
+        first_down = threading.Event()
+        session = Mock()
+        session.get.side_effect = get
+
+        self._dummyRepo.baseurl = ["http://first/repo", "http://second/repo"]
+        r = RepoMDMetaHash(DummyPayload(), self._dummyRepo, session)
+        r.store_repoMD_hash()
+        self.assertEqual(r.repoMD_hash, RepoMDMetaHash._calculate_hash("repomd"))
+        released.set()
+
+        # The second url has to return its file, so the change is detected.
+        session.get.reset_mock()
+        first_down.set()
+        self.assertFalse(r.verify_repoMD())
+
+        headers = {args[0]: kwargs["headers"] for args, kwargs in session.get.call_args_list}
+        self.assertEqual(headers["http://first/repo/repodata/repomd.xml"]["If-None-Match"], '"1"')
+        self.assertNotIn("If-None-Match", headers["http://second/repo/repodata/repomd.xml"])
+
+    def verify_repo_stored_url_test(self):
+        """Test that the url of the stored file is verified first."""
+        def get(url, headers, **kwargs):
+            if url.startswith("http://first/"):
+                return Mock(ok=True, status_code=200, text="repomd", headers={})
+
+            # The second mirror isn't synchronized yet.
+            return Mock(ok=True, status_code=200, text="other", headers={})
+
+        session = Mock()
+        session.get.side_effect = get
+
+        self._dummyRepo.baseurl = ["http://first/repo", "http://second/repo"]
+        r = RepoMDMetaHash(DummyPayload(), self._dummyRepo, session)
+
+        with patch.object(r, "_download_repoMD",
+                          return_value=("repomd", "http://first/repo", {})):
+            r.store_repoMD_hash()
+
+        # The other mirror is not queried.
+        self.assertTrue(r.verify_repoMD())
+        session.get.assert_called_once()
+        self.assertEqual(session.get.call_args[0][0], "http://first/repo/repodata/repomd.xml")
+
+    def verify_repo_multiple_urls_test(self):
+        """Test verification of a repository with multiple urls."""
+        self._dummyRepo.baseurl = ["file:///nonexistent/path", "file://" + self._temp_dir]
+        r = RepoMDMetaHash(DummyPayload(), self._dummyRepo)
+        r.store_repoMD_hash()
+        self.assertEqual(r.repoMD_hash, RepoMDMetaHash._calculate_hash(self._content_repomd))
+        self.assertTrue(r.verify_repoMD())
+        self.assertIn("file://" + self._temp_dir, r.latencies)
+
 
 class PayloadRequirementsTestCase(unittest.TestCase):
 
@@ -0,0 +1,99 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import threading
+import time
+import unittest
+
+from pyanaconda.core.startup.timeline import StartupTimeline
+
+
+class StartupTimelineTestCase(unittest.TestCase):
+
+    def checkpoint_test(self):
+        """Test the checkpoints of the main thread."""
+        origin = time.monotonic()
+        timeline = StartupTimeline(origin=origin)
+
+        timeline.checkpoint("first")
+        timeline.checkpoint("second")
+
+        steps = timeline.steps
+        self.assertEqual([step.name for step in steps], ["first", "second"])
+        self.assertEqual(steps[0].start, origin)
+        self.assertEqual(steps[1].start, steps[0].end)
+        self.assertLessEqual(steps[1].start, steps[1].end)
+
+    def wrap_test(self):
+        """Test the jobs of background threads."""
+        timeline = StartupTimeline()
+        release = threading.Event()
+        started = threading.Event()
+
+        def run(value):
+            started.set()
+            release.wait()
+            return value * 2
+
+        job = timeline.wrap("job", run)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(job(21)))
+        thread.start()
+
+        started.wait()
+        self.assertEqual(list(timeline.running_jobs), ["job"])
+        self.assertEqual(timeline.jobs, [])
+
+        with self.assertLogs("anaconda", level="INFO") as cm:
+            timeline.log_critical_path("milestone")
+
+        self.assertTrue(any("still running" in line for line in cm.output))
+
+        release.set()
+        thread.join()
+
+        self.assertEqual(results, [42])
+        self.assertEqual(timeline.running_jobs, {})
+        self.assertEqual([j.name for j in timeline.jobs], ["job"])
+
+    def wrap_failure_test(self):
+        """Test a failed job of a background thread."""
+        timeline = StartupTimeline()
+
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            timeline.wrap("job", fail)()
+
+        self.assertEqual([j.name for j in timeline.jobs], ["job"])
+        self.assertEqual(timeline.running_jobs, {})
+
+    def log_critical_path_test(self):
+        """Test the log of the critical path."""
+        timeline = StartupTimeline()
+        timeline.checkpoint("display")
+        timeline.wrap("storage scan", lambda: None)()
+
+        with self.assertLogs("anaconda", level="INFO") as cm:
+            timeline.log_critical_path("first screen")
+
+        self.assertIn("Reached the first screen", cm.output[0])
+        self.assertIn("display", cm.output[1])
+        self.assertIn("first screen", cm.output[2])
+        self.assertIn("storage scan", cm.output[3])
+        self.assertEqual([step.name for step in timeline.steps], ["display", "first screen"])
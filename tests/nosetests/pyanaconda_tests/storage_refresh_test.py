@@ -0,0 +1,194 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from unittest.mock import Mock, patch, call
+
+from pyanaconda.storage.osinstall import InstallerStorage
+from pyanaconda.storage.refresh import get_udev_changes, find_stale_devices, UdevChanges, \
+    drop_device_info_cache
+
+
+class StorageRefreshTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.devices = {}
+        self.dependents = {}
+        self.devicetree = Mock(_hidden=[])
+        self.devicetree.get_device_by_sysfs_path.side_effect = \
+            lambda path, **kwargs: self.devices.get(path)
+        self.devicetree.get_dependent_devices.side_effect = \
+            lambda device, **kwargs: self.dependents.get(device.id, [])
+
+    def _add_device(self, device_id, path, device_type="disk", parents=(), dependents=()):
+        device = Mock(id=device_id, type=device_type, is_disk=device_type == "disk",
+                      protected=False, parents=list(parents))
+        device.name = path.split("/")[-1]
+        device.ancestors = [device] + [a for p in parents for a in p.ancestors]
+        self.devices[path] = device
+        self.dependents[device_id] = list(dependents)
+        return device
+
+    def udev_changes_test(self):
+        """Test the changes of udev snapshots."""
+        old = {"/sda": (1, ), "/sdb": (2, ), "/sdc": (3, )}
+        new = {"/sda": (1, ), "/sdb": (4, ), "/sdd": (5, )}
+
+        changes = get_udev_changes(old, new)
+        self.assertEqual(changes.added, {"/sdd"})
+        self.assertEqual(changes.removed, {"/sdc"})
+        self.assertEqual(changes.changed, {"/sdb"})
+        self.assertFalse(any(get_udev_changes(old, old)))
+
+    def added_disk_test(self):
+        """Test an added disk."""
+        self._add_device(1, "/sda")
+        infos = [{"SYS_PATH": "/sda"}, {"SYS_PATH": "/sdb"}]
+        changes = UdevChanges(added={"/sdb"}, removed=set(), changed=set())
+
+        self.assertEqual(find_stale_devices(self.devicetree, infos, changes), [])
+
+    def added_partition_test(self):
+        """Test an added partition."""
+        disk = self._add_device(1, "/sda")
+        infos = [
+            {"SYS_PATH": "/sda", "MAJOR": "8", "MINOR": "0"},
+            {"SYS_PATH": "/sda/sda1", "ID_PART_ENTRY_DISK": "8:0"},
+        ]
+        changes = UdevChanges(added={"/sda/sda1"}, removed=set(), changed=set())
+
+        self.assertEqual(find_stale_devices(self.devicetree, infos, changes), [disk])
+
+    def changed_partition_test(self):
+        """Test changed partitions of one disk."""
+        disk = self._add_device(1, "/sda")
+        part1 = self._add_device(2, "/sda/sda1", "partition", parents=[disk])
+        part2 = self._add_device(3, "/sda/sda2", "partition", parents=[disk])
+        part1.disk = disk
+        part2.disk = disk
+        self.dependents[1] = [part1, part2]
+
+        changes = UdevChanges(added=set(), removed={"/sda/sda2"}, changed={"/sda/sda1"})
+        self.assertEqual(find_stale_devices(self.devicetree, [], changes), [disk])
+
+    def changed_lvm_and_luks_test(self):
+        """Test changed LVM and LUKS devices on one disk."""
+        disk = self._add_device(1, "/sda")
+        pv = self._add_device(2, "/sda/sda1", "partition", parents=[disk])
+        vg = self._add_device(3, "/vg", "lvmvg", parents=[pv])
+        lv = self._add_device(4, "/dm-0", "lvmlv", parents=[vg])
+        part = self._add_device(5, "/sda/sda2", "partition", parents=[disk])
+        luks = self._add_device(6, "/dm-1", "luks/dm-crypt", parents=[part])
+        pv.disk = disk
+        part.disk = disk
+        self.dependents[1] = [pv, vg, lv, part, luks]
+
+        # A new physical volume and a new LUKS device.
+        changes = UdevChanges(added=set(), removed=set(), changed={"/sda/sda1", "/sda/sda2"})
+        self.assertEqual(find_stale_devices(self.devicetree, [], changes), [disk])
+
+        # A new logical volume on the rescanned disk.
+        infos = [{"SYS_PATH": "/sda"}, {"SYS_PATH": "/dm-2"}]
+        changes = UdevChanges(added={"/dm-2"}, removed=set(), changed={"/sda/sda1"})
+        self.assertEqual(find_stale_devices(self.devicetree, infos, changes), [disk])
+
+        # A volume group extended to another disk.
+        disk2 = self._add_device(7, "/sdb")
+        pv2 = self._add_device(8, "/sdb/sdb1", "partition", parents=[disk2])
+        pv2.disk = disk2
+        vg.parents.append(pv2)
+        self.dependents[7] = [pv2, vg, lv]
+
+        changes = UdevChanges(added=set(), removed=set(), changed={"/sda/sda1"})
+        self.assertIsNone(find_stale_devices(self.devicetree, [], changes))
+
+    @patch("pyanaconda.storage.refresh.mpath_members")
+    @patch("pyanaconda.storage.refresh.pvs_info")
+    @patch("pyanaconda.storage.refresh.lvs_info")
+    @patch("pyanaconda.storage.refresh.udev")
+    def drop_device_info_cache_test(self, udev, lvs_info, pvs_info, mpath_members):
+        """Test the preparation of a new scan."""
+        drop_device_info_cache()
+        udev.settle.assert_called_once_with()
+        lvs_info.drop_cache.assert_called_once_with()
+        pvs_info.drop_cache.assert_called_once_with()
+        mpath_members.drop_cache.assert_called_once_with()
+
+    @patch("pyanaconda.storage.osinstall.find_stale_devices")
+    @patch("pyanaconda.storage.osinstall.get_udev_snapshot")
+    @patch("pyanaconda.storage.osinstall.udev")
+    @patch("pyanaconda.storage.osinstall.drop_device_info_cache")
+    def refresh_test(self, drop_cache, udev, get_snapshot, find_stale):
+        """Test that the caches are dropped before the devices are scanned."""
+        manager = Mock()
+        manager.attach_mock(drop_cache, "drop_cache")
+        manager.attach_mock(udev.get_devices, "get_devices")
+
+        storage = Mock(_udev_snapshot={"/sda": (1, )})
+        storage._can_refresh.return_value = True
+        get_snapshot.return_value = {"/sda": (2, )}
+        find_stale.return_value = []
+
+        InstallerStorage.refresh(storage)
+        self.assertEqual(manager.mock_calls[:2], [call.drop_cache(), call.get_devices()])
+        storage._refresh_devices.assert_called_once()
+
+    @patch("pyanaconda.storage.osinstall.find_existing_installations")
+    @patch("pyanaconda.storage.osinstall.get_udev_snapshot")
+    @patch("pyanaconda.storage.osinstall.udev")
+    @patch("pyanaconda.storage.osinstall.drop_device_info_cache")
+    def refresh_unchanged_test(self, drop_cache, udev, get_snapshot, find_installations):
+        """Test that the existing installations are searched without changed devices."""
+        storage = Mock(_udev_snapshot={"/sda": (1, )})
+        storage._can_refresh.return_value = True
+        storage._refresh_existing_installations = \
+            lambda: InstallerStorage._refresh_existing_installations(storage)
+        get_snapshot.return_value = {"/sda": (1, )}
+        find_installations.return_value = ["root"]
+
+        InstallerStorage.refresh(storage)
+        storage._refresh_devices.assert_not_called()
+        find_installations.assert_called_once_with(storage.devicetree)
+        self.assertEqual(storage.roots, ["root"])
+
+    def unsupported_changes_test(self):
+        """Test changes that require a full reset."""
+        disk1 = self._add_device(1, "/sda")
+        disk2 = self._add_device(2, "/sdb")
+        vg = self._add_device(3, "/vg", "lvmvg", parents=[disk1, disk2])
+        self.dependents[1] = [vg]
+        self.dependents[2] = [vg]
+
+        # A changed device that is not a disk or a partition.
+        changes = UdevChanges(added=set(), removed=set(), changed={"/vg"})
+        self.assertIsNone(find_stale_devices(self.devicetree, [], changes))
+
+        # A changed disk shared with other disks.
+        changes = UdevChanges(added=set(), removed=set(), changed={"/sda"})
+        self.assertIsNone(find_stale_devices(self.devicetree, [], changes))
+
+        # A changed protected disk.
+        disk3 = self._add_device(4, "/sdc")
+        disk3.protected = True
+        changes = UdevChanges(added=set(), removed=set(), changed={"/sdc"})
+        self.assertIsNone(find_stale_devices(self.devicetree, [], changes))
+
+        # A changed hidden disk.
+        disk4 = self._add_device(5, "/sdd")
+        self.devicetree._hidden.append(disk4)
+        changes = UdevChanges(added=set(), removed=set(), changed={"/sdd"})
+        self.assertIsNone(find_stale_devices(self.devicetree, [], changes))
@@ -0,0 +1,210 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import struct
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from pyanaconda.storage import root
+from pyanaconda.storage.root import find_existing_installations
+
+
+def _create_ext_superblock(mount_count=1, write_time=100):
+    """Create the start of a device with the ext superblock."""
+    data = bytearray(4096)
+    data[1024 + 0x38:1024 + 0x3A] = b"\x53\xef"
+    struct.pack_into("<I", data, 1024 + 0x30, write_time)
+    struct.pack_into("<H", data, 1024 + 0x34, mount_count)
+    return bytes(data)
+
+
+def _create_btrfs_superblock(generation=1):
+    """Create the start of a device with the btrfs superblock."""
+    data = bytearray(0x10000 + 4096)
+    data[0x10000 + 0x40:0x10000 + 0x48] = b"_BHRfS_M"
+    struct.pack_into("<Q", data, 0x10000 + 0x48, generation)
+    return bytes(data)
+
+
+def _create_xfs_superblock(version=5, lsn=1):
+    """Create the start of a device with the xfs superblock."""
+    data = bytearray(4096)
+    data[0:4] = b"XFSB"
+    struct.pack_into(">H", data, 100, version)
+    struct.pack_into(">Q", data, 240, lsn)
+    return bytes(data)
+
+
+class FindExistingInstallationsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        root._probe_cache.clear()
+        self._superblocks = {}
+
+        patcher = patch("pyanaconda.storage.root._read_superblock_area")
+        read_superblock_area = patcher.start()
+        read_superblock_area.side_effect = lambda d: self._superblocks.get(d.path)
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        root._probe_cache.clear()
+
+    def _create_device(self, device_id, superblock, fmt="ext4", uuid="uuid"):
+        path = "/dev/dev{}".format(device_id)
+        self._superblocks[path] = superblock
+
+        device = Mock(id=device_id, direct=True, controllable=True, path=path)
+        device.name = "dev{}".format(device_id)
+        device.format.type = fmt
+        device.format.uuid = uuid
+        device.format.linux_native = True
+        device.format.mountable = True
+        device.format.exists = True
+        return device
+
+    def change_counters_test(self):
+        """Test the change counters of the file systems."""
+        get_counters = root._get_change_counters
+
+        ext = get_counters("ext4", _create_ext_superblock())
+        self.assertIsNotNone(ext)
+        self.assertNotEqual(get_counters("ext4", _create_ext_superblock(mount_count=2)), ext)
+        self.assertNotEqual(get_counters("ext4", _create_ext_superblock(write_time=200)), ext)
+        self.assertEqual(get_counters("ext4", _create_ext_superblock()), ext)
+
+        btrfs = get_counters("btrfs", _create_btrfs_superblock())
+        self.assertIsNotNone(btrfs)
+        self.assertNotEqual(get_counters("btrfs", _create_btrfs_superblock(2)), btrfs)
+
+        xfs = get_counters("xfs", _create_xfs_superblock())
+        self.assertIsNotNone(xfs)
+        self.assertNotEqual(get_counters("xfs", _create_xfs_superblock(lsn=2)), xfs)
+        self.assertIsNone(get_counters("xfs", _create_xfs_superblock(version=4)))
+
+        self.assertIsNone(get_counters("ext4", bytes(4096)))
+        self.assertIsNone(get_counters("ext4", None))
+        self.assertIsNone(get_counters("btrfs", _create_ext_superblock()))
+        self.assertIsNone(get_counters("vfat", _create_ext_superblock()))
+
+    @patch("pyanaconda.storage.root._parse_installation_files")
+    @patch("pyanaconda.storage.root._probe_device")
+    def cached_probe_test(self, probe_device, parse_files):
+        """Test the cache of probed devices."""
+        devicetree = Mock()
+        root_device = self._create_device(1, _create_ext_superblock(), uuid="a")
+        home_device = self._create_device(2, _create_ext_superblock(), uuid="b")
+        data_device = self._create_device(3, _create_xfs_superblock(version=4), "xfs", "c")
+
+        files = {"etc/fstab": "UUID=a / ext4 defaults 0 0\n"}
+        probe_device.side_effect = lambda d: ("My Linux", files) if d is root_device else None
+        parse_files.return_value = ({"/": root_device}, [])
+
+        devices = [root_device, home_device, data_device]
+        roots = find_existing_installations(devicetree, teardown_all=False, devices=devices)
+
+        self.assertEqual([r.name for r in roots], ["My Linux"])
+        self.assertEqual(roots[0].mounts, {"/": root_device})
+        self.assertEqual(sorted(c[0][0].id for c in probe_device.call_args_list), [1, 2, 3])
+        parse_files.assert_called_once_with(devicetree, files)
+
+        # Use the cached results. The device without counters is probed again.
+        probe_device.reset_mock()
+        roots = find_existing_installations(devicetree, teardown_all=False, devices=devices)
+        self.assertEqual([r.name for r in roots], ["My Linux"])
+        probe_device.assert_called_once_with(data_device)
+
+        # Probe the changed device again.
+        probe_device.reset_mock()
+        self._superblocks[home_device.path] = _create_ext_superblock(mount_count=2)
+        find_existing_installations(devicetree, teardown_all=False, devices=devices[:2])
+        probe_device.assert_called_once_with(home_device)
+
+    @patch("pyanaconda.storage.root._probe_device")
+    def failed_probe_test(self, probe_device):
+        """Test a failed probe of a device."""
+        device = self._create_device(1, _create_ext_superblock())
+        probe_device.return_value = root._PROBE_FAILED
+
+        roots = find_existing_installations(Mock(), teardown_all=False, devices=[device])
+        self.assertEqual(roots, [])
+        self.assertEqual(root._probe_cache, {})
+
+    @patch("pyanaconda.storage.root._parse_installation_files")
+    @patch("pyanaconda.storage.root._probe_device")
+    def same_uuid_probe_test(self, probe_device, parse_files):
+        """Test the probe of devices with the same UUID."""
+        devices = [self._create_device(i, _create_ext_superblock(write_time=i), uuid=uuid)
+                   for i, uuid in enumerate(["a", "a", "a", "b"])]
+
+        lock = threading.Lock()
+        mounted = []
+        probed = []
+
+        def probe(device):
+            with lock:
+                self.assertNotIn(device.format.uuid, mounted)
+                mounted.append(device.format.uuid)
+
+            time.sleep(0.05)
+
+            with lock:
+                mounted.remove(device.format.uuid)
+                probed.append(device)
+
+            return "My Linux", {}
+
+        probe_device.side_effect = probe
+        parse_files.return_value = ({"/": Mock()}, [])
+
+        roots = find_existing_installations(Mock(), teardown_all=False, devices=devices)
+        self.assertEqual(len(roots), 4)
+        self.assertEqual(sorted(d.id for d in probed), [0, 1, 2, 3])
+
+    @patch("pyanaconda.storage.root._parse_installation_files")
+    @patch("pyanaconda.storage.root._probe_device")
+    def unknown_release_test(self, probe_device, parse_files):
+        """Test the name of an installation with an unknown release."""
+        device = self._create_device(1, _create_ext_superblock())
+        probe_device.return_value = (None, {})
+        parse_files.return_value = ({"/": device}, [])
+
+        roots = find_existing_installations(Mock(), teardown_all=False, devices=[device])
+        self.assertEqual([r.name for r in roots], ["Linux on dev1"])
+
+        # The cached result uses the new name of the device.
+        device.name = "renamed"
+        roots = find_existing_installations(Mock(), teardown_all=False, devices=[device])
+        self.assertEqual([r.name for r in roots], ["Linux on renamed"])
+        probe_device.assert_called_once_with(device)
+
+    def parse_installation_files_test(self):
+        """Test the parsing of the installation files."""
+        devicetree = Mock()
+        root_device = Mock()
+        swap_device = Mock()
+        devicetree.resolve_device.side_effect = \
+            lambda spec, **kwargs: {"UUID=a": root_device, "UUID=b": swap_device}.get(spec)
+
+        files = {"etc/fstab": "UUID=a / ext4 defaults 0 0\n"
+                              "UUID=b swap swap defaults 0 0\n"
+                              "UUID=c /home ext4 defaults 0 0\n"}
+
+        mounts, swaps = root._parse_installation_files(devicetree, files)
+        self.assertEqual(mounts, {"/": root_device})
+        self.assertEqual(swaps, [swap_device])
@@ -0,0 +1,107 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from unittest.mock import Mock, patch
+
+from blivet.devices import DiskDevice, StorageDevice
+from blivet.formats import get_format
+
+from pyanaconda.storage.osinstall import InstallerStorage
+from pyanaconda.storage.snapshot import StorageSnapshot
+
+
+class StorageCopyTestCase(unittest.TestCase):
+    """Test the copies of the storage model."""
+
+    def setUp(self):
+        self.storage = InstallerStorage()
+        self.storage.ignored_disks = ["sdc"]
+        self.storage.protected_devices = ["sdb"]
+
+        self.disk = DiskDevice("sda", fmt=get_format("ext4", exists=True), exists=True)
+        self.storage.devicetree._add_device(self.disk)
+
+        self.luks = StorageDevice("sdb", fmt=get_format("luks", exists=True), exists=True)
+        self.storage.devicetree._add_device(self.luks)
+
+        self.storage.roots = [Mock()]
+        self.storage.bootloader.stage1_device = self.disk
+        self.storage._udev_snapshot = {"/devices/sda": ("sda",)}
+
+    def copy_test(self):
+        """Test the copy of the storage model."""
+        new = self.storage.copy()
+
+        self.assertEqual([d.name for d in new.devices], ["sda", "sdb"])
+        self.assertIsNot(new.devices[0], self.disk)
+        self.assertEqual(new.ignored_disks, ["sdc"])
+        self.assertEqual(new._udev_snapshot, self.storage._udev_snapshot)
+        self.assertIsNot(new._udev_snapshot, self.storage._udev_snapshot)
+
+    @patch.object(InstallerStorage, "save_passphrase")
+    def copy_without_devices_test(self, save_passphrase):
+        """Test the copy of the storage model without devices."""
+        new = self.storage.copy(devices=False)
+
+        self.assertEqual(new.devices, [])
+        self.assertIsNot(new.devicetree, self.storage.devicetree)
+        self.assertIs(new.fsset.devicetree, new.devicetree)
+        self.assertEqual(new.roots, [])
+        self.assertEqual(new.ignored_disks, ["sdc"])
+        self.assertEqual(new.protected_devices, ["sdb"])
+        self.assertIsNone(new.bootloader.stage1_device)
+        self.assertIsNot(new.bootloader, self.storage.bootloader)
+        self.assertIsNone(new._udev_snapshot)
+        save_passphrase.assert_called_once_with(self.luks)
+
+        # The original storage model is not changed.
+        self.assertEqual([d.name for d in self.storage.devices], ["sda", "sdb"])
+        self.assertIs(self.storage.bootloader.stage1_device, self.disk)
+        self.assertEqual(len(self.storage.roots), 1)
+
+
+class StorageSnapshotTestCase(unittest.TestCase):
+    """Test the snapshots of the storage model."""
+
+    def reset_to_snapshot_test(self):
+        """Test the reset to a snapshot."""
+        storage = Mock()
+        snapshot = StorageSnapshot(storage)
+        storage.copy.assert_called_once_with()
+        snapshot_storage = snapshot.storage
+
+        snapshot.reset_to_snapshot(storage)
+        snapshot_storage.copy.assert_called_once_with()
+        self.assertEqual(storage.devicetree, snapshot_storage.copy.return_value.devicetree)
+        self.assertTrue(snapshot.created)
+
+    def reset_to_disposed_snapshot_test(self):
+        """Test the reset to a disposed snapshot."""
+        storage = Mock()
+        snapshot = StorageSnapshot(storage)
+        snapshot_storage = snapshot.storage
+
+        snapshot.reset_to_snapshot(storage, dispose=True)
+        snapshot_storage.copy.assert_not_called()
+        self.assertEqual(storage.devicetree, snapshot_storage.devicetree)
+        self.assertEqual(storage.roots, snapshot_storage.roots)
+        self.assertEqual(storage.fsset, snapshot_storage.fsset)
+        self.assertFalse(snapshot.created)
+
+        with self.assertRaises(ValueError):
+            snapshot.reset_to_snapshot(storage)
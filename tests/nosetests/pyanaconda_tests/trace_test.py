@@ -0,0 +1,155 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import json
+import os
+import threading
+import unittest
+
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from pyanaconda.core.trace import trace_span, load_trace, save_trace, count_child_process, \
+    reset_trace
+
+
+class TraceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.path = os.path.join(self._temp_dir.name, "trace.json")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _get_spans(self):
+        return [e for e in load_trace(self.path) if e["ph"] == "X"]
+
+    def trace_span_test(self):
+        """Test the trace of a span."""
+        with trace_span("Task", "installation task", path=self.path):
+            count_child_process()
+            count_child_process()
+
+        spans = self._get_spans()
+        self.assertEqual(len(spans), 1)
+
+        span = spans[0]
+        self.assertEqual(span["name"], "Task")
+        self.assertEqual(span["cat"], "installation task")
+        self.assertEqual(span["pid"], os.getpid())
+        self.assertEqual(span["tid"], threading.get_ident())
+        self.assertGreaterEqual(span["dur"], 0)
+        self.assertEqual(span["args"]["child_processes"], 2)
+        self.assertEqual(span["args"]["failed"], False)
+        self.assertGreater(span["args"]["peak_rss_kb"], 0)
+
+        for key in ["cpu_time_ms", "children_cpu_time_ms", "children_peak_rss_kb",
+                    "read_bytes", "write_bytes"]:
+            self.assertIn(key, span["args"])
+
+    def trace_failed_span_test(self):
+        """Test the trace of a failed span."""
+        with self.assertRaises(ValueError):
+            with trace_span("Task", "installation task", path=self.path):
+                raise ValueError()
+
+        spans = self._get_spans()
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]["args"]["failed"], True)
+
+    def trace_threads_test(self):
+        """Test the trace of spans in threads."""
+        def run(name):
+            with trace_span(name, "dbus task", path=self.path):
+                pass
+
+        threads = [threading.Thread(target=run, args=("Task {}".format(i),)) for i in range(10)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        spans = self._get_spans()
+        self.assertEqual(sorted(span["name"] for span in spans),
+                         sorted("Task {}".format(i) for i in range(10)))
+
+    def load_trace_test(self):
+        """Test the load of a trace."""
+        with open(self.path, "wt") as f:
+            f.write('[\n{"name": "a", "ph": "X"},\n{"name": "b", "ph": "X"},\n{"name": "c"')
+
+        self.assertEqual(load_trace(self.path), [
+            {"name": "a", "ph": "X"},
+            {"name": "b", "ph": "X"}
+        ])
+
+    def save_trace_test(self):
+        """Test the save of a trace."""
+        with trace_span("Task", "installation task", path=self.path):
+            pass
+
+        target_path = os.path.join(self._temp_dir.name, "saved.json")
+        save_trace(target_path, path=self.path)
+
+        with open(target_path, "rt") as f:
+            data = json.load(f)
+
+        self.assertEqual(data["traceEvents"], load_trace(self.path))
+        self.assertEqual([e["name"] for e in data["traceEvents"] if e["ph"] == "X"], ["Task"])
+        self.assertEqual(os.stat(target_path).st_mode & 0o777, 0o600)
+
+    def reset_trace_test(self):
+        """Test the reset of a trace."""
+        with trace_span("Old", "installation task", path=self.path):
+            pass
+
+        reset_trace(self.path)
+        self.assertFalse(os.path.exists(self.path))
+        reset_trace(self.path)
+
+        with trace_span("New", "installation task", path=self.path):
+            pass
+
+        events = load_trace(self.path)
+        self.assertEqual([e["name"] for e in events], ["process_name", "New"])
+
+    @patch("pyanaconda.core.trace.conf")
+    def configured_trace_test(self, conf):
+        """Test the configured trace file."""
+        conf.anaconda.trace_file = self.path
+
+        with trace_span("Task", "installation task"):
+            pass
+
+        self.assertEqual([e["name"] for e in self._get_spans()], ["Task"])
+
+        reset_trace()
+        self.assertFalse(os.path.exists(self.path))
+
+    @patch("pyanaconda.core.trace.conf")
+    def disabled_trace_test(self, conf):
+        """Test the disabled tracing."""
+        conf.anaconda.trace_file = ""
+
+        with trace_span("Task", "installation task"):
+            pass
+
+        reset_trace()
+        self.assertEqual(os.listdir(self._temp_dir.name), [])
@@ -0,0 +1,206 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import stat
+import unittest
+
+from tempfile import TemporaryDirectory
+
+from pyanaconda.payload.tree_copier import TreeCopier, TreeCopyProgress, LIVE_TREE_EXCLUDES, \
+    move_tree
+
+
+class TreeCopierTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.source = os.path.join(self._temp_dir.name, "source")
+        self.destination = os.path.join(self._temp_dir.name, "destination")
+        os.makedirs(self.source)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _create_file(self, path, content=""):
+        path = os.path.join(self.source, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "wt") as f:
+            f.write(content)
+
+    def _read_file(self, path):
+        with open(os.path.join(self.destination, path), "rt") as f:
+            return f.read()
+
+    def _exists(self, path):
+        return os.path.lexists(os.path.join(self.destination, path))
+
+    def copy_files_test(self):
+        """Test the copy of files, directories and symlinks."""
+        self._create_file("etc/hostname", "localhost")
+        self._create_file("usr/bin/tool", "#!/bin/sh")
+        os.chmod(os.path.join(self.source, "usr/bin/tool"), 0o755)
+        os.makedirs(os.path.join(self.source, "var/empty"))
+        os.symlink("usr/bin", os.path.join(self.source, "bin"))
+
+        TreeCopier(self.source, self.destination, workers=2).run()
+
+        self.assertEqual(self._read_file("etc/hostname"), "localhost")
+        self.assertEqual(self._read_file("usr/bin/tool"), "#!/bin/sh")
+        self.assertEqual(os.stat(os.path.join(self.destination, "usr/bin/tool")).st_mode & 0o777,
+                         0o755)
+        self.assertTrue(os.path.isdir(os.path.join(self.destination, "var/empty")))
+        self.assertEqual(os.readlink(os.path.join(self.destination, "bin")), "usr/bin")
+
+    def copy_times_test(self):
+        """Test the copy of modification times."""
+        self._create_file("etc/hostname", "localhost")
+        os.utime(os.path.join(self.source, "etc/hostname"), (1000, 2000))
+        os.utime(os.path.join(self.source, "etc"), (3000, 4000))
+
+        TreeCopier(self.source, self.destination).run()
+
+        self.assertEqual(os.stat(os.path.join(self.destination, "etc/hostname")).st_mtime, 2000)
+        self.assertEqual(os.stat(os.path.join(self.destination, "etc")).st_mtime, 4000)
+
+    def copy_hardlinks_test(self):
+        """Test the copy of hardlinks."""
+        self._create_file("usr/bin/a", "data")
+        os.link(os.path.join(self.source, "usr/bin/a"), os.path.join(self.source, "usr/bin/b"))
+
+        copier = TreeCopier(self.source, self.destination)
+        copier.run()
+
+        st_a = os.stat(os.path.join(self.destination, "usr/bin/a"))
+        st_b = os.stat(os.path.join(self.destination, "usr/bin/b"))
+        self.assertEqual(st_a.st_ino, st_b.st_ino)
+        self.assertEqual(self._read_file("usr/bin/b"), "data")
+        self.assertEqual(copier.progress, TreeCopyProgress(2, 2, 4, 4))
+
+    def copy_special_files_test(self):
+        """Test the copy of special files."""
+        os.mkfifo(os.path.join(self.source, "fifo"))
+
+        TreeCopier(self.source, self.destination).run()
+
+        mode = os.lstat(os.path.join(self.destination, "fifo")).st_mode
+        self.assertTrue(stat.S_ISFIFO(mode))
+
+    def overwrite_test(self):
+        """Test the copy to an existing destination."""
+        self._create_file("etc/hostname", "localhost")
+        self._create_file("etc/link", "data")
+
+        os.makedirs(os.path.join(self.destination, "etc"))
+        with open(os.path.join(self.destination, "etc/hostname"), "wt") as f:
+            f.write("a much longer old content")
+        os.symlink("hostname", os.path.join(self.destination, "etc/link"))
+
+        TreeCopier(self.source, self.destination).run()
+
+        self.assertEqual(self._read_file("etc/hostname"), "localhost")
+        self.assertFalse(os.path.islink(os.path.join(self.destination, "etc/link")))
+        self.assertEqual(self._read_file("etc/link"), "data")
+
+    def excludes_test(self):
+        """Test the exclude patterns."""
+        self._create_file("dev/null")
+        self._create_file("proc/1/status")
+        self._create_file("tmp/file")
+        self._create_file("tmp/dir/file")
+        self._create_file("boot/initramfs-0-rescue-1.img")
+        self._create_file("boot/vmlinuz")
+        self._create_file("boot/loader/entries/a.conf")
+        self._create_file("boot/efi/loader/file")
+        self._create_file("boot/efi/EFI/file")
+        self._create_file("etc/machine-id")
+        self._create_file("etc/hostname")
+        self._create_file("usr/share/doc/run")
+        self._create_file("usr/share/dev/file")
+        self._create_file("run")
+
+        TreeCopier(self.source, self.destination, excludes=LIVE_TREE_EXCLUDES).run()
+
+        for path in ["dev", "proc", "tmp/file", "tmp/dir", "boot/initramfs-0-rescue-1.img",
+                     "boot/loader", "boot/efi/loader", "etc/machine-id"]:
+            self.assertFalse(self._exists(path), path)
+
+        for path in ["tmp", "boot/vmlinuz", "boot/efi/EFI/file", "etc/hostname",
+                     "usr/share/doc/run", "usr/share/dev/file", "run"]:
+            self.assertTrue(self._exists(path), path)
+
+    def progress_test(self):
+        """Test the progress of the copy."""
+        self._create_file("a", "x" * 10)
+        self._create_file("b/c", "x" * 20)
+        os.symlink("a", os.path.join(self.source, "d"))
+
+        reported = []
+        copier = TreeCopier(self.source, self.destination, callback=reported.append)
+        self.assertEqual(copier.progress, TreeCopyProgress(0, 0, 0, 0))
+
+        copier.run()
+
+        self.assertEqual(copier.progress, TreeCopyProgress(3, 3, 30, 30))
+        self.assertEqual(len(reported), 3)
+        self.assertEqual(reported[-1], TreeCopyProgress(3, 3, 30, 30))
+        self.assertEqual(reported[-1].percentage, 100)
+
+    def progress_percentage_test(self):
+        """Test the percentage of the progress."""
+        self.assertEqual(TreeCopyProgress(0, 0, 0, 0).percentage, 100)
+        self.assertEqual(TreeCopyProgress(0, 1, 0, 0).percentage, 0)
+        self.assertEqual(TreeCopyProgress(1, 2, 50, 200).percentage, 25)
+        self.assertEqual(TreeCopyProgress(2, 2, 200, 200).percentage, 100)
+
+    def failure_test(self):
+        """Test the failure of the copy."""
+        self._create_file("etc/hostname", "localhost")
+        os.makedirs(self.destination)
+
+        # The destination directory is a file.
+        with open(os.path.join(self.destination, "etc"), "wt") as f:
+            f.write("data")
+
+        with self.assertRaises(OSError):
+            TreeCopier(self.source, self.destination).run()
+
+    def move_tree_test(self):
+        """Test the move of a tree."""
+        self._create_file("etc/hostname", "new")
+        self._create_file("etc/issue", "issue")
+        self._create_file("usr/bin/tool", "tool")
+        self._create_file("boot/file", "file")
+        os.chmod(os.path.join(self.source, "etc"), 0o700)
+
+        os.makedirs(os.path.join(self.destination, "etc"))
+        os.makedirs(os.path.join(self.destination, "boot/file"))
+        os.makedirs(os.path.join(self.destination, "home"))
+
+        with open(os.path.join(self.destination, "etc/hostname"), "wt") as f:
+            f.write("old")
+
+        move_tree(self.source, self.destination)
+
+        self.assertEqual(os.listdir(self.source), [])
+        self.assertEqual(self._read_file("etc/hostname"), "new")
+        self.assertEqual(self._read_file("etc/issue"), "issue")
+        self.assertEqual(self._read_file("usr/bin/tool"), "tool")
+        self.assertEqual(self._read_file("boot/file"), "file")
+        self.assertTrue(os.path.isdir(os.path.join(self.destination, "home")))
+        self.assertEqual(os.stat(os.path.join(self.destination, "etc")).st_mode & 0o777, 0o700)
@@ -0,0 +1,140 @@
+#
+# Copyright (C) 2019  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import threading
+import time
+import unittest
+
+from pyanaconda.threading import threadMgr, AnacondaJob, AnacondaWorkerPool
+
+
+class AnacondaWorkerPoolTestCase(unittest.TestCase):
+
+    def _add_job(self, pool, name, target, **kwargs):
+        job = AnacondaJob(pool, name=name, target=target, fatal=False, **kwargs)
+        threadMgr.add(job)
+        return job
+
+    def job_callbacks_test(self):
+        """Test the callbacks of a job."""
+        pool = AnacondaWorkerPool(max_workers=2, prefix="AnaTestPool")
+        calls = []
+
+        job = self._add_job(
+            pool, "AnaTestJob-1",
+            target=lambda: calls.append("run"),
+            target_started=lambda: calls.append("started"),
+            target_stopped=lambda: calls.append("stopped"),
+            target_failed=lambda *exc_info: calls.append("failed")
+        )
+
+        self.assertTrue(threadMgr.wait("AnaTestJob-1"))
+        self.assertEqual(calls, ["started", "run", "stopped"])
+        self.assertFalse(job.is_alive())
+        self.assertFalse(threadMgr.exists("AnaTestJob-1"))
+        self.assertTrue(job.worker.name.startswith("AnaTestPool"))
+
+    def job_failure_test(self):
+        """Test the failure of a job."""
+        pool = AnacondaWorkerPool(max_workers=1, prefix="AnaTestPool")
+        calls = []
+
+        def fail():
+            raise ValueError("Fake error.")
+
+        job = self._add_job(
+            pool, "AnaTestJob-2",
+            target=fail,
+            target_failed=lambda *exc_info: calls.append(exc_info[0]),
+            target_stopped=lambda: calls.append("stopped")
+        )
+
+        job.join()
+        self.assertEqual(calls, [ValueError, "stopped"])
+
+        with self.assertRaises(ValueError):
+            threadMgr.raise_if_error("AnaTestJob-2")
+
+        # The worker is reused by the next job.
+        self._add_job(pool, "AnaTestJob-3", target=lambda: None).join()
+        self.assertEqual(pool.workers, 1)
+
+    def pool_limit_test(self):
+        """Test the limit of workers."""
+        pool = AnacondaWorkerPool(max_workers=2, prefix="AnaTestPool")
+        lock = threading.Lock()
+        running = []
+        maximum = []
+        release = threading.Event()
+
+        def run():
+            with lock:
+                running.append(None)
+                maximum.append(len(running))
+
+            release.wait()
+
+            with lock:
+                running.pop()
+
+        jobs = [self._add_job(pool, "AnaTestJob-Limit-{}".format(i), target=run)
+                for i in range(6)]
+
+        release.set()
+
+        for job in jobs:
+            job.join()
+
+        self.assertEqual(pool.workers, 2)
+        self.assertLessEqual(max(maximum), 2)
+
+    def pool_nested_jobs_test(self):
+        """Test jobs waiting for other jobs of the pool."""
+        pool = AnacondaWorkerPool(max_workers=1, prefix="AnaTestPool")
+        calls = []
+
+        def run_nested():
+            calls.append("nested")
+
+        def run():
+            self._add_job(pool, "AnaTestJob-Nested", target=run_nested).join()
+            calls.append("outer")
+
+        job = self._add_job(pool, "AnaTestJob-Outer", target=run)
+        job.join(timeout=5)
+
+        self.assertFalse(job.is_alive())
+        self.assertEqual(calls, ["nested", "outer"])
+
+    def pool_overflow_workers_test(self):
+        """Test that the overflow workers don't stay in the pool."""
+        pool = AnacondaWorkerPool(max_workers=1, prefix="AnaTestPool")
+
+        def run():
+            self._add_job(pool, "AnaTestJob-Overflow-Nested", target=lambda: None).join()
+
+        for i in range(3):
+            self._add_job(pool, "AnaTestJob-Overflow-{}".format(i), target=run).join(timeout=5)
+
+        # Wait for the overflow workers to stop.
+        for _ in range(50):
+            if pool.workers <= 1:
+                break
+
+            time.sleep(0.1)
+
+        self.assertEqual(pool.workers, 1)